@@ -6,17 +6,23 @@ Python has no GOTOs and adventure felt like it was made of nothing but a
 maze of twisty little GOTOs!  When multiple GOTOs went to the same
 line number I created a subroutine.  The resulting call tree results in
 unintended recursion, so you will notice that many subroutines return a
-small dictionary of a subroutine name and its arguments.  The dictionary
-is created at the bottommost level in the call sequence and bubbled up
-to the very top so that recursion can be avoided.  There is probably a
-better solution.
+small tuple of a subroutine and its arguments.  The tuple is created at
+the bottommost level in the call sequence and bubbled up to the very top
+so that recursion can be avoided.  There is probably a better solution.
+(These were dictionaries of the subroutine's name and arguments once, but
+a tuple is cheaper to make and to call.)
 
 The many, many globals have been collected into dictionaries.  This has
 two advantages.  One, is that is simpler to pass a global dictionary than
 the individual variables, but it also makes suspend/resume possible since
 the dictionary reflects game state.  And besides, the original suspend
 method of having the player save the core image image is more than a small
-challenge today!
+challenge today!  (The game state has since moved into a GameState object
+with compact arrays where there were lists, and the database tables into a
+dictionary of their own, cave.  Everything that plays a game is now a method
+of Game, which asks for input and reports the end of the game rather than
+calling input() and sys.exit() itself, so a program can play as many games
+at once as it likes.)
 
 The original code was written on a machine with 5 bytes per word, and
 remnants of that are still seen in the code with 5 character strings.  Bit
@@ -36,8 +42,13 @@ Mike Markowski, mike.ab3ap@gmail.com
 Oct 2024
 '''
 
-from numpy.random import random, randint
-import datetime, time
+import datetime, random, time
+import hashlib, marshal, mmap, struct, zlib
+from array import array
+from collections import deque
+from itertools import compress
+from operator import attrgetter, ne
+from types import MappingProxyType
 import os, sys
 
 #  Adventures
@@ -47,7 +58,7 @@ import os, sys
 #    750 travel options (travel, trvsiz).
 #    300 vocabulary words (ktab, atab, tabsiz).
 #    150 locations (ltext, stext, key, cond, abb, atloc, locsiz).
-#    100 objects (plac, place, fixd, fixed, link (twice), ptext, prop).
+#    100 objects (plac, place, fixd, fixed, link, blink (twice), ptext, prop).
 #     35 "action" verbs (actspk, vrbsiz).
 #    205 random messages (rtext, rtxsiz).
 #     12 different player classifications (ctext, cval, clsmax).
@@ -71,7 +82,7 @@ import os, sys
 # bitset(l,n)  =  True if cond[l] has bit n set (bit 0 is units bit)
 # forced(loc)  =  True if loc moves without asking for input (cond = 2)
 # dark(dummy)  =  True if location "loc" is dark
-# pct(n)       =  True n% of the time (n integer from 0 to 100)
+# rng.pct(n)   =  True n% of the time (n integer from 0 to 100)
 #
 # wzdark says whether the loc he's leaving was dark
 # lmwarn says whether he's been warned about lamp going dim
@@ -83,550 +94,401 @@ import os, sys
 # demo is true if this is a prime-time demonstration game
 # yea is random yes/no reply
 
-wizcom = {}
-
-toting = lambda obj: g['place'][obj] == -1
-here   = lambda obj: g['place'][obj] in [-1, g['loc']]
-at     = lambda obj: g['loc'] in [g['place'][obj], g['fixed'][obj]]
-bitset = lambda loc,n: (g['cond'][loc] & (1<<n)) != 0
-forced = lambda loc: g['cond'][loc] == 2 # Forced motion at loc.
-pct    = lambda n: 100*random() < n
-
-def dark():
-    if g['cond'][g['loc']] & 1: # Light bit set, not dark.
-        return False
-    if not here(w['lamp']): # No lamp here, must be dark.
-        return True
-    return g['prop'][w['lamp']] == 0 # Light/dark when lamp on/off.
-
-def liq():
-    '''What's in the bottle.'''
-
-    c = g['prop'][w['bottle']]
-    match max(c, -1-c):
-        case 0: return w['water']
-        case 1: return 0
-        case 2: return w['oil']
+cave = None # The CaveDatabase, once dbRead has read it.
+dbDigest = None # The sha256 of the text file it was read from.
+
+# The parsed database is cached in a binary snapshot next to the text file so
+# that a new game doesn't have to re-read and rebuild everything.  DBVERSION
+# must be bumped whenever the set or layout of the tables in DBKEYS changes.
+DBFILE = 'text'
+DBSNAP = 'text.bin'
+DBVERSION = 6
+DBKEYS = ('actspk', 'atab', 'clsses', 'cond', 'ctext', 'cval', 'dwfnbr',
+    'fixd', 'hints', 'hntmax', 'key', 'ktab', 'linbytes', 'lines', 'linuse',
+    'ltext', 'moves', 'mtext', 'pirnbr', 'plac', 'ptext', 'rtext', 'speech',
+    'stext', 'tabndx', 'travel', 'trsrs', 'trvs', 'vocab')
+
+# Saved games are binary too (see stateWrite).  SAVEVERSION must be bumped
+# whenever GameState's slots, or the types and sizes of their values, change.
+SAVEMAGIC = b'ADVSV'
+SAVEVERSION = 1
+SAVESTORE = 'saves.db' # See SaveStore.
+
+# What dwarfStats works out is kept here, with the digest of the database it
+# was worked out from.  DWARFVERSION must be bumped whenever what it works
+# out, or how, changes.
+DWARFSTATS = 'dwarves.npz'
+DWARFVERSION = 1
+
+# Numpy, asyncio, sqlite3 and multiprocessing are imported where they're
+# used rather than up here: a game at the terminal needs none of them, and
+# importing numpy or asyncio takes longer than the game does to get to its
+# first prompt.
+
+bitset = lambda loc,n: (cave['cond'][loc] & (1<<n)) != 0
+forced = lambda loc: cave['cond'][loc] == 2 # Forced motion at loc.
 
 def liqloc(loc): # Liquid at this location.
-    c = g['cond'][loc]
+    c = cave['cond'][loc]
     if   c & 0b100 == 0: return 0 # No liquid.
     elif c & 0b010 == 0: return w['water']
     else:                return w['oil']
 
-def main():
-    global g
-
-    g = globalsInit() # The many, many globals of adventure.
-    dbRead()
-    adventures()
-
-def adventures():
-    # Start-up, dwarf stuff
-
-    global c, g, w, wizcom
-
-    d = {} # Dictionary of return values during turn-taking.
-    c['demo'] = start()
-    motd(False)
-    random()
-    tk = 20*[0] # Used with dwarves later.
-    g['hinted'][3] = yes(65,1,0) # WELCOME TO ADVENTURE!!  INSTRUCTIONS?
-
-    g['newloc'] = 1
-    g['loc'] = 1 # END OF A ROAD BEFORE A SMALL BRICK BUILDING.
-    g['setup'] = 3
-    g['limit'] = 330 # Lifetime of lamp in turns.
-    if g['hinted'][3]:
-        g['limit'] = 1000 # Extra lamp time if instructions requested.
-
-    while True:
-        if d != {}:
-            match d['fn']:
-                case None:
-                    pass
-                case 'newLocation':
-                    d = newLocation(d['goto'], d['verb'], d['kk'])
-                    continue
-                case 'newTurn':
-                    d = newTurn(0, d['spk'])
-                    continue
-        # Line 2
-        # Can't leave cave once it's closing (except by Main Office).
-        if (0 < g['newloc'] < 9) and c['closng']:
-            rspeak(130) # EXIT CLOSED. LEAVE VIA OFFICE.
-            g['newloc'] = g['loc']
-            if not c['panic']:
-                c['clock2'] = 15 # Give him 15 turns to leave.
-            c['panic'] = True
+def main(seed=None, journal=None):
+    # Play one game at the terminal, each turn's output in one write.  The
+    # same seed gets the same game for the same commands.  With a journal
+    # (its file name), a game that was cut short carries on where it was.
+    j = None if journal is None else Journal(journal)
+    if j is not None:
+        for sid in sorted(j.live)[:-1]:
+            j.drop(sid) # Only the newest can be carried on here.
+    games = {} if j is None else j.recover()
+    if games:
+        game, said = games[max(games)]
+        game.redirect(StreamOutput(sys.stdout))
+        game.write(said)
+    else:
+        game = Game(StreamOutput(sys.stdout), StdRandom(seed), journal=j)
+    try:
+        if not games:
+            game.begin()
+        while game.result is None:
+            try:
+                line = input(game.prompt)
+            except (EOFError, KeyboardInterrupt):
+                game.quit()
+            else:
+                game.step(line)
+            if j is not None:
+                j.flush()
+    finally:
+        game.flush() # Anything said before it went wrong.
+        if j is not None:
+            j.close()
+
+def replay(cmds, seed=0, out=None, tick=1):
+    '''
+    Play the commands in cmds as fast as they'll go, with nothing real
+    involved: random numbers seeded with seed, a VirtualClock that moves on
+    tick minutes a command, saves kept in memory, and what the game says
+    thrown away unless out (an Output, say) is given to keep it.  Stops
+    early if the game ends.  Returns the game, how many commands it played
+    and how long that took in seconds.  The same commands and seed always
+    end in the same state (see Game.digest), so a replay tells whether a
+    change to the program changed the game as well as how fast it plays.
+    '''
 
-        # See if a dwarf has seen him and has come from where he wants to go.
-        # If so, the dwarf's blocking his way.  If coming from place forbidden
-        # to pirate (dwarves rooted in place) let him get out (and attacked).
-        if not (g['newloc'] == g['loc'] or forced(g['loc'])
-            or bitset(g['loc'],3)):
-            for i in range(1, 5+1):
-                if g['odloc'][i] != g['newloc'] or not g['dseen'][i]:
-                    continue
-                g['newloc'] = g['loc']
-                rspeak(2) # A LITTLE DWARF WITH A BIG KNIFE BLOCKS YOUR WAY.
-                break
-        g['loc'] = g['newloc']
+    clock = VirtualClock()
+    game = Game(NullOutput() if out is None else out, StdRandom(seed),
+        saves=SaveStore(':memory:'), clock=clock)
+    t = time.perf_counter()
+    game.begin()
+    n = 0
+    for cmd in cmds:
+        if game.result is not None:
+            break
+        clock.advance(tick)
+        game.step(cmd)
+        n += 1
+    return game, n, time.perf_counter() - t
 
-        # Dwarf stuff.  See earlier comments for description of variables.
-        # Remember sixth dwarf is pirate and is thus very different except for
-        # motion rules.
+def batch(scripts, seeds, workers=None):
+    '''
+    Replay every script (a list of commands) with every seed, spread over
+    workers processes, one per core unless told otherwise.  The database is
+    read here, before the workers are forked, so they share the one copy of
+    it rather than each reading and keeping its own: gc.freeze() keeps the
+    collector from writing to its pages, which would make every worker copy
+    them.  Workers are only sent which script and seed to play, and send
+    back a dictionary for each game: script (its index) and seed, turns,
+    score and mxscor as the SCORE command would have them, deaths, whether
+    the cave started closing (closng) and closed, and why the game ended
+    (None if the script ran out first).  They come back in order, scripts
+    within seeds.
+    '''
 
-        # First off, don't let the dwarves follow him into a pit or a wall.
-        # Activate the whole mess the first time he gets as far as the Hall of
-        # Mists (loc 15).  If newloc is forbidden to pirate (in particular, if
-        # it's beyond the troll bridge), bypass dwarf stuff.  That way pirate
-        # can't steal return toll, and dwarves can't meet the bear.  Also means
-        # dwarves won't follow him into dead end in maze, but c'est la vie.
-        # They'll wait for him outside the dead end.
-        if g['loc'] == 0 or forced(g['loc']) or bitset(g['newloc'],3):
-            d = location()
-            continue
+    global batchScripts
 
-        if c['dflag'] == 0:
-            if g['loc'] >= 15: # In or beyond Hall of Mists.
-                c['dflag'] = 1 # Activate dwarves.
-            d = location()
-            continue
+    dbRead()
+    jobs = [(i, seed) for seed in seeds for i in range(len(scripts))]
+    batchScripts = scripts
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [batchPlay(job) for job in jobs]
+    import gc, multiprocessing
+    gc.freeze()
+    try:
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            chunk = max(1, len(jobs)//(8*workers))
+            return pool.map(batchPlay, jobs, chunk)
+    finally:
+        gc.unfreeze()
+
+batchScripts = None # The scripts batch is playing, inherited by its workers.
+
+def batchPlay(job):
+    # Play one of batch's games and say how it went.
+    i, seed = job
+    game, n, _ = replay(batchScripts[i], seed)
+    score, mxscor = game.finish(scorng=True)
+    g = game.g
+    return {'script': i, 'seed': seed, 'turns': n, 'score': score,
+        'mxscor': mxscor, 'deaths': g.numdie, 'closng': g.closng,
+        'closed': g.closed,
+        'why': None if game.result is None else game.result.why}
+
+def begin(seed=0):
+    '''
+    A new game for step() to play, and what it says first.  Like replay's,
+    its random numbers are seeded, its clock a VirtualClock and its saves
+    kept in memory.  The numbers are a CounterRandom's, which is quick to
+    clone, so a given seed doesn't get the same game here as in replay.
+    '''
 
-        # When we encounter the first dwarf, we kill 0, 1, or 2 of the 5
-        # dwarves.  If any of the survivors is at loc, replace him with the
-        # alternate.
-        if c['dflag'] == 1:
-            if g['loc'] < 15 or pct(95): # 5% of time, dwarf follows.
-                d = location()
-                continue
-            c['dflag'] = 2 # Indicate that dwarf is following.
-            for _ in range(1,2+1): # Kill up to 2 dwarves.
-                j = 1 + randint(5)
-                # If saved not = -1, he bypassed the "start" call.
-                if pct(50) and c['saved'] == -1:
-                    g['dloc'][j] = 0 # Kill dwarf.
-            for i in range(1, 5+1):
-                if g['dloc'][i] == g['loc']: # Surviving dwarf here.
-                    g['dloc'][i] = g['daltlc'] # Alternate from Nugget Rm.
-                g['odloc'][i] = g['dloc'][i] # Move dwarf here.
-            rspeak(3) # DWARF THREW AXE AT YOU AND MISSED.
-            drop(w['axe'], g['loc'])
-            d = location()
-            continue
+    game = Game(Output(), CounterRandom(seed), saves=SaveStore(':memory:'),
+        clock=VirtualClock())
+    return game, game.begin()
 
-        # Things are in full swing.  Move each dwarf at random, except if
-        # he's seen us he sticks with us.  Dwarves never go to locs <15.  If
-        # wandering at random, they don't back up unless there's no
-        # alternative.  If they don't have to move, they attack.  And, of
-        # course, dead dwarves don't do much of anything.
-        dtotal = 0
-        attack = 0
-        stick = 0
-        for i in range(1, 6+1): # Loop through all dwarves.
-            if g['dloc'][i] == 0: # Dead dwarf.
-                continue
-            j = 1
-            kk = g['dloc'][i] # Location of living dwarf.
-            kk = g['key'][kk] # travel[key[n]] first newloc from loc n
-            if kk != 0:
-                while True:
-                    g['newloc'] = abs(g['travel'][kk])//1000%1000
-                    if not (g['newloc'] < 15 # Before Hall of Mists
-                        or g['newloc'] > 300 # Off map.
-                        or g['newloc'] == g['odloc'][i] # Dwarf's old loc.
-                        or (j > 1 and g['newloc'] == tk[j-1])
-                        or j >= 20 # Beyond end of tk[].
-                        or g['newloc'] == g['dloc'][i]
-                        or forced(g['newloc'])
-                        or (i == 6 and bitset(g['newloc'],3))
-                        or abs(g['travel'][kk])//1000000 == 100):
-                        tk[j] = g['newloc']
-                        j += 1
-                    kk += 1 # Look at next potential newloc.
-                    if g['travel'][kk-1] < 0: # Last possible newloc.
-                        break
-            tk[j] = g['odloc'][i]
-            if j >= 2:
-                j -= 1
-            j = 1 + randint(j)
-            g['odloc'][i] = g['dloc'][i]
-            g['dloc'][i] = tk[j]
-            g['dseen'][i] = (
-                (g['dseen'][i] and g['loc'] >= 15) # Seen and >= Hall of Mists.
-                or g['dloc'][i] == g['loc']        # Dwarf is here.
-                or g['odloc'][i] == g['loc'])      # Dwarf was just here.
-            if not g['dseen'][i]: # Not seen by dwarf.
-                continue
-            g['dloc'][i] = g['loc']
-            if i == 6: # == pirate.
-                # The pirate's spotted him.  He leaves him alone once we've
-                # found chest.  K counts if a treasure is here.  If not, and
-                # tally = tally2 plus one for an unseen chest, let the pirate
-                # be spotted.  Use place[messag] to determine if pirate's
-                # been seen, since place[chest] = 0 could mean he threw it to
-                # troll.
-                if g['loc'] == g['chloc'] or g['prop'][w['chest']] >= 0:
-                    continue
-                k = 0
-                for j in range(50, g['maxtrs']+1): # Treasures are >= 50.
-                    # Pirate won't take pyramid from Plover Room or Dark Room
-                    # (too easy!).
-                    if (j != w['pyram'] or not g['loc']
-                        in [g['plac'][w['pyram']], g['plac'][w['emrald']]]):
-                        if toting(j): # Non-pyramid, non-emerald here.
-                            break
-                    if here(j):
-                        k = 1
-                else:
-                    if (g['tally'] == g['tally2']+1      # Unseen chest.
-                        and k == 0                       # No treasure here.
-                        and g['place'][w['messag']] == 0
-                        and here(w['lamp'])              # Lamp is here
-                        and g['prop'][w['lamp']] == 1):  # and is on.
-                        rspeak(186) # FAINT RUSTLING NOISES...
-                        move(w['chest'], g['chloc'])
-                        move(w['messag'], g['chloc2'])
-                        g['dloc'][6] = g['chloc']
-                        g['odloc'][6] = g['chloc']
-                        g['dseen'][6] = False
-                        continue
-                    if g['odloc'][6] != g['dloc'][6] and pct(20):
-                        rspeak(127) # FAINT RUSTLING NOISES...
-                    continue
+def step(state, command):
+    '''
+    Play command in a copy of the game state, leaving state itself as it
+    was: returns the new state and what the game said.  A minute passes on
+    the clock, as in replay.  For searches and what-ifs, which try many
+    commands from the one state.
+    '''
 
-                rspeak(128) # A BEARDED PIRATE!
-                if g['place'][w['messag']] == 0:
-                    move(w['chest'],g['chloc'])
-                move(w['messag'],g['chloc2'])
-                for j in range(50, g['maxtrs']):
-                    if (j == w['pyram'] and (g['loc']
-                        in [g['plac'][w['pyram']], g['plac'][w['emrald']]])):
-                        continue
-                    if at(j) and g['fixed'][j] == 0:
-                        carry(j,g['loc'])
-                    if toting(j):
-                        drop(j,g['chloc'])
-                g['dloc'][6] = g['chloc']
-                g['odloc'][6] = g['chloc']
-                g['dseen'][6] = False
-                continue
+    new = state.clone()
+    if isinstance(new.clock, VirtualClock):
+        new.clock.advance(1)
+    return new, new.step(command)
 
-            # This threatening little dwarf is in the room with him!
-            dtotal += 1
-            if g['odloc'][i] != g['dloc'][i]:
-                continue
-            attack += 1
-            if g['knfloc'] >= 0:
-                g['knfloc'] = g['loc'] # Put knife here.
-            if 1000*random() < 95*(c['dflag']-2):
-                stick += 1
+def named(d):
+    # Continuation d with its functions given by name, for comparing and
+    # hashing.
+    if isinstance(d, tuple):
+        return tuple([named(i) for i in d])
+    return d.__name__ if callable(d) else d
 
-        # Now we know what's happening.  Let's tell the poor sucker about it.
-        if dtotal == 0: # Dwarf total is zero.
-            d = location()
-            continue
-        if dtotal != 1:
-            s = '\n THERE ARE %d THREATENING LITTLE DWARVES IN THE ROOM WITH '
-            s += 'YOU.'
-            print(s % dtotal)
-        else:
-            rspeak(4) # THREATENING LITTLE DWARF
-        if attack == 0:
-            d = location()
-            continue
-        if c['dflag'] == 2:
-            c['dflag'] = 3
-        # If saved not = -1, he bypassed the "start" call.  Dwarves get
-        # *very* mad!
-        if c['saved'] != -1:
-            c['dflag'] = 20
-        if attack == 1:
-            rspeak(5) #  KNIFE IS THROWN AT YOU!
-            k = 52
-        else:
-            print('\n %d OF THEM THROW KNIVES AT YOU!' % attack)
-            k = 6
-        if stick <= 1:
-            rspeak(k+stick)
-            if stick == 0:
-                d = location()
-                continue
-        else:
-            print('\n %d OF THEM GET YOU!' % stick)
-        g['oldlc2'] = g['loc']
-        d = dead(pit=False)
+def dwarfTables():
+    '''
+    Where the dwarves and the pirate can wander, cave['dwfnbr'] and
+    cave['pirnbr'], as numpy arrays for dwarvesBatch.  nbrs[p][k, loc] is
+    the kth newloc from loc (p is 1 for the pirate, 0 for a dwarf), padded
+    out with 0s: newlocs are a place per column so that a batch can take a
+    column per game.  twice[p][k, loc] is set where that newloc is the same
+    as the one two before it, or twice[p] is None if there's none such.
+    Made the first time they're wanted, once the database has been read.
+    '''
 
-def analyseObject(obj, verb=0):
+    global dwarfNbrs
+    if dwarfNbrs is None:
+        import numpy
+        tables = [cave['dwfnbr'], cave['pirnbr']]
+        width = max([len(t) for table in tables for t in table])
+        nbrs, twice = [], []
+        for table in tables:
+            a = numpy.zeros((width, len(table)), 'h')
+            for loc,t in enumerate(table):
+                a[:len(t), loc] = t
+            again = numpy.zeros(a.shape, bool)
+            again[2:] = (a[2:] == a[:-2]) & (a[2:] != 0)
+            nbrs.append(a)
+            twice.append(again if again.any() else None)
+        dwarfNbrs = nbrs, twice
+    return dwarfNbrs
+
+dwarfNbrs = None # As made by dwarfTables.
+
+def dwarvesBatch(dloc, odloc, dseen, loc, dflag, draws):
     '''
-    Analyse an object word.  See if the thing is here, whether we've got a
-    verb yet, and so on.  Object must be here unless verb is "find" or
-    "invent(ory)" (and no new verb yet to be analysed).  Water and oil are
-    also funny, since they are never actually dropped at any location, but
-    might be here inside the bottle or as a feature of the location.
+    Move the dwarves and the pirate of n games at once, as Game.dwarvesMove
+    does for one once things are in full swing: each moves as in dwarfMove,
+    a dwarf who's seen him joins him, and a dwarf who was already with him
+    attacks, his knife sticking with the chance dwarvesMove gives it.
+
+    dloc, odloc and dseen are n by 7 numpy arrays, as in GameState, and are
+    updated in place; loc and dflag have one entry per game.  Draws[k] is
+    the next 11 numbers game k's rng would give, the most this can use.  A
+    game gets the same moves from here as from dwarvesMove, if its rng
+    gives the same numbers.  What's returned is numpy arrays of how many
+    dwarves are in the room with him, how many attack and how many hit him
+    in each game, whether the pirate's spotted him and how many of its
+    draws each game used.  The rest is left to the caller: what the pirate
+    does once he's spotted him, and knfloc, which dwarvesMove sets to loc
+    in a game where any attack (unless it's below 0).  Games don't call
+    this themselves; it's for a program with many of them.
     '''
 
-    global g
+    import numpy
+    nbrs, twice = dwarfTables()
+    n = len(loc)
+    rows = numpy.arange(n)
+    used = numpy.zeros(n, 'b')
+    dtotal = numpy.zeros(n, 'b')
+    attack = numpy.zeros(n, 'b')
+    stick = numpy.zeros(n, 'b')
+    for i in range(1, 6+1):
+        p = int(i == 6)
+        here, old = dloc[:, i].copy(), odloc[:, i].copy()
+        alive = here != 0 # Dead dwarves don't do much of anything.
+        # dwarfMove's candidates, a column per game: not back to odloc, nor
+        # a repeat of the one before, which can only be when an odloc
+        # between them is left out.  No more than 19 of them.
+        cand = nbrs[p].take(here, axis=1)
+        back = cand == old
+        ok = (cand != 0) & ~back
+        if twice[p] is not None:
+            ok[2:] &= ~(back[1:-1] & twice[p].take(here, axis=1)[2:])
+        rank = ok.view('b').copy() # Numbering them, quicker than cumsum.
+        for k in range(1, len(rank)):
+            rank[k] += rank[k-1]
+        ok &= rank <= 19
+        j = numpy.minimum(rank[-1], 19)
+        pick = (j*draws[rows, used]).astype('b') + 1 # As Random.randint.
+        new = ((ok & (rank == pick))*cand).sum(axis=0, dtype='h')
+        new = numpy.where(j > 0, new, old) # Back to odloc if he must.
+        used += alive
+        seen = alive & ((dseen[:, i].astype(bool) & (loc >= 15))
+            | (new == loc) | (here == loc))
+        odloc[:, i] = numpy.where(alive, here, old)
+        dloc[:, i] = numpy.where(seen, loc, numpy.where(alive, new, here))
+        dseen[:, i] = numpy.where(alive, seen, dseen[:, i])
+        if i == 6:
+            break
+        dtotal += seen
+        hits = seen & (odloc[:, i] == loc) # He didn't have to move.
+        attack += hits
+        stick += hits & (1000*draws[rows, used] < 95*(dflag-2))
+        used += hits
+    return dtotal, attack, stick, seen, used
+
+def dwarfChain(nbr, starts):
+    '''
+    The Markov chain a wandering dwarf follows, nbr being where he may go
+    from each place (cave['dwfnbr'], or cave['pirnbr'] for the pirate).
+    Where dwarfMove takes him next depends on where he was as well as where
+    he is, since he won't go back unless he must, so a state of the chain is
+    a pair (odloc, dloc).  Only the states he can get to from starts are
+    included.  Returns them and the matrix of the chances of going from
+    each to each.
+    '''
 
-    g['obj'] = obj # For use in transitive().
-    skip = g['fixed'][obj] != g['loc'] and not here(obj)
-    while True:
-        if not skip:
-            if g['wd2'] != '': # Line 5010
-                return secondWord()
-            if g['verb'] != 0:
-                spk = g['actspk'][g['verb']] # Default message for verb.
-                return transitive(spk)
-            tk = g['wd1'].strip() + g['wd1x'].strip() + '?'
-            print('\n WHAT DO YOU WANT TO DO WITH THE %s' % tk)
-            return {'fn':'newTurn', 'spk':-1}
-        skip = False
-        if obj == w['grate']: # Line 5100
-            if g['loc'] in [1,4,7]: # End of road, valley or streambed slit.
-                obj = w['dprssn']
-            if 9 < g['loc'] < 15: # In cave, haven't reached Hall of Mists.
-                obj = w['entrnc']
-            if obj != w['grate']:
-                return {'fn':'newLocation','goto':8, 'verb':obj, 'kk':-1}
-        if obj == w['dwarf']:
-            upTop = False
-            for i in range(1, 5+1):
-                if g['dloc'][i] == g['loc'] and c['dflag'] >= 2:
-                    upTop = True
-            if upTop:
+    import numpy
+    states = list(starts)
+    index = {s: i for i,s in enumerate(states)}
+    moves = []
+    for odloc, dloc in states: # Which grows as new states turn up.
+        tk = [] # As in dwarfMove.
+        for newloc in nbr[dloc]:
+            if newloc == odloc or (tk and newloc == tk[-1]):
                 continue
-        if (liq() == obj and here(w['bottle'])) or obj == liqloc(g['loc']):
-            continue
-        if (g['obj'] == w['plant'] and at(w['plant2'])
-            and g['prop'][w['plant2']] != 0):
-            g['obj'] = w['plant2']
-            continue
-        if g['obj'] == w['knife'] and g['knfloc'] == g['loc']:
-            g['knfloc'] = -1
-            spk = 116 # DWARVES' KNIVES VANISH AS THEY STRIKE WALLS OF THE CAVE.
-            return {'fn':'newTurn', 'spk':spk}
-        if g['obj'] == w['rod'] and here(w['rod2']):
-            g['obj'] = w['rod2']
-            continue
-        if (g['verb'] in [w['find'], w['invent']]) and g['wd2'] == '':
-            continue
-        break
-    tk = g['wd1'].strip() + g['wd1x'].strip() + ' HERE.'
-    print('\n I SEE NO %s' % tk)
-    return {'fn':'newTurn', 'spk':0}
-
-def analyseVerb(verb):
-    # Analyse a verb.  Remember what it was, go back for object if second word
-    # unless verb is "say", which snarfs arbitrary second word.
-
-    g['verb'] = verb
-    if g['wd2'] != '' and verb != w['say']:
-        return secondWord()
-    if verb == w['say']:
-        if g['wd2'] == '':
-            g['obj'] = 0
-        else:
-            g['obj'] = vocab(g['wd2'],-1)
-    spk = g['actspk'][verb] # Default message for verb.
-    if g['obj'] == 0:
-        return intransitive(spk)
-    else:
-        return transitive(spk)
-
-def analyseWord():
-    global wd1, wd1x
-
-    i = vocab(g['wd1'], -1)
-    if i == -1:
-        # Gee, i don't understand.
-        tk = g['wd1'].strip() + g['wd1x'].strip() + '".'
-        print('\n SORRY, I DON\'T KNOW THE WORD "%s' % tk)
-        return {'fn':'newTurn', 'spk':-1}
-    wType,wNum = divmod(i, 1000)
-
+            if len(tk) >= 19:
+                break
+            tk.append(newloc)
+        if not tk:
+            tk = [odloc]
+        for newloc in tk:
+            s = (dloc, newloc)
+            if s not in index:
+                index[s] = len(states)
+                states.append(s)
+            moves.append((index[odloc, dloc], index[s], 1/len(tk)))
+    p = numpy.zeros((len(states), len(states)))
+    for i,j,chance in moves:
+        p[i, j] += chance
+    return states, p
+
+def dwarfStats():
     '''
-    Section 4: Vocabulary.  Each line contains a number (n), a tab, and a
-       five-letter word.  Call m = n/1000.  If m = 0, then the word is a motion
-       verb for use in travelling (see section 3).  Else, if m = 1, the word is
-       an object.  Else, if m = 2, the word is an action verb (such as "carry"
-       or "attack").  Else, if m = 3, the word is a special case verb (such as
-       "dig") and n mod 1000 is an index into section 6.  Objects from 50 to
-       (currently, anyway) 79 are considered treasures (for pirate, closeout).
+    How the dwarves and the pirate get about, worked out from the travel
+    table rather than by playing games, for judging how hard the game is.
+    Once the dwarves are on the move (dflag 2), each wanders as a Markov
+    chain (see dwarfChain), until he spots him: he's standing where the
+    dwarf moved from or to.  Returns a dictionary of numpy arrays, indexed
+    by location:
+      dwarf    Chance that a dwarf who's wandered a long while is there.
+      meet     Expected turns until a dwarf, wandering a long while, first
+               spots him there if he stays put (inf if none ever can).
+      pirate   Chance that the pirate, likewise, is there.
+      ambush   Chance, each turn, that the pirate spots him there.
+    The long run of a dwarf is the chain's stationary distribution, for
+    dwarves starting where postDbInit puts them.  Working it out takes a
+    while, so it's kept in DWARFSTATS for as long as the database and
+    DWARFVERSION stay the same.
     '''
 
-    match wType:
-        case 0: # Motion verb.
-            return newLocation(8, wNum) # goto 2 or newLoc.
-        case 1: # Object.
-            return analyseObject(wNum) # newTurn or newLoc.
-        case 2: # Action verb.
-            return analyseVerb(wNum) # trans() or intrans()
-        case 3: # Special verb like "DIG".
-            return {'fn':'newTurn', 'spk':wNum}
-        case _:
-            bug(22) # Vocabulary type (n/1000) not between 0 and 3.
-
-def attack(spk):
-    # ATTACK.  Assume target if unambiguous.  "Throw" also links here.
-    # Attackable objects fall into two categories: enemies (snake, dwarf,
-    # etc.) and others (bird, clam).  Ambiguous if two enemies, or if no
-    # enemies but two others.
-    #
-    # Verb can be ATTAC,KILL,FIGHT,HIT,STRIK,SLAY.
+    import zipfile
+    import numpy
+    dbRead()
+    key = numpy.frombuffer(dbDigest + DWARFVERSION.to_bytes(2, 'big'), 'u1')
+    try:
+        with numpy.load(DWARFSTATS) as f:
+            if numpy.array_equal(f['key'], key):
+                return {k: f[k] for k in f.files if k != 'key'}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        pass
 
-    global c, g, w
+    n = len(cave['dwfnbr'])
+    stats = {}
+    for who,nbr,starts in [('dwarf', 'dwfnbr', [19, 27, 33, 44, 64]),
+        ('pirate', 'pirnbr', [114])]:
+        states, p = dwarfChain(cave[nbr], [(loc, loc) for loc in starts])
+        m = len(states)
+        # The stationary distribution: pi p = pi, summing to 1.
+        a = numpy.vstack([p.T - numpy.eye(m), numpy.ones(m)])
+        b = numpy.zeros(m+1)
+        b[m] = 1
+        pi = numpy.linalg.lstsq(a, b, rcond=None)[0]
+        odloc = numpy.array([s[0] for s in states])
+        dloc = numpy.array([s[1] for s in states])
+        stats[who] = numpy.bincount(dloc, pi, n)
+        spots = numpy.zeros(n) # Chance each turn he's spotted at loc.
+        meet = numpy.full(n, numpy.inf)
+        for loc in range(n):
+            seen = (odloc == loc) | (dloc == loc)
+            if not seen.any():
+                continue
+            spots[loc] = pi[seen].sum()
+            if who != 'dwarf':
+                continue
+            # Expected moves t[s] from each state to a seen one: t = 1 + p t
+            # with t 0 once seen, over the states that can get to one.
+            reach = seen.copy()
+            while True:
+                more = reach | (p[:, reach] > 0).any(axis=1)
+                if (more == reach).all():
+                    break
+                reach = more
+            todo = reach & ~seen
+            t = numpy.full(m, numpy.inf)
+            t[seen] = 0
+            q = p[numpy.ix_(todo, todo)]
+            t[todo] = numpy.linalg.solve(numpy.eye(len(q)) - q,
+                numpy.ones(len(q)))
+            after = pi @ p # Where he might be after his first move.
+            meet[loc] = 1 + after[after > 1e-12] @ t[after > 1e-12]
+        if who == 'dwarf':
+            stats['meet'] = meet
+        else:
+            stats['ambush'] = spots
 
-    for i in range(1, 5+1):
-        if g['dloc'][i] == g['loc'] and c['dflag'] >= 2:
-            break # Dwarf here and following player.
-    else:
-        i = 0
-    if g['obj'] == 0: # Intransitive, find object.
-        if i != 0: # Which following dwarf is present.
-            g['obj'] = w['dwarf']
-        if here(w['snake']):
-            g['obj'] = g['obj']*100 + w['snake']
-        if at(w['dragon']) and g['prop'][w['dragon']] == 0:
-            g['obj'] = g['obj']*100 + w['dragon']
-        if at(w['troll']):
-            g['obj'] = g['obj']*100 + w['troll']
-        if here(w['bear']) and g['prop'][w['bear']] == 0:
-            g['obj'] = g['obj']*100 + w['bear']
-        if g['obj'] > 100: # Multiple potential objects here.
-            return what() # Ask, ATTACK WHAT?
-        if g['obj'] == 0: # Still looking for object.
-            # Can't attack bird by throwing axe.
-            if here(w['bird']) and g['verb'] != w['throw']:
-                g['obj'] = w['bird']
-            # Clam and oyster both treated as clam for intransitive case; no
-            # harm done.
-            if here(w['clam']) or here(w['oyster']):
-                g['obj'] = 100*g['obj'] + w['clam']
-            if g['obj'] > 100: # Multiple potential objects here.
-                return what()
-    if g['obj'] == w['bird']:
-        spk = 137 # OH, LEAVE THE POOR UNHAPPY BIRD ALONE.
-        if c['closed']:
-            return {'fn':'newTurn', 'spk':spk}
-        dstroy(w['bird'])
-        g['prop'][w['bird']] = 0 # Dead bird.
-        if g['place'][w['snake']] == g['plac'][w['snake']]: # At initial loc.
-            g['tally2'] += 1 # Cannot find bird again.
-        spk = 45 # THE LITTLE BIRD IS NOW DEAD.
-    if g['obj'] == 0: # Never found an object.
-        spk = 44 # THERE IS NOTHING HERE TO ATTACK.
-    if g['obj'] in [w['clam'], w['oyster']]:
-        spk = 150 # THE SHELL IS VERY STRONG
-    if g['obj'] == w['snake']:
-        spk = 46 # ATTACKING THE SNAKE DOESN'T WORK.
-    if g['obj'] == w['dwarf']:
-        spk = 49 # WITH WHAT?  YOUR BARE HANDS?
-    if g['obj'] == w['dwarf'] and c['closed']:
-        dwarvesDisturbed() # Game ends.
-    if g['obj'] == w['dragon']:
-        spk = 167 # THE POOR THING IS ALREADY DEAD!
-    if g['obj'] == w['troll']:
-        spk = 157 # TROLLS ARE CLOSE RELATIVES WITH THE ROCKS...
-    if g['obj'] == w['bear']:
-        spk = 165 + (g['prop'][w['bear']] + 1)//2
-    if g['obj'] != w['dragon'] or g['prop'][w['dragon']] != 0:
-        return {'fn':'newTurn', 'spk':spk}
-    # Fun stuff for dragon.  If he insists on attacking it, win!  Set prop to
-    # dead, move dragon to central loc (still fixed), move rug there (not
-    # fixed), and move him there, too.  Then do a null motion to get new
-    # description.
-    rspeak(49) # WITH WHAT?  YOUR BARE HANDS?
-    g['verb'] = 0
-    g['obj'] = 0
-    g['wd1'],g['wd1x'],g['wd2'],g['wd2x'] = getin()
-    if g['wd1'] not in ['Y', 'YES']:
-        return foobarEtc(g['verb'])
-    pspeak(w['dragon'],1) # YOU HAVE JUST VANQUISHED A DRAGON
-    g['prop'][w['dragon']] = 2 # Dead.
-    g['prop'][w['rug']] = 0 # Put rug here.
-    k = (g['plac'][w['dragon']] + g['fixd'][w['dragon']])//2
-    move(w['dragon'] + 100, -1)
-    move(w['rug'] + 100, 0)
-    move(w['dragon'], k)
-    move(w['rug'], k)
-    for obj in range(1, 100+1):
-        if (g['place'][obj] == g['plac'][w['dragon']]
-            or g['place'][obj] == g['fixd'][w['dragon']]):
-            move(obj, k)
-    g['loc'] = k
-    k = w['null']
-    return {'fn':'newLocation', 'goto':8, 'verb':k, 'kk':-1}
-
-def badMotion(k):
-    #  Non-applicable motion.  Various messages depending on word given.
-
-    spk = 12 # I DON'T KNOW HOW TO APPLY THAT WORD HERE.
-    if 43 <= k <= 50:
-        spk = 9 # THERE IS NO WAY TO GO THAT DIRECTION.
-    if k in [29, 30]:
-        spk = 9
-    if k in [7, 36, 37]:
-        spk = 10 # USE COMPASS POINTS OR NEARBY OBJECTS.
-    if k in [11, 19]:
-        spk = 11 # USE COMPASS POINTS OR NAME SOMETHING IN GENERAL DIRECTION
-#   if verb in [w['find'], w['invent']]: # XXX BUG??? verb, not k.
-    if k in [w['find'], w['invent']]:
-        spk = 59 # I CANNOT TELL YOU WHERE REMOTE THINGS ARE.
-    if k in [62, 65]:
-        spk = 42 # NOTHING HAPPENS.
-    if k == 17:
-        spk = 80 # WHICH WAY?
-    rspeak(spk)
-    return {'fn':None} # goto 2
-
-def blast(spk):
-    # BLAST.  No effect unless you've got dynamite, which is a neat trick!
-
-    if g['prop'][w['rod2']] < 0 or not c['closed']:
-        return {'fn':'newTurn', 'spk':spk}
-    c['bonus'] = 133 # LOUD EXPLOSION...BURYING THE DWARVES
-    if g['loc'] == 115: # NE storage room.
-        c['bonus'] = 134 # LOUD EXPLOSION...BURYING THE SNAKES
-    if here(w['rod2']):
-        c['bonus'] = 135 # LOUD EXPLOSION...YOU ARE SPLASHED ACROSS WALLS
-    rspeak(c['bonus'])
-    finish()
-
-def breakObj(spk):
-    #  BREAK.  Only works for mirror in repository and, of course, the vase.
-
-    global g
-
-    if g['obj'] == w['mirror']:
-        spk = 148 # TOO FAR UP FOR YOU TO REACH.
-    if not (g['obj'] == w['vase'] and g['prop'][w['vase']] == 0):
-        if g['obj'] != w['mirror'] or not c['closed']:
-            return {'fn':'newTurn', 'spk':spk}
-        rspeak(197) # MIRROR IT SHATTERS INTO A MYRIAD TINY FRAGMENTS.
-        dwarvesDisturbed()
-    spk = 198 # VASE HURLED DELICATELY TO THE GROUND.
-    if toting(w['vase']):
-        drop(w['vase'], g['loc'])
-    g['prop'][w['vase']] = 2 # Shattered.
-    g['fixed'][w['vase']] = -1 # Gone.
-    return {'fn':'newTurn', 'spk':spk}
-
-def brief():
-    # BRIEF.  Intransitive only.  Suppress long descriptions after first
-    # time.
-
-    global c
-
-    spk = 156 # I'LL ONLY DESCRIBE A PLACE IN FULL THE FIRST TIME
-    c['abbnum'] = 10000
-    c['detail'] = 3
-    return {'fn':'newTurn', 'spk':spk}
+    tmp = '%s.%d' % (DWARFSTATS, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            numpy.savez(f, key=key, **stats)
+        os.replace(tmp, DWARFSTATS)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return stats
 
 def bug(num):
     '''
     The following conditions are currently considered fatal bugs.  Numbers < 20
-    are detected while reading the database; the others occur at "run time".
+    are detected while reading the database; the others occur at "run time"
+    (though 23 and 24 are now checked as the database is read, see verbCheck).
       0   Message line > 70 characters
       1   Null line in message
       2   Too many words of messages
@@ -653,174 +515,79 @@ def bug(num):
     print(' ERROR CODE =%2d\n' % num)
     sys.exit(0)
 
-def carry(obj, where):
+class CaveDatabase(dict):
     '''
-    Start toting an object, removing it from the list of things at its former
-    location.  Incr holdng unless it was already being toted.  If obj>100
-    (moving "fixed" second loc), don't change place or holdng.
+    The database tables once dbRead has finished with them.  They're read
+    once per process and the one copy is shared by every game in it, so
+    nothing may change them: the lists become tuples and the dictionaries
+    read-only views, and the CaveDatabase itself refuses to be changed.  It
+    is still a dict underneath so cave['ltext'] costs what it always did.
     '''
 
-    global g
+    def __init__(self, tables):
+        super().__init__({k: self.freeze(v) for k,v in tables.items()})
 
-    if obj <= 100:
-        if g['place'][obj] == -1:
-            return
-        g['place'][obj] = -1
-        c['holdng'] += 1
-    if g['atloc'][where] == obj:
-        g['atloc'][where] = g['link'][obj]
-        return
-    temp = g['atloc'][where]
-    while True:
-        if g['link'][temp] == obj:
-            break
-        temp = g['link'][temp]
-    g['link'][temp] = g['link'][obj]
-
-def caveMsg():
-    # CAVE.  Different messages depending on whether above ground.
-    if g['loc'] < 8:
-        rspeak(57) # I DON'T KNOW WHERE THE CAVE IS, TRY THE STREAM.
-    if g['loc'] >= 8:
-        rspeak(58) # I NEED MORE DETAILED INSTRUCTIONS TO DO THAT.
-    return {'fn':None} # goto 2
-
-def ciao():
-    '''
-    Exits, after issuing reminder to save new core image.  Used when
-    suspending and when creating new version via magic mode.  On some
-    systems, the core image is lost once the program exits.  If so, set k=31
-    instead of 32.
-
-    --
-    The above is of course no longer applicable, but let's print it for old
-    times' sake. (mm, Oct 2024)
-    '''
-    k = 32
-    mspeak(k) # BE SURE TO SAVE YOUR CORE-IMAGE...
-    if k == 31:
-        a,b,c,d = getin()
-    sys.exit(0)
+    @staticmethod
+    def freeze(v):
+        if isinstance(v, list):
+            return tuple([CaveDatabase.freeze(i) for i in v])
+        if isinstance(v, dict):
+            return MappingProxyType({k: CaveDatabase.freeze(i)
+                for k,i in v.items()})
+        return v
 
-#
-#   C a v e   C l o s i n g   a n d   S c o r i n g
-#
-#   closeClock1 & closeClock2
-
-    '''
-    These sections handle the closing of the cave.  The cave closes "clock1"
-    turns after the last treasure has been located (including the pirate's
-    chest, which may of course never show up).  Note that the treasures need
-    not have been taken yet, just located.  Hence clock1 must be large enough
-    to get out of the cave (it only ticks while inside the cave).  When it
-    hits zero, we branch to 10000 to start closing the cave, and then sit
-    back and wait for him to try to get out.  If he doesn't within clock2
-    turns, we close the cave; if he does try, we assume he panics, and give
-    him a few additional turns to get frantic before we close.  When clock2
-    hits zero, we branch to 11000 to transport him into the final puzzle.
-    Note that the puzzle depends upon all sorts of random things.  For
-    instance, there must be no water or oil, since there are beanstalks which
-    we don't want to be able to water, since the code can't handle it.  Also,
-    we can have no keys, since there is a grate (having moved the fixed
-    object!) there separating him from all the treasures.  Most of these
-    problems arise from the use of negative prop numbers to suppress the
-    object descriptions until he's actually moved the objects.
-
-    When the first warning comes, we lock the grate, destroy the bridge, kill
-    all the dwarves (and the pirate), remove the troll and bear (unless
-    dead), and set "closng" to true.  Leave the dragon; too much trouble to
-    move it.  From now until clock2 runs out, he cannot unlock the grate,
-    move to any location outside the cave (loc<9), or create the bridge.  Nor
-    can he be resurrected if he dies.  Note that the snake is already gone,
-    since he got to the treasure accessible only via the hall of the Mt.
-    King.  Also, he's been in giant room (to get eggs), so we can refer to
-    it.  Also also, he's gotten the pearl, so we know the bivalve is an
-    oyster.  *And*, the dwarves must have been activated, since we've found
-    chest.
-    '''
-
-def closeClock1():
-    global g
-
-    # Line 10000
-    g['prop'][w['grate']] = 0 # Lock the grate.
-    g['prop'][w['fissur']] = 0 # Destroy the bridge.
-    for i in range(1, 6+1):
-        g['dseen'][i] = False
-        g['dloc'][i] = 0 # Kill each dwarf or pirate.
-    move(w['troll'], 0) # Remove troll.
-    move(w['troll']+100, 0)
-    move(w['troll2'], g['plac'][w['troll']])
-    move(w['troll2']+100, g['fixd'][w['troll']])
-    juggle(w['chasm'])
-    if g['prop'][w['bear']] != 3: # ==3, already dead.
-        dstroy(w['bear']) # Remove bear.
-    g['prop'][w['chain']] = 0 # Lock chain.
-    g['fixed'][w['chain']] = 0
-    g['prop'][w['axe']] = 0 # Take axe.
-    g['fixed'][w['axe']] = 0
-    rspeak(129) # "ALL ADVENTURERS EXIT IMMEDIATELY THROUGH MAIN OFFICE."
-    c['clock1'] = -1
-    c['closng'] = True
-    return parseWords()
-
-def closeClock2():
-
-    '''
-    Once he's panicked, and clock2 has run out, we come here to set up the
-    storage room.  The room has two locs, hardwired as 115 (NE) and 116 (SW).
-    At the NE end, we place empty bottles, a nursery of plants, a bed of
-    oysters, a pile of lamps, rods with stars, sleeping dwarves, and him.  At
-    the SW end we place grate over treasures, snake pit, covey of caged
-    birds, more rods, and pillows.  A mirror stretches across one wall.  Many
-    of the objects come from known locations and/or states (E.g. the snake is
-    known to have been destroyed and needn't be carried away from its old
-    "place"), making the various objects be handled differently.  We also
-    drop all other objects he might be carrying (lest he have some which
-    could cause trouble, such as the keys).  We describe the flash of light
-    and trundle back.
-    '''
-    global g, w
-
-    # Line 11000
-    g['prop'][w['bottle']] = put(w['bottle'],115,1)
-    g['prop'][w['plant']] = put(w['plant'],115,0)
-    g['prop'][w['oyster']] = put(w['oyster'],115,0)
-    g['prop'][w['lamp']] = put(w['lamp'],115,0)
-    g['prop'][w['rod']] = put(w['rod'],115,0)
-    g['prop'][w['dwarf']] = put(w['dwarf'],115,0)
-    g['loc'] = 115
-    g['oldloc'] = 115
-    g['newloc'] = 115
-
-    # Leave the grate with normal (non-negative) property.
-    foo = put(w['grate'],116,0)
-    g['prop'][w['snake']] = put(w['snake'],116,1)
-    g['prop'][w['bird']] = put(w['bird'],116,1)
-    g['prop'][w['cage']] = put(w['cage'],116,0)
-    g['prop'][w['rod2']] = put(w['rod2'],116,0)
-    g['prop'][w['pillow']] = put(w['pillow'],116,0)
-
-    g['prop'][w['mirror']] = put(w['mirror'],115,0)
-    g['fixed'][w['mirror']] = 116
-
-    for i in range(1, 100+1):
-        if toting(i):
-            dstroy(i) # Remove anything he's carrying.
-
-    rspeak(132) # BLINDING FLASH OF LIGHT...
-    c['closed'] = True
-    return {'fn':None} # goto 2
-
-def closeDemo():
-    # And, of course, demo games are ended by the wizard.
-
-    global w
-
-    # Line 13000
-    mspeak(1) # SOMEWHERE NEARBY IS COLOSSAL CAVE,...
-    c['gaveup'] = True
-    finish()
+    def readOnly(self, *args, **kwargs):
+        raise TypeError('the cave database is shared and read-only')
+
+    __setitem__ = __delitem__ = __ior__ = readOnly
+    clear = pop = popitem = setdefault = update = readOnly
+
+def caveInit():
+    # The database tables, empty until dbRead fills them in.  They don't
+    # change once read, so everything that does is in GameState instead.
+    cave = {
+        'lines' :[''], # Ensure first real line is at index 1, like in Fortran.
+        'speech':[], # Lines as printed, made from lines by dbBuild.
+        'linuse':0,
+        'linbytes':0,
+        'travel':751*[0],
+        'moves' :{}, # (loc, verb) -> travel options, compiled from travel.
+        'dwfnbr':151*[()], # Where a dwarf at loc may wander to.
+        'pirnbr':151*[()], # Same for the pirate.
+        'ktab'  :301*[0],
+        'atab'  :301*[''],
+        'vocab' :{}, # Word -> its ktab values, in the order found in atab.
+        'ltext' :151*[0],
+        'stext' :151*[0],
+        'key'   :151*[0],
+        'cond'  :151*[0],
+
+        'plac'  :101*[0],
+        'fixd'  :101*[0],
+        'trsrs' :[], # Treasures, those of 50..maxtrs with ptext.
+        'ptext' :101*[0], # Property text.
+        'actspk': 36*[0], # Default message for an action.
+        'rtext' :206*[0],
+        'ctext' : 13*[0],
+        'cval'  : 13*[0],
+        'hints' : [[0 for c in range(5)] for r in range(21)], # 21x5.
+        'mtext' : 36*[0],
+
+        'linsiz':9650,
+        'trvsiz': 750,
+        'tabsiz': 300,
+        'locsiz': 150,
+        'vrbsiz':  35,
+        'rtxsiz': 205,
+        'clsmax':  12,
+        'hntsiz':  20,
+        'magsiz':  35,
+        'maxtrs':  79, # Treasures are objects 50 through maxtrs.
+
+        'clsses':1,
+        'trvs':1
+    }
+    return cave
 
 def datime():
 
@@ -837,72 +604,254 @@ def datime():
     t = 60*now.tm_hour + now.tm_min # Minutes since midnight.
     return d, t
 
-def dbRead():
-    # Description of the database format
-    #
-    #
-    # The data file contains several sections.  Each begins with a line
-    # containing a number identifying the section, and ends with a line
-    # containing "-1".
-    #
-    # Section 1: Long form descriptions.  Each line contains a location number,
-    #    a tab, and a line of text.  The set of (necessarily adjacent) lines
-    #    whose numbers are x form the long description of location x.
-    # Section 2: Short form descriptions.  Same format as long form.  Not all
-    #    places have short descriptions.
-    # Section 3: Travel table.  Each line contains a location number (x),
-    #    a second location number (y), and a list of motion numbers (see
-    #    section 4).  Each motion represents a verb which will go to y if
-    #    currently at x.  Y, in turn, is interpreted as follows.  Let m =
-    #    y/1000, n = y mod 1000.
-    #          if n<=300   it is the location to go to.
-    #          if 300<n<=500     n-300 is used in a computed goto to
-    #                            a section of special code.
-    #          if n>500    message n-500 from section 6 is printed,
-    #                            and he stays wherever he is.
-    #    Meanwhile, m specifies the conditions on the motion.
-    #          if m = 0            it's unconditional.
-    #          if 0<m<100  it is done with m% probability.
-    #          if m = 100    unconditional, but forbidden to dwarves.
-    #          if 100<m<=200     he must be carrying object m-100.
-    #          if 200<m<=300     must be carrying or in same room as m-200.
-    #          if 300<m<=400     prop(m mod 100) must *not* be 0.
-    #          if 400<m<=500     prop(m mod 100) must *not* be 1.
-    #          if 500<m<=600     prop(m mod 100) must *not* be 2, etc.
-    #    If the condition (if any) is not met, then the next *different*
-    #    "destination" value is used (unless it fails to meet *its* conditions,
-    #    in which case the next is found, etc.).  Typically, the next dest will
-    #    be for one of the same verbs, so that its only use is as the alternate
-    #    destination for those verbs.  For instance:
-    #          15    110022      29    31    34    35    23    43
-    #          15    14    29
-    #    This says that, from loc 15, any of the verbs 29, 31, etc., will take
-    #    him to 22 if he's carrying object 10, and otherwise will go to 14.
-    #          11    303008      49
-    #          11    9     50
-    #    This says that, from 11, 49 takes him to 8 unless prop(3) = 0, in which
-    #    case he goes to 9.  Verb 50 takes him to 9 regardless of prop(3).
-    # Section 4: Vocabulary.  Each line contains a number (n), a tab, and a
-    #    five-letter word.  Call m = n/1000.  If m = 0, then the word is a
-    #    motion verb for use in travelling (see section 3).  Else, if m = 1,
-    #    the word is an object.  Else, if m = 2, the word is an action verb
-    #    (such as "carry" or "attack").  Else, if m = 3, the word is a
-    #    special case verb (such as "dig") and n mod 1000 is an index into
-    #    section 6.  Objects from 50 to (currently, anyway) 79 are considered
-    #    treasures (for pirate, closeout).
-    # Section 5: Object descriptions.  Each line contains a number (n), a tab,
-    #    and a message.  If n is from 1 to 100, the message is the "inventory"
-    #    message for object n.  Otherwise, n should be 000, 100, 200, etc., and
-    #    the message should be the description of the preceding object when its
-    #    prop value is n/100.  The n/100 is used only to distinguish multiple
-    #    messages from multi-line messages; the prop info actually requires all
-    #    messages for an object to be present and consecutive.  Properties which
-    #    produce no message should be given the message ">$<".
-    # Section 6: Arbitrary messages.  Same format as sections 1, 2, and 5,
-    #    except the numbers bear no relation to anything (except for special
-    #    verbs in section 4).
-    # Section 7: Object locations.  Each line contains an object number and its
-    #    initial location (zero (or omitted) if none).  If the object is
+def dbBuild():
+    '''
+    Construct the parts of the database that are derived from the sections
+    just read rather than read directly: the forced-motion bits in cond, the
+    travel options compiled per location and verb, the places dwarves may
+    wander to from each location, the treasures, the messages as they are
+    printed, and the handy mnemonics in w.  These never change during a
+    game, so they are saved in the snapshot along with the tables they're
+    built from.
+    '''
+
+    global cave, w
+
+    # We finish setting up cond by checking for forced-motion travel entries.
+    for i in range(1, cave['locsiz']+1):
+        if cave['ltext'][i] != 0 and cave['key'][i] != 0:
+            k = cave['key'][i]
+            if abs(cave['travel'][k])%1000 == 1:
+                cave['cond'][i] = 2 # Forced movement at this location.
+
+    # Compile travel into moves[(loc,verb)], the list of options newLocation
+    # tries in turn when verb is given at loc (see travelRules).  The first
+    # option is the first entry at loc for either the verb or verb 1, which
+    # matches any verb (forced motion).  A verb without its own entries at
+    # loc uses moves[(loc,1)] if there is one.
+    cave['moves'] = {}
+    for loc in range(1, cave['locsiz']+1):
+        kk = cave['key'][loc]
+        if kk == 0:
+            continue
+        opts = [] # (verb, y) for each travel entry at loc.
+        while True:
+            ll = abs(cave['travel'][kk])
+            opts.append((ll%1000, ll//1000))
+            if cave['travel'][kk] < 0: # Last entry for loc.
+                break
+            kk += 1
+        first = -1 # First entry for verb 1, if any so far.
+        for i,(verb,_) in enumerate(opts):
+            if verb == 1 and first < 0:
+                first = i
+            if (loc,verb) not in cave['moves']:
+                cave['moves'][loc,verb] = travelRules(opts,
+                    i if first < 0 else first)
+
+        # The newlocs a dwarf at loc may wander to, in travel order.  Dwarves
+        # never go to locs < 15 (before the Hall of Mists) or off the map,
+        # nor stay put, nor take forced motion or travel forbidden to them
+        # (m = 100).  The pirate also keeps out of places with cond bit 3
+        # set.  Repeats of the previous newloc would be skipped by
+        # dwarfMove anyway, so they're dropped here.
+        for i,nbr in [(0, 'dwfnbr'), (1, 'pirnbr')]:
+            tk = []
+            for _,ll in opts:
+                newloc = ll%1000
+                if (newloc < 15 or newloc > 300 or newloc == loc
+                    or forced(newloc) or (i == 1 and bitset(newloc,3))
+                    or ll//1000 == 100):
+                    continue
+                if tk == [] or tk[-1] != newloc:
+                    tk.append(newloc)
+            cave[nbr][loc] = tuple(tk)
+
+    # The treasures, for the pirate and for scoring.  Numbers in 50..maxtrs
+    # with no object info aren't treasures, or anything else.
+    cave['trsrs'] = [i for i in range(50, cave['maxtrs']+1)
+        if cave['ptext'][i] != 0]
+
+    # Speech[n] is lines[n] just as speak prints it: every line indented a
+    # space and the whole ended with a newline.  Messages starting ">$<" are
+    # never printed and are None.  Section 5's entries are lists, one
+    # message per prop value, and so are their speeches.
+    def render(msg):
+        if isinstance(msg, list):
+            return [render(m) for m in msg]
+        if msg[:3] == '>$<':
+            return None
+        return ' %s\n' % msg.replace('\n', '\n ')
+    cave['speech'] = [render(msg) for msg in cave['lines']]
+
+    #  Define some handy mnemonics.  These correspond to object numbers.
+    w = { # 'w' for words.
+        'keys':vocab('KEYS',1),
+        'lamp':vocab('LAMP',1),
+        'grate':vocab('GRATE',1),
+        'cage':vocab('CAGE',1),
+        'rod':vocab('ROD',1),
+        'rod2':vocab('ROD',1) + 1,
+        'steps':vocab('STEPS',1),
+        'bird':vocab('BIRD',1),
+        'door':vocab('DOOR',1),
+        'pillow':vocab('PILLO',1),
+        'snake':vocab('SNAKE',1),
+        'fissur':vocab('FISSU',1),
+        'tablet':vocab('TABLE',1),
+        'clam':vocab('CLAM',1),
+        'oyster':vocab('OYSTE',1),
+        'magzin':vocab('MAGAZ',1),
+        'dwarf':vocab('DWARF',1),
+        'knife':vocab('KNIFE',1),
+        'food':vocab('FOOD',1),
+        'bottle':vocab('BOTTL',1),
+        'water':vocab('WATER',1),
+        'oil':vocab('OIL',1),
+        'plant':vocab('PLANT',1),
+        'plant2':vocab('PLANT',1) + 1,
+        'axe':vocab('AXE',1),
+        'mirror':vocab('MIRRO',1),
+        'dragon':vocab('DRAGO',1),
+        'chasm':vocab('CHASM',1),
+        'troll':vocab('TROLL',1),
+        'troll2':vocab('TROLL',1) + 1,
+        'bear':vocab('BEAR',1),
+        'messag':vocab('MESSA',1),
+        'vend':vocab('VENDI',1),
+        'batter':vocab('BATTE',1),
+
+        # Objects from 50 through whatever are treasures.  Here are a few.,
+        'nugget':vocab('GOLD',1),
+        'coins':vocab('COINS',1),
+        'chest':vocab('CHEST',1),
+        'eggs':vocab('EGGS',1),
+        'tridnt':vocab('TRIDE',1),
+        'vase':vocab('VASE',1),
+        'emrald':vocab('EMERA',1),
+        'pyram':vocab('PYRAM',1),
+        'pearl':vocab('PEARL',1),
+        'rug':vocab('RUG',1),
+        'chain':vocab('CHAIN',1),
+        'spices':vocab('SPICE',1),
+
+        # These are motion-verb numbers.,
+        'back':vocab('BACK',0),
+        'look':vocab('LOOK',0),
+        'cave':vocab('CAVE',0),
+        'null':vocab('NULL',0),
+        'entrnc':vocab('ENTRA',0),
+        'dprssn':vocab('DEPRE',0),
+
+        # And some action verbs.,
+        'say':vocab('SAY',2),
+        'lock':vocab('LOCK',2),
+        'throw':vocab('THROW',2),
+        'find':vocab('FIND',2),
+        'invent':vocab('INVEN',2)
+    }
+
+def dbCompile():
+    '''
+    Build the binary snapshot of the database ahead of time (e.g. when
+    installing with "python advent.py --compile") so that even the first game
+    doesn't have to parse the text file.
+    '''
+
+    dbRead()
+
+def dbLoad(digest):
+    '''
+    Load the tables from the binary snapshot, if there is one and it was built
+    from the current text file by this version of the program.  The snapshot
+    is a short header (magic, DBVERSION, sha256 of the text file) followed by
+    the marshalled tables.  Return False, leaving cave alone, if the snapshot
+    is missing, stale or unreadable so that the caller parses the text
+    instead.
+    '''
+
+    global cave, w
+
+    header = b'ADVDB' + DBVERSION.to_bytes(2, 'big') + digest
+    try:
+        with open(DBSNAP, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                if m[:len(header)] != header:
+                    return False
+                with memoryview(m) as mv, mv[len(header):] as body:
+                    tables = marshal.loads(body)
+    except (OSError, ValueError, EOFError, TypeError):
+        return False
+    cave.update(tables['cave'])
+    w = tables['w']
+    return True
+
+def dbRead():
+    # Description of the database format
+    #
+    #
+    # The data file contains several sections.  Each begins with a line
+    # containing a number identifying the section, and ends with a line
+    # containing "-1".
+    #
+    # Section 1: Long form descriptions.  Each line contains a location number,
+    #    a tab, and a line of text.  The set of (necessarily adjacent) lines
+    #    whose numbers are x form the long description of location x.
+    # Section 2: Short form descriptions.  Same format as long form.  Not all
+    #    places have short descriptions.
+    # Section 3: Travel table.  Each line contains a location number (x),
+    #    a second location number (y), and a list of motion numbers (see
+    #    section 4).  Each motion represents a verb which will go to y if
+    #    currently at x.  Y, in turn, is interpreted as follows.  Let m =
+    #    y/1000, n = y mod 1000.
+    #          if n<=300   it is the location to go to.
+    #          if 300<n<=500     n-300 is used in a computed goto to
+    #                            a section of special code.
+    #          if n>500    message n-500 from section 6 is printed,
+    #                            and he stays wherever he is.
+    #    Meanwhile, m specifies the conditions on the motion.
+    #          if m = 0            it's unconditional.
+    #          if 0<m<100  it is done with m% probability.
+    #          if m = 100    unconditional, but forbidden to dwarves.
+    #          if 100<m<=200     he must be carrying object m-100.
+    #          if 200<m<=300     must be carrying or in same room as m-200.
+    #          if 300<m<=400     prop(m mod 100) must *not* be 0.
+    #          if 400<m<=500     prop(m mod 100) must *not* be 1.
+    #          if 500<m<=600     prop(m mod 100) must *not* be 2, etc.
+    #    If the condition (if any) is not met, then the next *different*
+    #    "destination" value is used (unless it fails to meet *its* conditions,
+    #    in which case the next is found, etc.).  Typically, the next dest will
+    #    be for one of the same verbs, so that its only use is as the alternate
+    #    destination for those verbs.  For instance:
+    #          15    110022      29    31    34    35    23    43
+    #          15    14    29
+    #    This says that, from loc 15, any of the verbs 29, 31, etc., will take
+    #    him to 22 if he's carrying object 10, and otherwise will go to 14.
+    #          11    303008      49
+    #          11    9     50
+    #    This says that, from 11, 49 takes him to 8 unless prop(3) = 0, in which
+    #    case he goes to 9.  Verb 50 takes him to 9 regardless of prop(3).
+    # Section 4: Vocabulary.  Each line contains a number (n), a tab, and a
+    #    five-letter word.  Call m = n/1000.  If m = 0, then the word is a
+    #    motion verb for use in travelling (see section 3).  Else, if m = 1,
+    #    the word is an object.  Else, if m = 2, the word is an action verb
+    #    (such as "carry" or "attack").  Else, if m = 3, the word is a
+    #    special case verb (such as "dig") and n mod 1000 is an index into
+    #    section 6.  Objects from 50 to (currently, anyway) 79 are considered
+    #    treasures (for pirate, closeout).
+    # Section 5: Object descriptions.  Each line contains a number (n), a tab,
+    #    and a message.  If n is from 1 to 100, the message is the "inventory"
+    #    message for object n.  Otherwise, n should be 000, 100, 200, etc., and
+    #    the message should be the description of the preceding object when its
+    #    prop value is n/100.  The n/100 is used only to distinguish multiple
+    #    messages from multi-line messages; the prop info actually requires all
+    #    messages for an object to be present and consecutive.  Properties which
+    #    produce no message should be given the message ">$<".
+    # Section 6: Arbitrary messages.  Same format as sections 1, 2, and 5,
+    #    except the numbers bear no relation to anything (except for special
+    #    verbs in section 4).
+    # Section 7: Object locations.  Each line contains an object number and its
+    #    initial location (zero (or omitted) if none).  If the object is
     #    immovable, the location is followed by a "-1".  If it has two locations
     #    (e.g. the grate) the first location is followed with the second, and
     #    the object is assumed to be immovable.
@@ -947,10 +896,10 @@ def dbRead():
     # Section 0: End of database.
     # Read the database if we have not yet done so
 
-    global g
+    global cave, w, dbDigest
 
-    if False or g['setup'] != 0: # Only for old days of computing.
-        postDbInit()
+    if isinstance(cave, CaveDatabase): # Read by an earlier game.
+        return
     else:
         # print('INITIALISING...')
         # Clear out the various text-pointer arrays.  All text is stored in
@@ -964,13 +913,28 @@ def dbRead():
         # contains section 6's stuff.  Ctext(n) points to a player-class
         # message.  Mtext is for section 12.  We also clear cond.  See
         # description of section 9 for details.
-        db = open('text', 'r')
+        cave = caveInit()
+        with open(DBFILE, 'rb') as f:
+            digest = hashlib.sha256(f.read()).digest()
+        dbDigest = digest
+        if dbLoad(digest):
+            cave = CaveDatabase(cave)
+            w = MappingProxyType(w)
+            verbCheck()
+            return
+        db = open(DBFILE, 'r')
         while True:
             # Start new data section.  Sect is the section number.
             line = db.readline().strip()
             sect = int(line)
             match sect:
-                case  0: postDbInit(); break
+                case  0:
+                    dbBuild()
+                    dbSave(digest)
+                    cave = CaveDatabase(cave)
+                    w = MappingProxyType(w)
+                    verbCheck()
+                    break
                 case  1: sections(db, 1)
                 case  2: sections(db, 2)
                 case  3: section3(db)
@@ -987,1660 +951,229 @@ def dbRead():
         db.close()
         # print('INIT DONE ')
 
-def dead(pit=True):
-    '''
-    "You're dead, Jim."
-
-    If the current loc is zero, it means the clown got himself killed.  We'll
-    allow this maxdie times.  Maxdie is automatically set based on the number
-    of snide messages available.  Each death results in a message (81, 83,
-    etc.) which offers reincarnation; if accepted, this results in message
-    82, 84, etc.  The last time, if he wants another chance, he gets a snide
-    remark as we exit.  When reincarnated, all objects being carried get
-    dropped at oldlc2 (presumably the last place prior to being killed)
-    without change of props.  The loop runs backwards to assure that the bird
-    is dropped before the cage.  (This kluge could be changed once we're sure
-    all references to bird and cage are done by keywords.)  The lamp is a
-    special case (it wouldn't do to leave it in the cave).  It is turned off
-    and left outside the building (only if he was carrying it, of course).
-    He himself is left inside the building (and heaven help him if he tries
-    to XYZZY back into the cave without the lamp!).  Oldloc is zapped so he
-    can't just "retreat".
-    '''
-
-    # The easiest way to get killed is to fall into a pit in pitch darkness.
-    if pit:
-        rspeak(23) # YOU BROKE EVERY BONE IN YOUR BODY!
-        g['oldlc2'] = g['loc']
-
-    #  Okay, he's dead.  Let's get on with it.
-    if c['closng']:
-        # He died during closing time.  No resurrection.  Tally up a death
-        # and exit.
-        rspeak(131) # IT LOOKS AS THOUGH YOU'RE DEAD...CALL IT A DAY.
-        c['numdie'] += 1
-        finish()
-    c['yea'] = yes(81+c['numdie']*2, 82+c['numdie']*2, 54) # REINCARNATE?
-    c['numdie'] += 1
-    if c['numdie'] == c['maxdie'] or not c['yea']:
-        finish()
-    g['place'][w['water']] = 0
-    g['place'][w['oil']] = 0
-    if toting(w['lamp']):
-        g['prop'][w['lamp']] = 0
-    for j in range(1, 100+1):
-        i = 101 - j
-        if not toting(i):
-            continue
-        k = g['oldlc2']
-        if i == w['lamp']:
-            k = 1
-        drop(i, k)
-    g['loc'] = 3 # Resurrected, back to the building!
-    g['oldloc'] = g['loc']
-    return location() # Back to top of game loop.
-
-def discard(spk, goto9021=False):
-    # Discard object.  "Throw" also comes here for most objects.  Special
-    # cases for bird (might attack snake or dragon) and cage (might contain
-    # bird) and vase.  Drop coins at vending machine for extra batteries.
-    #
-    # Also: DROP,RELEA,FREE,DISCA,DUMP.
-
-    if not goto9021:
-        # Line 9020
-        if toting(w['rod2']) and g['obj'] == w['rod'] and not toting(w['rod']):
-            g['obj'] = w['rod2'] # rod2 is in Storage Area, SW end.
-        if not toting(g['obj']):
-            return {'fn':'newTurn', 'spk':spk}
-        if g['obj'] == w['bird'] and here(w['snake']):
-            rspeak(30) # LITTLE BIRD ATTACKS THE GREEN SNAKE...
-            if c['closed']:
-                dwarvesDisturbed()
-            dstroy(w['snake'])
-            # Set prop for use by travel options
-            g['prop'][w['snake']] = 1 # Snake run off by bird.
-            skipTop = False
-        else:
-            skipTop = True
-
-    while True:
-        if not skipTop or goto9021:
-            k = liq() # Line 9021
-            if k == g['obj']:
-                g['obj'] = w['bottle']
-            if g['obj'] == w['bottle'] and k != 0:
-                g['place'][k] = 0
-            if g['obj'] == w['cage'] and g['prop'][w['bird']] != 0:
-                drop(w['bird'],g['loc']) # Set bird free.
-            if g['obj'] == w['bird']:
-                g['prop'][w['bird']] = 0
-            drop(g['obj'],g['loc'])
-            return {'fn':'newTurn', 'spk':0}
-        skipTop = False
-        if g['obj'] == w['coins'] and here(w['vend']):
-            dstroy(w['coins']) # Take his money.
-            drop(w['batter'], g['loc']) # Fresh batteries for payment.
-            pspeak(w['batter'], 0) # THERE ARE FRESH BATTERIES HERE.
-            return {'fn':'newTurn', 'spk':0}
-        elif (g['obj'] == w['bird'] and at(w['dragon'])
-            and g['prop'][w['dragon']] == 0): # Bird and living dragon.
-            rspeak(154) # BIRD ATTACKS DRAGON, BURNT TO A CINDER.
-            dstroy(w['bird'])
-            g['prop'][w['bird']] = 0 # Dead bird.
-            if g['place'][w['snake']] == g['plac'][w['snake']]:
-                g['tally2'] += 1 # Cannot find bird again.
-            return {'fn':'newTurn', 'spk':0}
-        elif g['obj'] == w['bear'] and at(w['troll']):
-            rspeak(163) # TROLL SCURRIES AWAY.
-            move(w['troll'], 0)
-            move(w['troll']+100, 0)
-            move(w['troll2'], g['plac'][w['troll']])
-            move(w['troll2']+100, g['fixd'][w['troll']])
-            juggle(w['chasm'])
-            g['prop'][w['troll']] = 2
-        elif (g['obj'] != w['vase'] or g['loc'] == g['plac'][w['pillow']]):
-            rspeak(54) # OK
-        else:
-            g['prop'][w['vase']] = 2 # VASE DROPS WITH A DELICATE CRASH.
-            if at(w['pillow']):
-                g['prop'][w['vase']] = 0 # VASE RESTING ON VELVET PILLOW.
-            pspeak(w['vase'], g['prop'][w['vase']]+1)
-            if g['prop'][w['vase']] != 0:
-                g['fixed'][w['vase']] = -1 # Vase destroyed.
-    return {'fn':'newTurn', 'spk':0}
-
-def drink(spk):
-    # DRINK.  If no object, assume water and look for it here.  If water is
-    # in the bottle, drink that, else must be at a water loc, so drink
-    # stream.
-    #
-    # spk is default message, i.e., spk == g['actspk'][g['verb']]
-
-    if (g['obj'] == 0                      # No object specified
-        and liqloc(g['loc']) != w['water'] # and no water here
-        and (liq() != w['water']           # and (no water in bottle
-            or not here(w['bottle']))):    #     or no bottle here)
-        return what()
-    if g['obj'] != 0 and g['obj'] != w['water']: # obj not water.
-        spk = 110 # DON'T BE RIDICULOUS!
-    if spk == 110 or liq() != w['water'] or not here(w['bottle']):
-        return {'fn':'newTurn', 'spk':spk}
-    g['prop'][w['bottle']] = 1 # Bottle empty.
-    g['place'][w['water']] = 0 # No water here.
-    spk = 74 # THE BOTTLE OF WATER IS NOW EMPTY.
-    return {'fn':'newTurn', 'spk':spk}
-
-def drop(obj, where):
-    '''
-    Place an object at a given loc, prefixing it onto the atloc list.  Decr
-    holdng if the object was being toted.
-    '''
-
-    global g
-
-    if obj <= 100: # Only object numbers are < 100.
-        if g['place'][obj] == -1: # If object is here,
-            c['holdng'] -= 1 # Toting one less object.
-        g['place'][obj] = where
-    else:
-        g['fixed'][obj-100] = where
-    if where <= 0:
-        return
-    g['link'][obj] = g['atloc'][where]
-    g['atloc'][where] = obj
-
-def dstroy(obj):
+def verbCheck():
     '''
-    Permanently eliminate "object" by moving to a non-existent location.
+    Make sure every action verb, whether it's in the vocabulary (section 4)
+    or has a default message (section 8), is in both goto lists, so that a
+    gap is reported when the database is read rather than when somebody
+    first tries the verb.
     '''
-    move(obj, 0)
-
-def dwarvesDisturbed():
-    # Oh dear, he's disturbed the dwarves.
-    rspeak(136) # RUCKUS HAS AWAKENED THE DWARVES
-    finish()
 
-def eat(spk, intransitive=True):
-    # EAT. Intransitive: assume food if present, else ask what.
-    # Transitive: food ok, some things lose appetite, rest are ridiculous.
-
-    if intransitive:
-        if not here(w['food']):
-            return what()
-        dstroy(w['food'])
-        spk = 72 # THANK YOU, IT WAS DELICIOUS!
-    else:
-        if g['obj'] == w['food']:
-            dstroy(w['food'])
-            spk = 72 # THANK YOU, IT WAS DELICIOUS!
-        elif g['obj'] in [w['bird'], w['snake'], w['clam'], w['oyster'],
-            w['dwarf'], w['dragon'], w['troll'], w['bear']]:
-            spk = 71 # I THINK I JUST LOST MY APPETITE.
-    return {'fn':'newTurn', 'spk':spk}
-
-def feed(spk):
-    # FEED.  If bird, no seed.  Snake, dragon, troll: quip.  If dwarf, make
-    # him mad.  Bear, special.
-    global g
-
-    if g['obj'] == w['bird']:
-        spk = 100 # HAVE NO BIRD SEED.
-    elif g['obj'] in [w['snake'], w['dragon'], w['troll']]:
-        spk = 102 # NOTHING HERE IT WANTS TO EAT (EXCEPT PERHAPS YOU).
-        if g['obj'] == w['dragon'] and g['prop'][w['dragon']] != 0:
-            spk = 110 # DON'T BE RIDICULOUS!
-        if g['obj'] == w['troll']:
-            spk = 182 # GLUTTONY IS NOT ONE OF THE TROLL'S VICES.
-        if not (g['obj'] != w['snake'] or c['closed'] or not here(w['bird'])):
-            spk = 101 # THE SNAKE HAS NOW DEVOURED YOUR BIRD.
-            dstroy(w['bird'])        # Remove bird.
-            g['prop'][w['bird']] = 0 # Dead bird.
-            g['tally2'] += 1         # Cannot find bird again.
-    elif g['obj'] == w['dwarf']:
-        if here(w['food']):
-            spk = 103 # YOU FOOL, DWARVES EAT ONLY COAL!
-            c['dflag'] += 1
-    elif g['obj'] == w['bear']:
-        if g['prop'][w['bear']] == 0: # Locked to chain.
-            spk = 102 # NOTHING HERE IT WANTS TO EAT (EXCEPT PERHAPS YOU).
-        if g['prop'][w['bear']] == 3: # Dead bear.
-            spk = 110 # DON'T BE RIDICULOUS!
-        if here(w['food']):
-            dstroy(w['food'])
-            g['prop'][w['bear']] = 1 # Free and fed.
-            g['fixed'][w['axe']] = 0
-            g['prop'][w['axe']] = 0
-            spk = 168 # WOLFS DOWN FOOD, CALMS DOWN.
-        return {'fn':'newTurn', 'spk':spk}
-    else:
-        spk = 14 # I'M GAME.  WOULD YOU CARE TO EXPLAIN HOW?
-    return {'fn':'newTurn', 'spk':spk}
-
-def feeFie():
-    # FEE FIE FOE FOO (and FUM).  Advance to next state if given in proper
-    # order.  Look up wd1 in section 3 of vocab to determine which word we've
-    # got.  Last word zips the eggs back to the Giant Room (unless already
-    # there).
-
-    global c, g
-
-    k = vocab(g['wd1'],3) # FEE -> k==3001%1000==1, etc.
-    spk = 42 # NOTHING HAPPENS.
-    if c['foobar'] != 1 - k:
-        if c['foobar'] != 0:
-            spk = 151 # CAN'T YOU READ?  NOW YOU'D BEST START OVER.
-        return {'fn':'newTurn', 'spk':spk}
-    c['foobar'] = k # Track progress (word num) saying FEE FIE FOE FOO.
-    if k != 4:
-        return {'fn':'newTurn', 'spk':54} # newTurn()
-    c['foobar'] = 0
-    if (g['place'][w['eggs']] == g['plac'][w['eggs']] # cur loc == orig loc.
-        or (toting(w['eggs']) and g['loc'] == g['plac'][w['eggs']])):
-        return {'fn':'newTurn', 'spk':spk}
-    # Bring back troll if we steal the eggs back from him before crossing.
-    if (g['place'][w['eggs']] == 0 and g['place'][w['troll']] == 0
-        and g['prop'][w['troll']] == 0):
-        g['prop'][w['troll']] = 1 # Troll is back.
-    k = 2                                 # DONE! Default message.
-    if here(w['eggs']):                   # If eggs here, take them.
-        k = 1 # NEST OF GOLDEN EGGS VANISHED!
-    if g['loc'] == g['plac'][w['eggs']]:  # In Giant Room, bring eggs back.
-        k = 0 # LARGE NEST HERE, FULL OF GOLDEN EGGS!
-    move(w['eggs'], g['plac'][w['eggs']]) # Zip eggs to Giant Room.
-    pspeak(w['eggs'], k)
-    return {'fn':'newTurn', 'spk':0}
-
-def fill(spk):
-    # FILL.  Bottle must be empty, and some liquid available.  (Vase is nasty.)
-
-    if g['obj'] != w['vase']:
-        if g['obj'] != 0 and g['obj'] != w['bottle']:
-            return {'fn':'newTurn', 'spk':spk}
-        if g['obj'] == 0 and not here(w['bottle']):
-            return what()
-        spk = 107 # YOUR BOTTLE IS NOW FULL OF WATER.
-        if liqloc(g['loc']) == 0:
-            spk = 106 # THERE IS NOTHING HERE WITH WHICH TO FILL THE BOTTLE.
-        if liq() != 0:
-            spk = 105 # YOUR BOTTLE IS ALREADY FULL.
-        if spk != 107:
-            return {'fn':'newTurn', 'spk':spk}
-        g['prop'][w['bottle']] = g['cond'][g['loc']]%4//2*2
-        k = liq()
-        if toting(w['bottle']):
-            g['place'][k] = -1
-        if k == w['oil']:
-            spk = 108 # YOUR BOTTLE IS NOW FULL OF OIL.
-        return {'fn':'newTurn', 'spk':spk}
-    spk = 29 # YOU AREN'T CARRYING IT!
-    if liqloc(g['loc']) == 0:
-        spk = 144 # THERE IS NOTHING HERE WITH WHICH TO FILL THE VASE.
-    if liqloc(g['loc']) == 0 or not toting(w['vase']):
-        return {'fn':'newTurn', 'spk':spk}
-    rspeak(145) # TEMPERATURE HAS DELICATELY SHATTERED THE VASE.
-    g['prop'][w['vase']] = 2
-    g['fixed'][w['vase']] = -1
-    return discard(spk, goto9021=True)
-
-def find(spk, k):
-    #  FIND.  Might be carrying it, or it might be here.  Else give caveat.
-
-    if (at(g['obj']) or (liq() == g['obj'] and at(w['bottle']))
-        or k == liqloc(g['loc'])):
-        spk = 94 # I BELIEVE WHAT YOU WANT IS RIGHT HERE WITH YOU.
-    for i in range(1, 5+1):
-        if (g['dloc'][i] == g['loc'] and c['dflag'] >= 2
-            and g['obj'] == w['dwarf']):
-            spk = 94 # I BELIEVE WHAT YOU WANT IS RIGHT HERE WITH YOU.
-    if c['closed']:
-        spk = 138 # I DARESAY WHATEVER YOU WANT IS AROUND HERE SOMEWHERE.
-    if toting(g['obj']):
-        spk = 24 # YOU ARE ALREADY CARRYING IT!
-    return {'fn':'newTurn', 'spk':spk}
-
-def finish(scorng=False):
-    global g, w
-
-    #  Exit code.
-
-    #  The present scoring algorithm is as follows:
-    #     Objective:          Points:        Present Total Possible:
-    #  Getting well into cave   25                    25
-    #  Each treasure < chest    12                    60
-    #  Treasure chest itself    14                    14
-    #  Each treasure > chest    16                   144
-    #  Surviving             (max-num)*10             30
-    #  Not quitting              4                     4
-    #  Reaching "closng"        25                    25
-    #  "Closed": Quit/killed    10
-    #            Klutzed        25
-    #            Wrong way      30
-    #            Success        45                    45
-    #  Came to Witt's End        1                     1
-    #  Round out the total       2                     2
-    #                                       Total:   350
-    #  (Points can also be deducted for using hints.)
-
-    score = 0
-    mxscor = 0
-
-    #  First tally up the treasures.  Must be in building and not broken.
-    #  Give the poor guy 2 points just for finding each treasure.
-    for i in range(50, g['maxtrs']+1):
-        if g['ptext'][i] == 0:
-            continue
-        k = 12                # Easily found treasures.
-        if i == w['chest']:   # Treasure chest.
-            k = 14
-        if i > w['chest']:    # Hard to find treasures.
-            k = 16
-        if g['prop'][i] >= 0: # Free 2 pts.  Treasure found, maybe not in bldg.
-            score += 2
-        if g['place'][i] == 3 and g['prop'][i] == 0: # In bldg & not broken.
-            score += k - 2    # In bldg, so take back free 2 points.
-        mxscor += k
-
-    # Now look at how he finished and how far he got.  Maxdie and numdie tell
-    # us how well he survived.  Gaveup says whether he exited via quit.
-    # Dflag will tell us if he ever got suitably deep into the cave.  Closng
-    # still indicates whether he reached the endgame.  And if he got as far
-    # as "cave closed" (indicated by "closed"), then bonus is zero for
-    # mundane exits or 133, 134, 135 if he blew it (so to speak).
-    score += (c['maxdie'] - c['numdie'])*10
-    mxscor += c['maxdie']*10
-    if not (scorng or c['gaveup']):
-        score += 4
-    mxscor += 4
-    if c['dflag'] != 0:
-        score += 25
-    mxscor += 25
-    if c['closng']:
-        score += 25
-    mxscor += 25
-    if c['closed']:
-        if c['bonus'] ==   0: score += 10
-        if c['bonus'] == 135: score += 25
-        if c['bonus'] == 134: score += 30
-        if c['bonus'] == 133: score += 45
-    mxscor += 45
-
-    # Did he come to Witt's End as he should?
-    if g['place'][w['magzin']] == 108: # 108 is Witt's End.
-        score += 1
-    mxscor += 1
-
-    # Round it off.
-    score += 2
-    mxscor += 2
-
-    # Deduct points for hints.  Hints < 4 are special; see database description.
-    for i in range(1, g['hntmax']+1):
-        if g['hinted'][i]:
-            score -= g['hints'][i][2]
-
-    # Return to score command if that's where we came from.
-    if scorng:
-        return score,mxscor
-
-    # That should be good enough.  Let's tell him all about it.
-    print('\n\n\n YOU SCORED%4d OUT OF A POSSIBLE%4d USING%5d TURNS.'
-        % (score,mxscor,c['turns']))
-
-    for i in range(1, g['clsses']+1):
-        if g['cval'][i] >= score:
-            break
-    else:
-        print('\n YOU JUST WENT OFF MY SCALE!!\n')
-        sys.exit(0)
+    verbs = {k%1000 for k in cave['ktab'] if k//1000 == 2}
+    verbs |= {verb for verb, spk in enumerate(cave['actspk']) if spk}
+    for verb in sorted(verbs):
+        if verb >= len(INTRANSITIVE) or INTRANSITIVE[verb] is None:
+            bug(23) # Intransitive action verb exceeds goto list.
+        if verb >= len(TRANSITIVE) or TRANSITIVE[verb] is None:
+            bug(24) # Transitive action verb exceeds goto list.
 
-    speak(g['ctext'][i])
-    if i == g['clsses']-1:
-        print('\n TO ACHIEVE THE NEXT HIGHER RATING ',
-        'WOULD BE A NEAT TRICK!\n\n CONGRATULATIONS!!\n')
-    else:
-        k = g['cval'][i] + 1-score
-        kk = 'S.'
-        if k == 1:
-            kk = '. '
-        print('\n TO ACHIEVE THE NEXT HIGHER RATING, '
-            'YOU NEED%3d MORE POINT%2s\n' % (k,kk))
-    sys.exit(0)
+def dbSave(digest):
+    '''
+    Write the binary snapshot read by dbLoad().  It is written to a temporary
+    file and renamed into place so that another game starting at the same
+    time never sees half a snapshot.  Failure (e.g. a read-only directory) is
+    not an error; we'll simply parse the text file again next time.
+    '''
 
-def foobarEtc(verb):
-    # Every input, check "foobar" flag.  If zero, nothing's going on.  If pos,
-    # make neg.  If neg, he skipped a word, so make it zero.
-
-    global c, g, wizcom
-
-    # Line 2608
-    c['foobar'] = min(0, -c['foobar'])
-    if c['turns'] == 0 and g['wd1'] == 'MAGIC' and g['wd2'] == 'MODE':
-        maint() # Game eventually exits if he's a wizard..
-        return {'fn':'newTurn', 'spk':0}
-    c['turns'] += 1
-    if c['demo'] and c['turns'] >= wizcom['short']:
-        closeDemo() # Game exits.
-    if c['turns'] == 3:
-        c['xxd'],c['xxt'] = datime()
-    if c['turns'] == 45:
-        # See if timer UUO has been zapped; if so, he's cheating.
-        yyd,yyt = datime()
-        if c['xxd'] == yyd and c['xxt'] == yyt:
-            c['saved'] = 0
-    if verb == w['say'] and g['wd2'] != '':
-        verb = 0
-    if verb == w['say']:
-        return say()
-    if g['tally'] == 0 and g['loc'] >= 15 and g['loc'] != 33:
-        c['clock1'] -= 1 # Hall of Mists or beyond, but not Y2.
-    if c['clock1'] == 0:
-        return closeClock1()
-    if c['clock1'] < 0:
-        c['clock2'] -= 1
-    if c['clock2'] == 0:
-        return closeClock2() # goto 2
-    if g['prop'][w['lamp']] == 1:
-        g['limit'] -= 1
-    if (g['limit'] <= 30 and here(w['batter']) and g['prop'][w['batter']] == 0
-        and here(w['lamp'])):
-        return lampRecharge()
-    if g['limit'] == 0:
-        return lampOut()
-    if g['limit'] < 0 and g['loc'] <= 8:
-        lampOutQuit() # Game exits.
-    if g['limit'] <= 30:
-        return lampNeedBatteries()
-    return parseWords()
-
-def getHint(hint):
-    '''
-    Hints
-
-    Come here if he's been long enough at required loc(s) for some unused hint.
-    Hint number is in variable "hint".  Branch to quick test for additional
-    conditions, then come back to do neat stuff.  Goto 40010 if conditions are
-    met and we want to offer the hint.  Goto 40020 to clear hintlc back to zero,
-    40030 to take no action yet.
-    '''
-
-    # Now for the quick tests.  See database description for one-line notes.
-    match hint:
-        case 4: # Cave
-            if g['prop'][w['grate']] != 0 or here(w['keys']):
-                g['hintlc'][hint] = 0
-                return
-        case 5: # Bird
-            if not (here(w['bird']) and toting(w['rod'])
-                and g['oldobj'] == w['bird']):
-                return
-        case 6: # Snake
-            if not here(w['snake']) or here(w['bird']):
-                g['hintlc'][hint] = 0
-                return
-        case 7: # Maze
-            if (g['atloc'][g['loc']] != 0 or g['atloc'][g['oldloc']] != 0
-                or g['atloc'][g['oldlc2']] != 0 or c['holdng'] <= 1):
-                g['hintlc'][hint] = 0
-                return
-        case 8: # Dark
-            if not (g['prop'][w['emrald']] != -1
-                and g['prop'][w['pyram']] == -1):
-                g['hintlc'][hint] = 0
-                return
-        case 9: # Witt
+    header = b'ADVDB' + DBVERSION.to_bytes(2, 'big') + digest
+    tables = {'cave': {k: cave[k] for k in DBKEYS}, 'w': w}
+    tmp = '%s.%d' % (DBSNAP, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(header)
+            f.write(marshal.dumps(tables))
+        os.replace(tmp, DBSNAP)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
             pass
-        case _:
-            bug(27) # Hint number exceeds goto list.
 
-    g['hintlc'][hint] = 0
-    if not yes(g['hints'][hint][3],0,54):
-        return
-    print('\n I AM PREPARED TO GIVE YOU A HINT, BUT IT WILL COST YOU',
-        '%2d POINTS.' % g['hints'][hint][2])
-    g['hinted'][hint] = yes(175, g['hints'][hint][4], 54) # WANT THE HINT?
-    if g['hinted'][hint] and g['limit'] > 30:
-        g['limit'] += 30*g['hints'][hint][2]
-    g['hintlc'][hint] = 0
-
-def getin(five=False):
-
-#  Get a command from the adventurer.  Snarf out the first word, pad it with
-#  blanks, and return it in word1.  Chars 6 thru 10 are returned in word1x, in
-#  case we need to print out the whole word in an error message.  Any number of
-#  blanks may follow the word.  If a second word appears, it is returned in
-#  word2 (chars 6 thru 10 in word2x), else word2 is set to zero.
-
-    word1 = word1x = word2 = word2x = ''
-    while True:
-        word = inputCheck().upper().split() # Expecting 1 or 2 words.
-        n = len(word)
-        if n > 2:
-            print('\n PLEASE STICK TO 1- AND 2-WORD COMMANDS.\n')
-            continue
-        fmt = '%5s' if five else '%s'
-        if n == 2:
-            w = word[1]
-            word2  = fmt % w[:5]
-            word2x = fmt % w[5:]
-        if n >= 1:
-            w = word[0]
-            word1  = fmt % w[:5]
-            word1x = fmt % w[5:]
-        if n > 0:
-            break
-    return word1, word1x, word2, word2x
-
-def globalsInit():
-    g = {
-        'lines' :[''], # Ensure first real line is at index 1, like in Fortran.
-        'linuse':0,
-        'linbytes':0,
-        'travel':751*[0],
-        'ktab'  :301*[0],
-        'atab'  :301*[''],
-        'ltext' :151*[0],
-        'stext' :151*[0],
-        'key'   :151*[0],
-        'cond'  :151*[0],
-        'abb'   :151*[0], # Abbreviated description at loc.
-
-        'atloc' :151*[0],
-        'plac'  :101*[0],
-        'place' :101*[0],
-        'fixd'  :101*[0],
-        'fixed' :101*[0],
-        'link'  :201*[0],
-        'ptext' :101*[0], # Property text.
-        'prop'  :101*[0], # Print ptext[n] message for prop[n].
-        'actspk': 36*[0], # Default message for an action.
-        'rtext' :206*[0],
-        'ctext' : 13*[0],
-        'cval'  : 13*[0],
-        'hintlc': 21*[0],
-        'hinted': 21*[False],
-        'hints' : [[0 for c in range(5)] for r in range(21)], # 21x5.
-        'mtext' : 36*[0],
-        'dseen' :  7*[False],
-        'dloc'  :  7*[0],
-        'odloc' :  7*[0],
+class GameOver(Exception):
+    '''
+    Raised wherever the game used to sys.exit(), to unwind from however deep
+    it was to Game.step(), which keeps it as the game's result.  Why says
+    how it ended: 'finished' (scored), 'suspended', 'maintained' (the
+    wizard's changes saved), 'closed' (not allowed to play just now) or
+    'bug'.  Finished games have his score out of mxscor.
+    '''
 
-        'linsiz':9650,
-        'trvsiz': 750,
-        'tabsiz': 300,
-        'locsiz': 150,
-        'vrbsiz':  35,
-        'rtxsiz': 205,
-        'clsmax':  12,
-        'hntsiz':  20,
-        'magsiz':  35,
-        'setup':    0,
-        'blklin':True,
+    def __init__(self, why, score=None, mxscor=None):
+        super().__init__(why)
+        self.why = why
+        self.score = score
+        self.mxscor = mxscor
 
-        'clsses':1,
-        'knfloc':-1,
-        'loc':-1,
-        'newloc':-1,
-        'oldloc':-1,
-        'oldlc2':-1,
-        'trvs':1,
-        'obj':0,
-        'verb':0
-    }
-    return g
-
-def goBack(kk):
-    # Handle "GO BACK".  Look for verb which goes from loc to oldloc, or to
-    # oldlc2 if oldloc has forced-motion.  K2 saves entry -> forced loc ->
-    # previous loc.
-
-    # Line 20
-    k = g['oldloc']
-    if forced(k):
-        k = g['oldlc2']
-    g['oldlc2'] = g['oldloc']
-    g['oldloc'] = g['loc']
-    k2 = 0
-    if k == g['loc']:
-        rspeak(91) # I NO LONGER REMEMBER HOW YOU GOT HERE.
-        return {'fn':None}
-    while True:
-        ll = (abs(g['travel'][kk])//1000)%1000
-        if ll == k:
-            k = abs(g['travel'][kk])%1000
-            kk = g['key'][g['loc']]
-            return {'fn':'newLocation', 'goto':9, 'verb':k, 'kk':kk}
-        if ll <= 300:
-            j = g['key'][ll]
-            if forced(ll) and (abs(g['travel'][j])//1000)%1000 == k:
-                k2 = kk
-        if g['travel'][kk] < 0:
-            break
-        kk += 1
-    kk = k2
-    if kk == 0:
-        rspeak(140) # YOU CAN'T GET THERE FROM HERE.
-        return {'fn':None}
-    k = abs(g['travel'][kk])%1000
-    kk = g['key'][g['loc']]
-    return {'fn':'newLocation', 'goto':9, 'verb':k, 'kk':-1}
-
-def hours():
-
-#  Announce the current hours when the cave is open for adventuring.  This info
-#  is stored in wkday, wkend, and holid, where bit shift(1,n) is on iff the
-#  hour from n:00 to n:59 is "prime time" (cave closed).  Wkday is for
-#  weekdays, wkend for weekends, holid for holidays.  Next holiday is from
-#  hbegin to hend.
-
-    global wizcom
-
-    print('')
-    hoursx(wizcom['wkday'],'MON -',' FRI:')
-    hoursx(wizcom['wkend'],'SAT -',' SUN:')
-    hoursx(wizcom['holid'],'HOLID','AYS: ')
-    d,t = datime()
-    if wizcom['hend'] < d or wizcom['hend'] < wizcom['hbegin']:
-        return
-    if wizcom['hbegin'] <= d:
-        print('\n TODAY IS A HOLIDAY, NAMELY %s' % wizcom['hname'])
-        return
-    d = wizcom['hbegin'] - d
-    t = 'DAYS, '
-    if d == 1:
-        t = 'DAY, '
-    print('\n THE NEXT HOLIDAY WILL BE IN%3d %5s NAMELY %s'
-        % (d,t,wizcom['hname']))
+class GameState:
+    '''
+    Everything about one game that changes as it's played, and nothing that
+    doesn't (that's in cave).  Slots rather than a dictionary, and the
+    per-location, per-object and per-dwarf tables are compact arrays of
+    small ints rather than lists.  The remaining flags and counters are
+    described in postDbInit, which gives most of them their starting values.
+    '''
 
-def hoursShow():
-    # HOURS.  Report current non-prime-time hours.
+    __slots__ = ('abb', 'atloc', 'place', 'fixed', 'link', 'blink', 'toted',
+        'prop', 'hintlc', 'hinted', 'dseen', 'dloc', 'odloc', 'setup',
+        'blklin', 'knfloc', 'loc', 'newloc', 'oldloc', 'oldlc2', 'obj',
+        'verb', 'oldobj', 'wd1', 'wd1x', 'wd2', 'wd2x', 'chloc', 'chloc2',
+        'daltlc', 'dflag', 'limit', 'tally', 'tally2', 'abbnum', 'bonus',
+        'clock1', 'clock2', 'closed', 'closng', 'demo', 'detail', 'dkill',
+        'foobar', 'gaveup', 'holdng', 'iwest', 'lmwarn', 'maxdie', 'numdie',
+        'panic', 'saved', 'savet', 'scorng', 'turns', 'wzdark', 'xxd', 'xxt',
+        'yea')
+
+    def __init__(self):
+        self.abb    = array('i', 151*[0]) # Abbreviated description at loc.
+        self.atloc  = array('h', 151*[0])
+        self.place  = array('h', 101*[0])
+        self.fixed  = array('h', 101*[0])
+        self.link   = array('h', 201*[0])
+        self.blink  = array('h', 201*[0]) # Back links, previous at same loc.
+        self.toted  = set() # Objects being carried, i.e. place[obj] == -1.
+        self.prop   = array('h', 101*[0]) # Print ptext[n] for prop[n].
+        self.hintlc = array('i', 21*[0])
+        self.hinted = array('b', 21*[False])
+        self.dseen  = array('b', 7*[False])
+        self.dloc   = array('h', 7*[0])
+        self.odloc  = array('h', 7*[0])
+
+        self.setup  = 0
+        self.blklin = True
+        self.knfloc = -1
+        self.loc    = -1
+        self.newloc = -1
+        self.oldloc = -1
+        self.oldlc2 = -1
+        self.obj    = 0
+        self.verb   = 0
+        self.oldobj = 0
+        self.wd1 = self.wd1x = self.wd2 = self.wd2x = ''
+
+        # Set properly by postDbInit and the like before they're used.
+        self.chloc = self.chloc2 = self.daltlc = self.dflag = 0
+        self.limit = self.tally = self.tally2 = 0
+        self.abbnum = self.bonus = self.clock1 = self.clock2 = 0
+        self.closed = self.closng = self.demo = False
+        self.detail = self.dkill = self.foobar = 0
+        self.gaveup = False
+        self.holdng = self.iwest = 0
+        self.lmwarn = False
+        self.maxdie = self.numdie = 0
+        self.panic = False
+        self.saved = self.savet = 0
+        self.scorng = False
+        self.turns = 0
+        self.wzdark = False
+        self.xxd = self.xxt = 0
+        self.yea = False
+
+    def copy(self):
+        # A copy that shares nothing which changes, for Game.clone.  Every
+        # slot by name, which is several times quicker than a loop of
+        # setattr(): so a new slot must be added here as well.
+        new = GameState.__new__(GameState)
+        new.abb    = self.abb[:]
+        new.atloc  = self.atloc[:]
+        new.place  = self.place[:]
+        new.fixed  = self.fixed[:]
+        new.link   = self.link[:]
+        new.blink  = self.blink[:]
+        new.toted  = set(self.toted)
+        new.prop   = self.prop[:]
+        new.hintlc = self.hintlc[:]
+        new.hinted = self.hinted[:]
+        new.dseen  = self.dseen[:]
+        new.dloc   = self.dloc[:]
+        new.odloc  = self.odloc[:]
+        new.setup  = self.setup
+        new.blklin = self.blklin
+        new.knfloc = self.knfloc
+        new.loc    = self.loc
+        new.newloc = self.newloc
+        new.oldloc = self.oldloc
+        new.oldlc2 = self.oldlc2
+        new.obj    = self.obj
+        new.verb   = self.verb
+        new.oldobj = self.oldobj
+        new.wd1    = self.wd1
+        new.wd1x   = self.wd1x
+        new.wd2    = self.wd2
+        new.wd2x   = self.wd2x
+        new.chloc  = self.chloc
+        new.chloc2 = self.chloc2
+        new.daltlc = self.daltlc
+        new.dflag  = self.dflag
+        new.limit  = self.limit
+        new.tally  = self.tally
+        new.tally2 = self.tally2
+        new.abbnum = self.abbnum
+        new.bonus  = self.bonus
+        new.clock1 = self.clock1
+        new.clock2 = self.clock2
+        new.closed = self.closed
+        new.closng = self.closng
+        new.demo   = self.demo
+        new.detail = self.detail
+        new.dkill  = self.dkill
+        new.foobar = self.foobar
+        new.gaveup = self.gaveup
+        new.holdng = self.holdng
+        new.iwest  = self.iwest
+        new.lmwarn = self.lmwarn
+        new.maxdie = self.maxdie
+        new.numdie = self.numdie
+        new.panic  = self.panic
+        new.saved  = self.saved
+        new.savet  = self.savet
+        new.scorng = self.scorng
+        new.turns  = self.turns
+        new.wzdark = self.wzdark
+        new.xxd    = self.xxd
+        new.xxt    = self.xxt
+        new.yea    = self.yea
+        return new
+
+def saveLayout():
+    '''
+    Work out the layout of a saved game from a new GameState: the flags and
+    counters packed by a struct, then the arrays' items, little-endian, each
+    of them in slot order.  Toted is rebuilt from place by indexBuild, and
+    the words he typed don't need saving.
+    '''
 
-    mspeak(6) # COLOSSAL CAVE IS OPEN AT THE FOLLOWING HOURS:
-    hours()
-    return {'fn':'newTurn', 'spk':0}
+    g = GameState()
+    fields, fmt, arrays = [], '<', []
+    for k in GameState.__slots__:
+        v = getattr(g, k)
+        if isinstance(v, array):
+            arrays.append((k, v.typecode, len(v)))
+        elif isinstance(v, bool):
+            fields.append(k)
+            fmt += '?'
+        elif isinstance(v, int):
+            fields.append(k)
+            fmt += 'i'
+    return tuple(fields), struct.Struct(fmt), tuple(arrays)
+
+SAVEFIELDS, SAVESCALARS, SAVEARRAYS = saveLayout()
+
+# What History compares from one line to the next: the words he typed as
+# well as what's saved, but not toted, which follows place.  HISTOFTEN are
+# the fields that most lines change, and HISTRARE the rest.
+HISTOFTEN = ('turns', 'wd1', 'oldobj', 'limit', 'verb', 'loc', 'newloc',
+    'oldloc', 'oldlc2', 'holdng')
+HISTRARE = tuple([k for k in SAVEFIELDS + ('wd1', 'wd1x', 'wd2', 'wd2x')
+    if k not in HISTOFTEN])
+HISTARRAYS = tuple([k for k,_,_ in SAVEARRAYS])
+histOften = attrgetter(*HISTOFTEN)
+histRare = attrgetter(*HISTRARE)
+histArrays = attrgetter(*HISTARRAYS)
 
-def hoursx(h,day1,day2):
+def poof():
     '''
-    Used by hours (above) to print hours for either weekdays or weekends.
-    '''
-
-    first = True 
-    frm = -1
-    if h == 0:
-        print('          %-5s%-5s  OPEN ALL DAY' % (day1,day2))
-        return
-    while True:
-        frm = frm + 1
-        if (h & (1<<frm)) != 0:
-            continue
-        if frm >= 24:
-            break
-        till = frm
-        while True:
-            till += 1
-            if not ((h & (1<<till)) == 0 and till != 24):
-                break
-        print('          %-5s%-5s%4d:00 TO%3d:00' % (day1,day2,frm,till))
-        print('%20s%4d:00 TO%3d:00' % (' ',frm,till))
-        first =  False 
-        frm = till
-    if first:
-        print('          %-5s%-5s  CLOSED ALL DAY'% (day1,day2))
-
-def inputCheck(s=' ', dtype=str, emptyOk=False):
-    global c
-
-    while True:
-        try:
-            reply = input(s).strip()
-            if reply == '':
-                if emptyOk:
-                    if   dtype == bool: v = False
-                    elif dtype == int:  v = 0
-                    elif dtype == str:  v = ''
-                    return v
-                continue
-            return dtype(reply)
-        except ValueError:
-            t = str(dtype)
-            t = t[1+t.find("'"):] # Extract, e.g., int from "<class 'int'>".
-            t = t[:t.rfind("'")]
-            if t=='INT': t = 'INTEGER'
-            print(' %s NEEDED.' % t.upper())
-        except EOFError:
-            break
-        except KeyboardInterrupt:
-            break
-    c['gaveup'] = True
-    quitGame(verify=False)
-
-def intransitive(spk):
-
-    # Analyse an intransitive verb (ie, no object given yet).
-    # Line 4080
-
-    verb = g['verb']
-    match verb:
-        case  1: return take(spk=spk)      # TAKE, now call newTurn(v)
-        case  2: return what()             # DROP
-        case  3: return what()             # SAY
-        case  4: return locking()          # OPEN
-        case  5: return newTurn(verb)      # NOTH
-        case  6: return locking()          # LOCK
-        case  7: return lampOn(spk)        # ON
-        case  8: return lampOff(spk)       # OFF
-        case  9: return what()             # WAVE
-        case 10: return what()             # CALM
-        case 11: return newTurn(verb, spk) # WALK
-        case 12: return attack(spk)        # KILL
-        case 13: return pour(spk)          # POUR
-        case 14: return eat(spk)           # EAT
-        case 15: return drink(spk)         # DRNK
-        case 16: return what()             # RUB
-        case 17: return what()             # TOSS
-        case 18: return quitGame()         # QUIT
-        case 19: return what()             # FIND
-        case 20: return inventory()        # INVN
-        case 21: return what()             # FEED
-        case 22: return fill(spk)          # FILL
-        case 23: return blast(spk)         # BLST
-        case 24: return score()            # SCOR
-        case 25: return feeFie()           # FOO
-        case 26: return brief()            # BRF
-        case 27: return read(spk)          # READ
-        case 28: return what()             # BREK
-        case 29: return what()             # WAKE
-        case 30: return suspend()          # SUSP
-        case 31: return hoursShow()        # HOUR
-        case 32: return suspend(restart=True) # RESUM
-        case  _: bug(23)     # Intransitive action verb exceeds goto list.
-
-def inventory():
-    #  INVENTORY.  If object, treat same as find.  Else report on current
-    #  burden.
-
-    spk = 98
-    for i in range(1, 100+1):
-        if i == w['bear'] or not toting(i):
-            continue
-        if spk == 98:
-            rspeak(99) # YOU ARE CURRENTLY HOLDING THE FOLLOWING:
-        g['blklin'] = False
-        pspeak(i, -1)
-        g['blklin'] = True
-        spk = 0
-    if toting(w['bear']):
-        spk = 141 # YOU ARE BEING FOLLOWED BY A VERY LARGE, TAME BEAR.
-    return {'fn':'newTurn', 'spk':spk}
-
-def juggle(obj):
-    '''
-    Juggle an object by picking it up and putting it down again, the purpose
-    being to get the object to the front of the chain of things at its loc.
-    '''
-
-    global g
-
-    i = g['place'][obj]
-    j = g['fixed'][obj]
-    move(obj, i)
-    move(obj+100, j)
-
-def lampNeedBatteries():
-    # Line 12200
-    if c['lmwarn'] or not here(w['lamp']):
-        return parseWords()
-    c['lmwarn'] = True
-    spk = 187 # GO BACK FOR THOSE BATTERIES.
-    if g['place'][w['batter']] == 0:
-        spk = 183 # START WRAPPING THIS UP...or FIND SOME FRESH BATTERIES.
-    if g['prop'][w['batter']] == 1:
-        spk = 189 # OUT OF SPARE BATTERIES.
-    rspeak(spk)
-    return parseWords()
-
-def lampOff(spk):
-    # Lamp off
-    if not here(w['lamp']):
-        return {'fn':'newTurn', 'spk':spk}
-    g['prop'][w['lamp']] = 0
-    rspeak(40) # YOUR LAMP IS NOW OFF.
-    if dark():
-        rspeak(16) # IT IS NOW PITCH DARK.
-    return {'fn':'newTurn', 'spk':0}
-
-def lampOn(spk):
-    # Light lamp
-    if not here(w['lamp']):
-        return {'fn':'newTurn', 'spk':spk}
-    spk = 184
-    if g['limit'] < 0:
-        return {'fn':'newTurn', 'spk':spk}
-    g['prop'][w['lamp']] = 1
-    rspeak(39) # YOUR LAMP IS NOW ON.
-    if c['wzdark']:
-        location()
-    return {'fn':'newTurn', 'spk':0}
-
-def lampOut():
-    # Line 12400
-    g['limit'] = -1
-    g['prop'][w['lamp']] = 0
-    if here(w['lamp']):
-        rspeak(184) # YOUR LAMP HAS RUN OUT OF POWER.
-    return parseWords()
-
-def lampOutQuit():
-    # Line 12600
-    global w
-
-    rspeak(185) # NOT MUCH POINT IN WANDERING AROUND WITHOUT A LAMP.
-    c['gaveup'] = True
-    finish()
-
-def lampRecharge():
-    '''
-    Another way we can force an end to things is by having the lamp give out.
-    When it gets close, we come here to warn him.  We go to 12000 if the lamp
-    and fresh batteries are here, in which case we replace the batteries and
-    continue.  12200 is for other cases of lamp dying.  12400 is when it goes
-    out, and 12600 is if he's wandered outside and the lamp is used up, in
-    which case we force him to give up.
-    '''
-
-    # Line 12000
-    rspeak(188) # YOUR LAMP IS GETTING DIM...REPLACING BATTERIES.
-    g['prop'][w['batter']] = 1
-    if toting(w['batter']):
-        drop(w['batter'],g['loc'])
-    g['limit'] += 2500
-    c['lmwarn'] = False
-    return parseWords()
-
-def location():
-    # Describe the current location and (maybe) get next command.
-
-    global c, g
-
-    # Print text for current loc.
-    if g['loc'] == 0:
-        return dead(pit=False) # He's dead.
-    kk = g['stext'][g['loc']]
-    if g['abb'][g['loc']]%c['abbnum'] == 0 or kk == 0:
-        kk = g['ltext'][g['loc']]
-    if not (forced(g['loc']) or not dark()):
-        if c['wzdark'] and pct(35):
-            return dead()
-        kk = g['rtext'][16] # IT IS NOW PITCH DARK
-    if toting(w['bear']):
-        rspeak(141) # FOLLOWED BY A VERY LARGE, TAME BEAR
-    speak(kk)
-    k = 1
-    if forced(g['loc']):
-        return {'fn':'newLocation', 'goto':8, 'verb':k, 'kk':-1}
-    if g['loc'] == 33 and pct(25) and not c['closng']: # 1/4 chance at Y2.
-        rspeak(8) # HOLLOW VOICE SAYS "PLUGH"
-
-    # Print out descriptions of objects at this location.  If not closing and
-    # property value is negative, tally off another treasure.  Rug is special
-    # case; once seen, its prop is 1 (dragon on it) till dragon is killed.
-    # Similarly for chain; prop is initially 1 (locked to bear).  These hacks
-    # are because prop = 0 is needed to get full score.
-
-    if dark():
-        return {'fn':'newTurn', 'spk':0}
-    g['abb'][g['loc']] += 1
-    i = g['atloc'][g['loc']]
-    obj = 0 # Added by mm.
-    while True:
-        if i == 0:
-            return {'fn':'newTurn', 'spk':0}
-        obj = i
-        if obj > 100:
-            obj -= 100
-        if obj == w['steps'] and toting(w['nugget']):
-            i = g['link'][i]
-            continue
-        else:
-            if g['prop'][obj] < 0:
-                if c['closed']:
-                    i = g['link'][i]
-                    continue
-                g['prop'][obj] = 0
-                if obj == w['rug'] or obj == w['chain']:
-                    g['prop'][obj] = 1
-                g['tally'] -= 1
-                # If remaining treasures too elusive, zap his lamp.
-                if g['tally'] == g['tally2'] and g['tally'] != 0:
-                    g['limit'] = min(35, g['limit'])
-            kk = g['prop'][obj]
-            if obj == w['steps'] and g['loc'] == g['fixed'][w['steps']]:
-                kk = 1
-            pspeak(obj, kk)
-            i = g['link'][i]
-
-def locking(intransitive=True):
-    #  Lock, unlock, no object given.  Assume various things if present.
-    global g
-
-    if intransitive:
-        if here(w['clam']):
-            g['obj'] = w['clam']
-        if here(w['oyster']):
-            g['obj'] = w['oyster']
-        if at(w['door']):
-            g['obj'] = w['door']
-        if at(w['grate']):
-            g['obj'] = w['grate']
-        if g['obj'] != 0 and here(w['chain']):
-            return what()
-        if here(w['chain']):
-            g['obj'] = w['chain']
-        if g['obj'] == 0:
-            spk = 28 # THERE IS NOTHING HERE WITH A LOCK!
-            return {'fn':'newTurn', 'spk':spk}
-
-    # Lock, unlock object.  Special stuff for opening clam/oyster and for
-    # chain.
-
-    if g['obj'] == w['clam'] or g['obj'] == w['oyster']: # Clam/oyster.
-        k = 0
-        if g['obj'] == w['oyster']:
-            k = 1
-        spk = 124+k
-        if toting(g['obj']):
-            spk = 120+k # PUT DOWN CLAM/OYSTER BEFORE OPENING IT.
-        if not toting(w['tridnt']):
-            spk = 122+k # NOTHING STRONG ENOUGH TO OPEN CLAM/OYSTER.
-        if g['verb'] == w['lock']:
-            spk = 61 # WHAT?
-        if spk != 124: # GLISTENING PEARL FALLS OUT OF CLAM AND ROLLS AWAY.
-            return {'fn':'newTurn', 'spk':spk}
-        dstroy(w['clam'])
-        drop(w['oyster'],g['loc']) # Give it its proper name!
-        drop(w['pearl'],105) # Roll pearl to cul-de-sac, 2 rooms from oyster.
-        return {'fn':'newTurn', 'spk':spk}
-    if g['obj'] == w['door']:
-        spk = 111 # DOOR IS EXTREMELY RUSTY AND REFUSES TO OPEN.
-    if g['obj'] == w['door'] and g['prop'][w['door']] == 1:
-        spk = 54 # OK
-    if g['obj'] == w['cage']:
-        spk = 32 # IT HAS NO LOCK.
-    if g['obj'] == w['keys']:
-        spk = 55 # YOU CAN'T UNLOCK THE KEYS.
-    if g['obj'] == w['grate'] or g['obj'] == w['chain']:
-        spk = 31 # YOU HAVE NO KEYS!
-    if spk != 31 or not here(w['keys']):
-        return {'fn':'newTurn', 'spk':spk}
-    if g['obj'] == w['chain']: # Chain.
-        if g['verb'] == w['lock']:
-            spk = 172 # THE CHAIN IS NOW LOCKED.
-            if g['prop'][w['chain']] != 0:
-                spk = 34 # IT WAS ALREADY LOCKED.
-            if g['loc'] != g['plac'][w['chain']]:
-                spk = 173 # NOTHING HERE TO WHICH THE CHAIN CAN BE LOCKED.
-            if spk != 172:
-                return {'fn':'newTurn', 'spk':spk}
-            g['prop'][w['chain']] = 2
-            if toting(w['chain']):
-                drop(w['chain'],g['loc'])
-            g['fixed'][w['chain']] = -1
-            return {'fn':'newTurn', 'spk':spk}
-        spk = 171 # THE CHAIN IS NOW UNLOCKED.
-        if g['prop'][w['bear']] == 0:
-            spk = 41 # NO WAY TO GET PAST THE BEAR
-        if g['prop'][w['chain']] == 0:
-            spk = 37 # IT WAS ALREADY UNLOCKED.
-        if spk != 171: # THE CHAIN IS NOW UNLOCKED.
-            return {'fn':'newTurn', 'spk':spk}
-        g['prop'][w['chain']] = 0
-        g['fixed'][w['chain']] = 0
-        if g['prop'][w['bear']] != 3: # ==3, dead bear.
-            g['prop'][w['bear']] = 2 # Free.
-        g['fixed'][w['bear']] = 2 - g['prop'][w['bear']]
-        return {'fn':'newTurn', 'spk':spk}
-    if not c['closng']:
-        k = 34 + g['prop'][w['grate']] # GRATE NOW LOCKED/WAS LOCKED.
-        g['prop'][w['grate']] = 1 # Unlocked.
-        if g['verb'] == w['lock']:
-            g['prop'][w['grate']] = 0 # Locked.
-        k += 2*g['prop'][w['grate']]
-        return {'fn':'newTurn', 'spk':k}
-    if not c['panic']:
-        c['clock2'] = 15
-    c['panic'] = True
-    k = 130 # THIS EXIT IS CLOSED.
-    return {'fn':'newTurn', 'spk':k}
-
-def lookAround():
-    # LOOK.  Can't give more detail.  Pretend it wasn't dark (though it may
-    # "now" be dark) so he won't fall into a pit while staring into the
-    # gloom.
-
-    if c['detail'] < 3:
-        rspeak(15) # I AM NOT ALLOWED TO GIVE MORE DETAIL.
-    c['detail'] += 1
-    c['wzdark'] = False
-    g['abb'][g['loc']] = 0
-    return {'fn':None} #goto 2
-
-def maint():
-
-    '''
-    Someone said the magic word to invoke maintenance mode.  Make sure he's a
-    wizard.  If so, let him tweak all sorts of random things, then exit so
-    can save tweaked version.  Since magic word must be first command given,
-    only thing which needs to be fixed up is abb(1).
-    '''
-
-    global g, wizcom
-
-    if not wizard():
-        return
-    g['blklin'] = False 
-    if yesm(10,0,0): # DO YOU WISH TO SEE THE HOURS?
-        hours()
-    if yesm(11,0,0): # DO YOU WISH TO CHANGE THE HOURS?
-        newhrs()
-    if yesm(26,0,0): # DO YOU WISH TO (RE)SCHEDULE THE NEXT HOLIDAY?
-        mspeak(27) # TO BEGIN HOW MANY DAYS FROM TODAY?
-        wizcom['hbegin'] = inputCheck(dtype=int)
-        mspeak(28) # TO LAST HOW MANY DAYS (ZERO IF NO HOLIDAY)?
-        wizcom['hend'] = inputCheck(dtype=int)
-        d,t = datime()
-        wizcom['hbegin'] += d
-        wizcom['hend'] += wizcom['hbegin'] - 1
-        mspeak(29) # TO BE CALLED WHAT (UP TO 20 CHARACTERS)?
-        wizcom['hname'] = inputCheck().upper()
-    s = ' LENGTH OF SHORT GAME (NULL TO LEAVE AT%3d): ' % wizcom['short']
-    x = inputCheck(s, dtype=int, emptyOk=True)
-    if x > 0:
-        wizcom['short'] = x
-    mspeak(12, nl=False) # NEW MAGIC WORD (NULL TO LEAVE UNCHANGED):
-    x = inputCheck(emptyOk=True)
-    if x != '':
-        wizcom['magic'] = x
-    mspeak(13, nl=False) # NEW MAGIC NUMBER (NULL TO LEAVE UNCHANGED):
-    x = inputCheck(dtype=int, emptyOk=True)
-    if x > 0:
-        wizcom['magnm'] = x
-    s = ' LATENCY FOR RESTART (NULL TO LEAVE AT%3d): ' % wizcom['latncy']
-    x = inputCheck(s, dtype=int, emptyOk=True)
-    if 0 < x < 45:
-        mspeak(30) # TOO SMALL!  ASSUMING MINIMUM VALUE (45 MINUTES).
-    if x > 0:
-        wizcom['latncy'] = max(45, x)
-    if yesm(14,0,0): # DO YOU WISH TO CHANGE THE MESSAGE OF THE DAY?
-        motd(True)
-    c['saved'] = 0
-    g['setup'] = 2
-    g['abb'][1] = 0
-    mspeak(15) # OKAY.  YOU CAN SAVE THIS VERSION NOW.
-    g['blklin']= True 
-    f = open('hours', 'w')
-    for k in wizcom.keys():
-        print('%s %s' % (k, str(wizcom[k])), file=f)
-    f.close()
-    ciao()
-
-def motd(alter):
-    '''
-    Handles message of the day.  If alter is true, read a new message from
-    the wizard.  Else print the current one.  Message is initially null.
-    '''
-
-    global wizcom
-
-    msg = ''
-
-    if not alter:
-        if wizcom['motd'] != '':
-            print(' %s' % wizcom['motd'])
-        return
-    mspeak(23) # LIMIT LINES TO 70 CHARS.  END WITH NULL LINE.
-    while True:
-        try:
-            line = inputCheck(emptyOk=True).upper()
-        except KeyboardInterrupt:
-            c['gaveup'] = True
-            quitGame(verify=False)
-        if len(line) > 70:
-            mspeak(24) # LINE TOO LONG, RETYPE:
-            continue
-        if line == '':
-            wizcom['motd'] = msg
-            return
-        if len(msg)+len(line) >= 100: # Limit motd to 100 chars.
-            mspeak(25) # NOT ENOUGH ROOM FOR ANOTHER LINE...
-            wizcom['motd'] = msg
-            return
-        msg += line
-
-def motionsSpecial(k):
-    # Special motions come here.  Labelling convention: statement
-    # numbers nnnxx (xx = 00-99) are used for special case number
-    # nnn (nnn = 301-500).
-
-    global g
-
-    match g['newloc']-300: # goto (30100,30200,30300)newloc
-        case 1: # loc is either 99/alcove or 100/plover.
-            # Travel 301.  Plover-alcove passage.  Can carry only emerald.
-            # Note: travel table must include "useless" entries going through
-            # passage, which can never be used for actual motion, but can be
-            # spotted by "go back".
-#           g['newloc'] = 99 + 100 - g['loc']
-            g['newloc'] = 99 if g['loc']==100 else 100 # Go to other end.
-            if c['holdng'] == 0 or (c['holdng'] == 1 and toting(w['emrald'])):
-                return {'fn':None} # goto 2 # Holding nothing or only emerald.
-            g['newloc'] = g['loc'] # Don't move.
-            rspeak(117) # WON'T FIT THROUGH THE TUNNEL WITH YOU.
-            return {'fn':None} # goto 2
-        case 2:
-            # Travel 302.  Plover transport.  Drop the emerald (only use
-            # special travel if toting it), so he's forced to use the
-            # plover-passage to get it out.  Having dropped it, go back and
-            # pretend he wasn't carrying it after all.
-            drop(w['emrald'],g['loc'])
-            return {'fn':'newLocation', 'goto':12, 'verb':k, 'kk':-1}
-        case 3:
-            # Travel 303.  Troll bridge.  Must be done only as special motion
-            # so that dwarves won't wander across and encounter the bear.
-            # (They won't follow the player there because that region is
-            # forbidden to the pirate.)  If prop(troll) = 1, he's crossed
-            # since paying, so step out and block him.  (Standard travel
-            # entries check for prop(troll) = 0.)  Special stuff for bear.
-            if g['prop'][w['troll']] != 1:
-                g['newloc'] = (g['plac'][w['troll']]
-                    + g['fixd'][w['troll']] - g['loc'])
-                if g['prop'][w['troll']] == 0:
-                    g['prop'][w['troll']] = 1
-                if not toting(w['bear']):
-                    return {'fn':None} # goto 2
-                rspeak(162) # YOU STUMBLE BACK AND FALL INTO THE CHASM.
-                g['prop'][w['chasm']] = 1
-                g['prop'][w['troll']] = 2
-                drop(w['bear'], g['newloc'])
-                g['fixed'][w['bear']] = -1 # Destroy bear.
-                g['prop'][w['bear']] = 3   # Dead bear.
-                if g['prop'][w['spices']] < 0:
-                    g['tally2'] += 1       # Cannot find spices again.
-                g['oldlc2'] = g['newloc']
-                return dead()
-            pspeak(w['troll'], 1) # No msg, chased away.
-            g['prop'][w['troll']] = 0
-            move(w['troll2'], 0)
-            move(w['troll2']+100, 0)
-            move(w['troll'], g['plac'][w['troll']])
-            move(w['troll']+100, g['fixd'][w['troll']])
-            juggle(w['chasm'])
-            g['newloc'] = g['loc']
-            return {'fn':None} # goto 2
-        case _:
-            bug(20) # Special travel (500>l>300) exceeds goto list.
-
-def move(obj,where):
-
-    '''
-    Place any object anywhere by picking it up and dropping it.  May already
-    be toting, in which case the carry is a no-op.  Mustn't pick up objects
-    which are not at any loc, since carry wants to remove objects from atloc
-    chains.
-    '''
-
-    global g
-
-    if obj <= 100:
-        frm = g['place'][obj]
-    else:
-        frm = g['fixed'][obj-100]
-    if 0 < frm <= 300:
-        carry(obj, frm)
-    drop(obj, where)
-
-def newhrs():
-    '''
-    Set up new hours for the cave.  Specified as inverse--i.e., when is it
-    closed due to prime time?  See hours (above) for desc of variables.
-    '''
-
-    global wizcom
-
-    mspeak(21)
-    wizcom['wkday'] = newhrx('WEEKD','AYS:')
-    wizcom['wkend'] = newhrx('WEEKE','NDS:')
-    wizcom['holid'] = newhrx('HOLID','AYS:')
-    mspeak(22)
-    hours()
-
-def newhrx(day1,day2):
-    '''
-    Input prime time specs and set up a word of internal format.
-    '''
-
-    newhrx = 0
-    print(' PRIME TIME ON %-5s%-5s' % (day1,day2))
-    while True:
-        frm = inputCheck(' FROM: ', dtype=int)
-        if not (0 <= frm < 24):
-            return newhrx
-        till = inputCheck(' TILL: ', dtype=int)
-        till -= 1
-        if not (frm <= till < 24):
-            return newhrx
-        for i in range(frm, till+1):
-            newhrx |= 1<<i
-
-def newLocation(goto, k, kk=-1):
-    '''
-    Figure out the new location
-
-    Given the current location in "loc", and a motion verb number in "k", put
-    the new location in "newloc".  The current loc is saved in "oldloc" in
-    case he wants to retreat.  The current oldloc is saved in oldlc2, in case
-    he dies.  (If he does, newloc will be limbo, and oldloc will be what
-    killed him, so we need oldlc2, which is the last place he was safe.)
-    '''
-
-    if goto == 8:
-        # Line 8
-        kk = g['key'][g['loc']]
-        g['newloc'] = g['loc']
-        if kk == 0:
-            bug(26) # Location has no travel entries.
-        if k == w['null']:
-            return {'fn':None} # goto 2
-        elif k == w['back']:
-            return goBack(kk)
-        elif k == w['look']:
-            lookAround() # goto 2
-            return {'fn':None} # goto 2
-        elif k == w['cave']:
-            caveMsg() # goto 2
-            return {'fn':None} # goto 2
-        g['oldlc2'] = g['oldloc']
-        g['oldloc'] = g['loc']
-
-    if goto <= 9:
-        while True:
-            # Line 9
-            ll = abs(g['travel'][kk]) # travel[kk] is new loc.
-            if ll%1000 in [1, k]:
-                break
-            if g['travel'][kk] < 0:
-                return badMotion(k)
-            kk += 1
-
-    while True: # Line 10
-        if goto < 12:
-            ll //= 1000 # Newloc portion of ll.
-        while True: # Check for conditional travel.
-            if goto < 12: # Line 11
-                g['newloc'] = ll//1000
-                k = g['newloc']%100
-                if g['newloc'] <= 300:
-                    break # Not conditional travel.
-                if g['prop'][k] != g['newloc']//100 - 3:
-                    g['newloc'] = ll%1000 # Line 16
-                    if g['newloc'] <= 300:
-                        return {'fn':None} # goto 2
-                    if g['newloc'] <= 500:
-                        return motionsSpecial(k)
-                    rspeak(g['newloc']-500)
-                    g['newloc'] = g['loc']
-                    return {'fn':None} # goto 2
-            while True: # Line 12
-                if g['travel'][kk] < 0:
-                    bug(25) # Conditional travel entry with no alternative.
-                kk += 1
-                g['newloc'] = abs(g['travel'][kk])//1000
-                if g['newloc'] == ll:
-                    continue
-                ll = g['newloc']
-                break
-            goto = 11
-
-        # Line 13
-        if g['newloc'] <= 100: # Line 13
-            goto = 14
-        elif toting(k) or (g['newloc'] > 200 and at(k)):
-            goto = 16
-        else:
-            goto = 12
-            continue
-        if goto==14 and g['newloc']!=0 and not pct(g['newloc']): # Line 14
-            goto = 12
-            continue
-        g['newloc'] = ll%1000 # Line 16
-        if g['newloc'] <= 300:
-            return {'fn':None} # goto 2
-        if g['newloc'] <= 500:
-            return motionsSpecial(k)
-        rspeak(g['newloc']-500)
-        g['newloc'] = g['loc']
-        return {'fn':None} # goto 2
-    if g['newloc'] > 300:
-        if g['newloc'] <= 500:
-            return motionsSpecial(k)
-        rspeak(g['newloc']-500)
-        g['newloc'] = g['loc']
-    return {'fn':None} # goto 2
-
-def newTurn(verb, spk=54): # 54 is number for OK.
-    global g
-
-    if spk > 0:
-        rspeak(spk)
-    if spk > -1: # A poor way to implement GOTO 2012.
-        verb = 0 # Line 2012
-        g['oldobj'] = g['obj']
-        g['obj'] = 0
-
-    # Check if this loc is eligible for any hints.  If been here long enough,
-    # branch to help section (on later page).  Hints all come back here
-    # eventually to finish the loop.  Ignore "hints" < 4 (special stuff, see
-    # database notes).
-
-    # Many GOTO 2600
-    for hint in range(4, g['hntmax']+1): # Line 2600
-        if g['hinted'][hint]:
-            continue
-        if not bitset(g['loc'],hint):
-            g['hintlc'][hint] = -1
-        g['hintlc'][hint] += 1
-        if g['hintlc'][hint] >= g['hints'][hint][1]:
-            getHint(hint)
-
-    #  Kick the random number generator just to add variety to the chase.  Also,
-    #  if closing time, check for any objects being toted with prop < 0 and set
-    #  the prop to -1-prop.  This way objects won't be described until they've
-    #  been picked up and put down separate from their respective piles.  Don't
-    #  tick clock1 unless well into cave (and not at Y2).
-
-    if c['closed']:
-        if g['prop'][w['oyster']] < 0 and toting(w['oyster']):
-            pspeak(w['oyster'], 1) # SOMETHING WRITTEN ON UNDERSIDE OF OYSTER.
-        for i in range(1, 100+1):
-            if toting(i) and g['prop'][i] < 0:
-                g['prop'][i] = -1 - g['prop'][i]
-    c['wzdark'] = dark()
-    if g['knfloc'] > 0 and g['knfloc'] != g['loc']:
-        g['knfloc'] = 0
-    random()
-    g['wd1'],g['wd1x'],g['wd2'],g['wd2x'] = getin()
-    return foobarEtc(verb)
-
-def parseWords():
-    # Line 19999
-    k = 43 # WHERE?
-    if liqloc(g['loc']) == w['water']:
-        k = 70 # YOUR FEET ARE NOW WET.
-    if g['wd1'] == 'ENTER' and (g['wd2'] in ['STREA', 'WATER']):
-        return {'fn':'newTurn', 'spk':k}
-    if g['wd1'] == 'ENTER' and g['wd2'] != '':
-        return secondWord() # Move wd2 to wd1.
-    if (g['wd1'] in ['WATER', 'OIL'] and g['wd2'] in ['PLANT', 'DOOR']
-        and at(vocab(g['wd2'],1))): # Use liquid name as verb POUR.
-        g['wd2'] = 'POUR'
-    westOrW()
-    return analyseWord()
-
-def postDbInit():
-    # Finish constructing internal data format
-    global c, g, w, wizcom
-
-    # If setup = 2 we don't need to do this.  It's only necessary if we
-    # haven't done it at all or if the program has been run since then.
-    if g['setup'] == 2:
-        return
-    if g['setup'] == -1:
-        suspend(restart=True)
-
-    # Having read in the database, certain things are now constructed.  Props
-    # are set to zero.  We finish setting up cond by checking for
-    # forced-motion travel entries.  The plac and fixd arrays are used to set
-    # up atloc[n] as the first object at location n, and link[obj] as the
-    # next object at the same location as obj.  (Obj>100 indicates that
-    # fixed(obj-100) = loc; link[obj] is still the correct link to use.)  Abb
-    # is zeroed; it controls whether the abbreviated description is printed.
-    # Counts mod 5 unless "look" is used.
-    for i in range(1, 100+1):
-        g['place'][i] = 0
-        g['prop'][i] = 0
-        g['link'][i] = 0
-        g['link'][i+100] = 0
-    for i in range(1, g['locsiz']+1):
-        g['abb'][i] = 0
-        if g['ltext'][i] != 0 and g['key'][i] != 0:
-            k = g['key'][i]
-            if abs(g['travel'][k])%1000 == 1:
-                g['cond'][i] = 2 # Forced movement at this location.
-        g['atloc'][i] = 0
-
-    #  Set up the atloc and link arrays as described above.  We'll use the
-    #  drop subroutine, which prefaces new objects on the lists.  Since we
-    #  want things in the other order, we'll run the loop backwards.  If the
-    #  object is in two locs, we drop it twice.  This also sets up "place"
-    #  and "fixed" as copies of "plac" and "fixd".  Also, since two-placed
-    #  objects are typically best described last, we'll drop them first.
-    for i in range(1, 100+1):
-        k = 101 - i
-        if g['fixd'][k] <= 0:
-            continue
-        drop(k+100, g['fixd'][k])
-        drop(k, g['plac'][k])
-    for i in range(1, 100+1):
-        k = 101 - i
-        g['fixed'][k] = g['fixd'][k]
-        if g['plac'][k] != 0 and g['fixd'][k] <= 0:
-            drop(k, g['plac'][k])
-
-    # Treasures, as noted earlier, are objects 50 through maxtrs (currently
-    # 79).  Their props are initially -1, and are set to 0 the first time
-    # they are described.  Tally keeps track of how many are not yet found,
-    # so we know when to close the cave.  Tally2 counts how many can never be
-    # found (e.g. if lost bird or bridge).
-    g['maxtrs'] = 79
-    g['tally'] = 0
-    g['tally2'] = 0
-    for i in range(50, g['maxtrs']+1): # Go through treasures, which are >50.
-        if g['ptext'][i] != 0: # ==0 means no object info here.
-            g['prop'][i] = -1 # Treasure not yet found.
-        g['tally'] -= g['prop'][i]
-
-    # Clear the hint stuff.  hintlc[i] is how long he's been at loc with
-    # cond bit i.  hinted[i] is true iff hint i has been used.
-    for i in range(1, g['hntmax']+1):
-        g['hinted'][i] = False
-        g['hintlc'][i] = 0
-
-    #  Define some handy mnemonics.  These correspond to object numbers.
-    w = { # 'w' for words.
-        'keys':vocab('KEYS',1),
-        'lamp':vocab('LAMP',1),
-        'grate':vocab('GRATE',1),
-        'cage':vocab('CAGE',1),
-        'rod':vocab('ROD',1),
-        'rod2':vocab('ROD',1) + 1,
-        'steps':vocab('STEPS',1),
-        'bird':vocab('BIRD',1),
-        'door':vocab('DOOR',1),
-        'pillow':vocab('PILLO',1),
-        'snake':vocab('SNAKE',1),
-        'fissur':vocab('FISSU',1),
-        'tablet':vocab('TABLE',1),
-        'clam':vocab('CLAM',1),
-        'oyster':vocab('OYSTE',1),
-        'magzin':vocab('MAGAZ',1),
-        'dwarf':vocab('DWARF',1),
-        'knife':vocab('KNIFE',1),
-        'food':vocab('FOOD',1),
-        'bottle':vocab('BOTTL',1),
-        'water':vocab('WATER',1),
-        'oil':vocab('OIL',1),
-        'plant':vocab('PLANT',1),
-        'plant2':vocab('PLANT',1) + 1,
-        'axe':vocab('AXE',1),
-        'mirror':vocab('MIRRO',1),
-        'dragon':vocab('DRAGO',1),
-        'chasm':vocab('CHASM',1),
-        'troll':vocab('TROLL',1),
-        'troll2':vocab('TROLL',1) + 1,
-        'bear':vocab('BEAR',1),
-        'messag':vocab('MESSA',1),
-        'vend':vocab('VENDI',1),
-        'batter':vocab('BATTE',1),
-
-        # Objects from 50 through whatever are treasures.  Here are a few.,
-        'nugget':vocab('GOLD',1),
-        'coins':vocab('COINS',1),
-        'chest':vocab('CHEST',1),
-        'eggs':vocab('EGGS',1),
-        'tridnt':vocab('TRIDE',1),
-        'vase':vocab('VASE',1),
-        'emrald':vocab('EMERA',1),
-        'pyram':vocab('PYRAM',1),
-        'pearl':vocab('PEARL',1),
-        'rug':vocab('RUG',1),
-        'chain':vocab('CHAIN',1),
-        'spices':vocab('SPICE',1),
-
-        # These are motion-verb numbers.,
-        'back':vocab('BACK',0),
-        'look':vocab('LOOK',0),
-        'cave':vocab('CAVE',0),
-        'null':vocab('NULL',0),
-        'entrnc':vocab('ENTRA',0),
-        'dprssn':vocab('DEPRE',0),
-
-        # And some action verbs.,
-        'say':vocab('SAY',2),
-        'lock':vocab('LOCK',2),
-        'throw':vocab('THROW',2),
-        'find':vocab('FIND',2),
-        'invent':vocab('INVEN',2)
-    }
-
-    '''
-    Initialise the dwarves.  Dloc is loc of dwarves, hard-wired in.  Odloc is
-    prior loc of each dwarf, initially garbage.  Daltlc is alternate initial loc
-    for dwarf, in case one of them starts out on top of the adventurer.  (No 2
-    of the 5 initial locs are adjacent.)  Dseen is true if dwarf has seen him.
-    Dflag controls the level of activation of all this:
-       0     No dwarf stuff yet (wait until reaches hall of mists)
-       1     Reached hall of mists, but hasn't met first dwarf
-       2     Met first dwarf, others start moving, no knives thrown yet
-       3     A knife has been thrown (first set always misses)
-       3+    Dwarves are mad (increases their accuracy)
-    Sixth dwarf is special (the pirate).  He always starts at his chest's
-    eventual location inside the maze.  This loc is saved in chloc for ref.
-    The dead end in the other maze has its loc stored in chloc2.
-    '''
-    g['chloc'] = 114 # DEAD END
-    g['chloc2'] = 140 # DEAD END
-    g['dseen'][1:6+1] = 6*[False]
-    g['dflag'] = 0
-    g['dloc'][1] = 19 # HALL OF THE MOUNTAIN KING
-    g['dloc'][2] = 27 # WEST SIDE OF FISSURE IN HALL OF MISTS
-    g['dloc'][3] = 33 # LARGE ROOM "Y2" ON A ROCK
-    g['dloc'][4] = 44 # TWISTY LITTLE PASSAGES, ALL ALIKE
-    g['dloc'][5] = 64 # COMPLEX JUNCTION LARGE ROOM ABOVE
-    g['dloc'][6] = g['chloc']
-    g['daltlc'] = 18 # NUGGET OF GOLD ROOM
-
-    '''
-    Other random flags and counters, as follows:
-     turns   Tallies how many commands he's given (ignores yes/no)
-     limit   Lifetime of lamp (not set here)
-     iwest   How many times he's said "WEST" instead of "W"
-     knfloc  0 if no knife here, loc if knife here, -1 after caveat
-     detail  How often we've said "not allowed to give more detail"
-     abbnum  How often we should print non-abbreviated descriptions
-     maxdie  Number of reincarnation messages available (up to 5)
-     numdie  Number of times killed so far
-     holdng  Number of objects being carried
-     dkill   Number of dwarves killed (unused in scoring, needed for msg)
-     foobar  Current progress in saying "FEE FIE FOE FOO".
-     bonus   Used to determine amount of bonus if he reaches closing
-     clock1  Number of turns from finding last treasure till closing
-     clock2  Number of turns from first warning till blinding flash
-     Logicals were explained earlier
-    '''
-
-    c = { # 'c' for cave state.
-        'abbnum':5,
-        'bonus':0,
-        'clock1':30,
-        'clock2':50,
-        'closed':False,
-        'closng':False,
-        'demo':False,
-        'detail':0,
-        'dflag':False,
-        'dkill':0,
-        'foobar':0,
-        'gaveup':False,
-        'holdng':0,
-        'iwest':0,
-        'knfloc':0,
-        'lmwarn':False,
-        'numdie':0,
-        'panic':False,
-        'saved':0,
-        'savet':0,
-        'scorng':False,
-        'turns':0,
-        'wzdark':False,
-        'yea':False
-    }
-    for i in range(4+1):
-        if g['rtext'][2*i+81] != 0:
-            c['maxdie'] = i + 1
-
-    # If setup = 1, report on amount of arrays actually used, to permit
-    # reductions.
-#   if g['setup'] != 1:
-#       return
-    g['setup'] = 2
-
-    for kk in range(g['locsiz'], 0, -1): # Section 1.
-        if g['ltext'][kk] != 0:
-            break
-    g['obj'] = 0
-    for k in range(1, 100+1): # Section 5.
-        if g['ptext'][k] != 0:
-            g['obj'] += 1
-    for k in range(1, g['tabndx']+1): # Section 4.
-        if g['ktab'][k]//1000 == 2:
-            verb = g['ktab'][k] - 2000
-    for j in range(g['rtxsiz'], 0, -1): # Section 6.
-        if g['rtext'][j] != 0:
-            break
-    for i in range(g['magsiz'], 0, -1): # Section 12.
-        if g['mtext'][i] != 0:
-            break
-
-    if False:
-        k = 100
-        print(' TABLE SPACE USED:')
-        print(' %6d OF %6d WORDS OF MESSAGES' % (g['linbytes']//5, g['linsiz']))
-        print(' %6d OF %6d TRAVEL OPTIONS' % (g['trvs'], g['trvsiz']))
-        print(' %6d OF %6d VOCABULARY WORDS' % (g['tabndx'], g['tabsiz']))
-        print(' %6d OF %6d LOCATIONS' % (kk, g['locsiz']))
-        print(' %6d OF %6d OBJECTS' % (g['obj'], k))
-        print(' %6d OF %6d ACTION VERBS' % (verb, g['vrbsiz']))
-        print(' %6d OF %6d RTEXT MESSAGES' % (j, g['rtxsiz']))
-        print(' %6d OF %6d CLASS MESSAGES' % (g['clsses'], g['clsmax']))
-        print(' %6d OF %6d HINTS' % (g['hntmax'], g['hntsiz']))
-        print(' %6d OF %6d MAGIC MESSAGES' % (i, g['magsiz']))
-
-    # Finally, since we're clearly setting things up for the first time...
-    wizcom = poof()
-
-def poof():
-    '''
-    As part of database initialisation, we call poof to set up some dummy
-    prime-time specs, magic words, etc.
+    As part of database initialisation, we call poof to set up some dummy
+    prime-time specs, magic words, etc.
     '''
 
     d = {
@@ -2679,59 +1212,6 @@ def poof():
         pass
     return d
 
-def pour(spk):
-    #  POUR.  If no object, or object is bottle, assume contents of bottle.
-    #  Special tests for pouring water or oil on plant or rusty door.
-
-    if g['obj'] == w['bottle'] or g['obj'] == 0:
-        g['obj'] = liq()
-    if g['obj'] == 0:
-        return what()
-    if not toting(g['obj']):
-        return {'fn':'newTurn', 'spk':spk}
-    spk = 78 # YOU CAN'T POUR THAT.
-    if g['obj'] != w['oil'] and g['obj'] != w['water']:
-        return {'fn':'newTurn', 'spk':spk}
-    g['prop'][w['bottle']] = 1
-    g['place'][g['obj']] = 0
-    spk = 77 # YOUR BOTTLE IS EMPTY AND THE GROUND IS WET.
-    if not (at(w['plant']) or at(w['door'])):
-        return {'fn':'newTurn', 'spk':spk}
-
-    if not at(w['door']):
-        spk = 112 # THE PLANT INDIGNANTLY SHAKES THE OIL OFF ITS LEAVES...
-        if g['obj'] != w['water']:
-            return {'fn':'newTurn', 'spk':spk}
-        pspeak(w['plant'], g['prop'][w['plant']] + 1)
-        g['prop'][w['plant']] = (g['prop'][w['plant']] + 2)%6
-        g['prop'][w['plant2']] = g['prop'][w['plant']]//2
-        k = w['null']
-        return {'fn':'newLocation','goto':8, 'verb':k, 'kk':-1}
-    g['prop'][w['door']] = 0
-    if g['obj'] == w['oil']:
-        g['prop'][w['door']] = 1
-    spk = 113 + g['prop'][w['door']]
-    return {'fn':'newTurn', 'spk':spk}
-
-def put(obj,where,pval):
-    '''
-    Put is the same as move, except it returns a value used to set up the
-    negated prop values for the repository objects.
-    '''
-    move(obj, where)
-    return -1 - pval
-
-def quitGame(verify=True):
-    # QUIT.  Intransitive only.  Verify intent and exit if that's what he
-    # wants.
-    global w
-
-    if verify:
-        c['gaveup'] = yes(22,54,54) # DO YOU REALLY WANT TO QUIT NOW?
-    if c['gaveup']:
-        finish()
-    return {'fn':'newTurn', 'spk':0}
-
 def ran(rnge): # Unused.
 
     '''
@@ -2752,90 +1232,9 @@ def ran(rnge): # Unused.
         r = r*1021%0x100000
     return (rnge*r)//0x100000
 
-def read(spk, intransitive=True):
-    #  READ.  Magazines in dwarvish, message we've seen, and . . . oyster?
-    global c, g, w
-
-    if intransitive: # Find object.
-        if here(w['magzin']):
-            g['obj'] = w['magzin']
-        if here(w['tablet']):
-            g['obj'] = g['obj']*100 + w['tablet']
-        if here(w['messag']):
-            g['obj'] = g['obj']*100 + w['messag']
-        if c['closed'] and toting(w['oyster']):
-            g['obj'] = w['oyster']
-        if g['obj'] > 100 or g['obj'] == 0 or dark():
-            return what()
-
-    obj = g['obj']
-    if dark():
-        s = (g['wd1'].strip() + g['wd1x'].strip()).upper()
-        print(' I SEE NO %s HERE.' % s)
-    if obj == w['magzin']:
-        spk = 190 # MAGAZINE IS WRITTEN IN DWARVISH.
-    if obj == w['tablet']:
-        spk = 196 # "CONGRATULATIONS ON BRINGING LIGHT INTO THE DARK-ROOM!"
-    if obj == w['messag']:
-        spk = 191 # "NOT MAZE WHERE PIRATE LEAVES TREASURE CHEST."
-    if obj == w['oyster'] and g['hinted'][2] and toting(w['oyster']):
-        spk = 194 # IT SAYS THE SAME THING IT DID BEFORE.
-    if (obj != w['oyster'] or g['hinted'][2]
-        or not toting(w['oyster']) or not c['closed']):
-        return {'fn':'newTurn', 'spk':spk}
-    g['hinted'][2] = yes(192,193,54) # READ IT.  READ IT ANYWAY?
-    return {'fn':'newTurn', 'spk':0}
-
-def rub():
-    # RUB.  Yields various snide remarks.
-    global g
-
-    if g['obj'] != w['lamp']:
-        spk = 76 # PECULIAR.  NOTHING UNEXPECTED HAPPENS.
-    return {'fn':'newTurn', 'spk':spk}
-
-def say():
-    #  SAY.  Echo wd2 (or wd1 if no wd2 (Say WHAT?, etc.).)  Magic words
-    #  override.
-    global g
-
-    tk = g['wd2'].strip() + g['wd2x'].strip() + '".'
-    if g['wd2'].strip() != '':
-        g['wd1'] = g['wd2']
-    i = vocab(g['wd1'], -1)
-    # XYZZY, PLUGH, PLOVE, FEE, FIE, FOE, FOO, FUM
-    if not (i in [62, 65, 71, 2025]): # Magic words.
-        print('\n OKAY, "%s".' % g['wd1'])
-        return {'fn':'newTurn', 'spk':0}
-    g['wd2'] = ''
-    g['obj'] = 0
-    return analyseWord()
-
-def score():
-    # SCORE.  Go to scoring section, which will return to 8241 if scorng is
-    # true.
-    global w
-
-    score,mxscor = finish(scorng=True)
-    print('\n IF YOU WERE TO QUIT NOW, YOU WOULD SCORE%4d OUT OF A POSSIBLE%4d.'
-        % (score,mxscor))
-    c['gaveup'] = yes(143,54,54) # DO YOU INDEED WISH TO QUIT NOW?
-    # quitGame(ask=False) # Might or might not quit.
-    if c['gaveup']:
-        finish()
-    return {'fn':'newTurn', 'spk':0}
-
-def secondWord():
-    global g
-    # Get second word for analysis.
-    g['wd1'],g['wd1x'] = g['wd2'],g['wd2x']
-    g['wd2'] = ''
-    westOrW() # goto 2610
-    return analyseWord()
-
 def sections(db, sect):
     # Sections 1, 2, 6, 10, 12.  Read messages and set up pointers.
-    global g
+    global cave
 
     oldloc = -1
     while True:
@@ -2845,32 +1244,32 @@ def sections(db, sect):
         tab = line.find('\t')
         loc,msg = line[:tab],line[tab+1:] # Can't use split(), multiple tabs.
         loc = int(loc)
-        g['linbytes'] += len(msg)
+        cave['linbytes'] += len(msg)
         if loc != oldloc: # New location.
-            g['lines'].append(msg)
-            g['linuse'] += 1
+            cave['lines'].append(msg)
+            cave['linuse'] += 1
         else:
-            g['lines'][g['linuse']] += '\n' + msg
+            cave['lines'][cave['linuse']] += '\n' + msg
         # Update pointers into lines[].
         match sect:
             case 1: # Long form descriptions.
-                g['ltext'][loc] = g['linuse']
+                cave['ltext'][loc] = cave['linuse']
             case 2: # Short form descriptions.
-                g['stext'][loc] = g['linuse']
+                cave['stext'][loc] = cave['linuse']
             case 6: # Arbitrary messages.
-                if loc > g['rtxsiz']:
+                if loc > cave['rtxsiz']:
                     bug(6) # Too many rtext or mtext messages.
-                g['rtext'][loc] = g['linuse']
+                cave['rtext'][loc] = cave['linuse']
             case 10: # Class messages.
-                g['ctext'][g['clsses']] = g['linuse']
-                g['cval'][g['clsses']] = loc
-                g['clsses'] += 1
+                cave['ctext'][cave['clsses']] = cave['linuse']
+                cave['cval'][cave['clsses']] = loc
+                cave['clsses'] += 1
             case 12: # Magic messages.
-                if loc > g['magsiz']:
+                if loc > cave['magsiz']:
                     bug(6) # Too many rtext or mtext messages.
-                g['mtext'][loc] = g['linuse']
+                cave['mtext'][loc] = cave['linuse']
         oldloc = loc
-        if len(msg)+14 > g['linsiz']:
+        if len(msg)+14 > cave['linsiz']:
             bug(2) #  Too many words of messages.
 
 def section3(db):
@@ -2914,7 +1313,7 @@ def section3(db):
     case he goes to 9.  verb 50 takes him to 9 regardless of prop(3).
     '''
 
-    global g
+    global cave
 
     while True:
         line = db.readline().strip()
@@ -2922,16 +1321,16 @@ def section3(db):
             return
         tk = list(map(int, line.split())) # Variable number of ints.
         loc,newloc = tk[0],tk[1]
-        if g['key'][loc] == 0: # Unused location.
-            g['key'][loc] = g['trvs'] # Where travel info on loc begins.
+        if cave['key'][loc] == 0: # Unused location.
+            cave['key'][loc] = cave['trvs'] # Where travel info on loc begins.
         else:
-            g['travel'][g['trvs']-1] = -g['travel'][g['trvs']-1]
+            cave['travel'][cave['trvs']-1] = -cave['travel'][cave['trvs']-1]
         for l in range(2,len(tk)):
-            g['travel'][g['trvs']] = newloc*1000 + tk[l]
-            g['trvs'] += 1
-            if g['trvs'] == g['trvsiz']:
+            cave['travel'][cave['trvs']] = newloc*1000 + tk[l]
+            cave['trvs'] += 1
+            if cave['trvs'] == cave['trvsiz']:
                 bug(3) # Too many travel options.
-        g['travel'][g['trvs']-1] = -g['travel'][g['trvs']-1]
+        cave['travel'][cave['trvs']-1] = -cave['travel'][cave['trvs']-1]
 
 def section4(db):
     '''
@@ -2950,20 +1349,23 @@ def section4(db):
        (currently, anyway) 79 are considered treasures (for pirate, closeout).
     '''
 
-    global g
+    global cave
 
-    for g['tabndx'] in range(1, g['tabsiz']+1):
+    for cave['tabndx'] in range(1, cave['tabsiz']+1):
         val = db.readline().strip().split()
-        g['ktab'][g['tabndx']] = int(val[0])
-        if g['ktab'][g['tabndx']] == -1:
-            g['atab'][g['tabndx']] = ''
+        cave['ktab'][cave['tabndx']] = int(val[0])
+        if cave['ktab'][cave['tabndx']] == -1:
+            cave['atab'][cave['tabndx']] = ''
             return
-        g['atab'][g['tabndx']] = val[1][:5] # Ignore trailing comments on line.
+        cave['atab'][cave['tabndx']] = val[1][:5] # Ignore trailing comments on line.
+        # Index every definition of the word, in table order, for vocab().
+        cave['vocab'].setdefault(cave['atab'][cave['tabndx']], []).append(
+            cave['ktab'][cave['tabndx']])
         # Hash was to prevent search of compiled program for strings.
         # With python source available to user, why bother hashing!
         # p = np.array(list(map(ord, 'PHROG')))
-        # w = np.array(list(map(ord, g['atab'][g['tabndx']])))
-        # g['atab'][g['tabndx']] = xor(g['atab'][g['tabndx']], 'PHROG')
+        # w = np.array(list(map(ord, cave['atab'][cave['tabndx']])))
+        # cave['atab'][cave['tabndx']] = xor(cave['atab'][cave['tabndx']], 'PHROG')
     bug(4) # Too many vocabulary words.
 
 def section5(db):
@@ -2991,7 +1393,7 @@ def section5(db):
     where indices 1 and onward are assumed to be 000, 100, 200, ...
     '''
 
-    global g
+    global cave
 
     oldloc = ''
     while True:
@@ -3001,18 +1403,18 @@ def section5(db):
         isInventory = (line[1:3] != '00')
         loc,msg = line.split('\t')
         loc = int(loc)
-        g['linbytes'] += len(msg)
+        cave['linbytes'] += len(msg)
         if isInventory:
-            i = g['linuse'] - 1
-            g['lines'].append([msg]) # Inventory entry.
-            g['linuse'] += 1
-            g['ptext'][loc] = g['linuse']
+            i = cave['linuse'] - 1
+            cave['lines'].append([msg]) # Inventory entry.
+            cave['linuse'] += 1
+            cave['ptext'][loc] = cave['linuse']
         elif loc == oldloc:
-            i = g['linuse']
-            g['lines'][i][-1] += '\n' + msg # Inventory entry.
+            i = cave['linuse']
+            cave['lines'][i][-1] += '\n' + msg # Inventory entry.
         else:
-            g['lines'][g['linuse']].append(msg) # Entries 000, 100, 200, etc.
-        if len(msg)+14 > g['linsiz']:
+            cave['lines'][cave['linuse']].append(msg) # Entries 000, 100, 200, etc.
+        if len(msg)+14 > cave['linsiz']:
             bug(2) # Too many words of messages.
         oldloc = loc
 
@@ -3029,15 +1431,15 @@ def section7(db):
        the object is assumed to be immovable.
     '''
 
-    global g
+    global cave
 
     while True:
         v = list(map(int, db.readline().strip().split()))
         if v[0] == -1:
             return
         obj = v[0]
-        if len(v) >= 2: g['plac'][obj] = v[1]
-        if len(v) == 3: g['fixd'][obj] = v[2]
+        if len(v) >= 2: cave['plac'][obj] = v[1]
+        if len(v) == 3: cave['fixd'][obj] = v[2]
 
 def section8(db):
     '''
@@ -3047,14 +1449,14 @@ def section8(db):
        the index (in section 6) of the default message for the verb.
     '''
 
-    global g
+    global cave
 
     while True:
         vals = list(map(int, db.readline().strip().split()))
         verb = vals[0]
         if verb == -1:
             return
-        g['actspk'][verb] = vals[1]
+        cave['actspk'][verb] = vals[1]
 
 def section9(db):
     '''
@@ -3078,7 +1480,7 @@ def section9(db):
     motion.
     '''
 
-    global g
+    global cave
 
     while True:
         line = db.readline().strip()
@@ -3090,7 +1492,7 @@ def section9(db):
             loc = tk[i]
             if bitset(loc,k):
                 bug(8) # Location has cond bit being set twice.
-            g['cond'][loc] |= 1<<k
+            cave['cond'][loc] |= 1<<k
 
 def section11(db):
     '''
@@ -3108,315 +1510,53 @@ def section11(db):
        points).
     '''
 
-    global g
+    global cave
 
-    g['hntmax'] = 0
+    cave['hntmax'] = 0
     while True:
         v = list(map(int, db.readline().strip().split()))
         if v[0] == -1:
             return
-        if not (0 <= v[0] <= g['hntsiz']):
+        if not (0 <= v[0] <= cave['hntsiz']):
             bug(7) # Too many hints.
-        g['hints'][v[0]][1:4+1] = v[1:]
-        g['hntmax'] = max(g['hntmax'], v[0])
+        cave['hints'][v[0]][1:4+1] = v[1:]
+        cave['hntmax'] = max(cave['hntmax'], v[0])
 
-def stateRead(fname='state.adv'):
-    '''Doing this brute force rather than pickle or similar so that it can be
-    ported with ease to micropython for calculators, in particular.
+def travelRules(opts, i):
+    '''
+    Decode the travel options tried for a verb whose first matching entry
+    is opts[i], opts being the (verb, y) pairs of one location's entries in
+    travel.  If an option's condition isn't met, the next entry with a
+    *different* y is tried, whatever its verb (see section3), so that is
+    the list returned, stopping at the first unconditional option.  Each
+    option is (test, obj, val, dest), test being
+          0     Unconditional
+          1     obj% probability (100 is forbidden to dwarves)
+          2     Carrying obj
+          3     Carrying or in same room as obj
+          4     prop[obj] must *not* be val
+    and dest the n of section 3: a location, special code or message.
     '''
 
-    global c, g
-
-    #   F i n d   g a m e   t o   l o a d
-    files = os.listdir()
-    afiles = []
-    for f in files:
-        if f[-4:] == '.adv':
-            afiles.append(f)
-    if len(afiles) == 0:
-        print(' I SEE NO SAVED GAME HERE.')
-        return
-    elif len(afiles) == 1:
-        fname = afiles[0] # One saved game, no need to ask user.
-    elif len(afiles) > 1:
-        print(' I SEE THESE SAVED GAMES:')
-        for i,s in enumerate(afiles):
-            print(' %d. %s' % (i+1,s))
-        n = (inputCheck(' ENTER NUMBER OF GAME TO RESUME: ', dtype=int))
-        n -= 1
-        fname = afiles[n]
-
-    #   L o a d   g a m e
-    f = open(fname, 'r')
-    while True:
-        line = f.readline().strip()
-        if line == '': #EOF
-            break
-        line = line.strip()
-        if line == 'cave':
-            d = c
-            continue
-        elif line == 'game':
-            d = g
-            continue
-        var,val,tStr = line.split()
-        val = val.split(',')
-        if len(val) == 0:
+    rules = []
+    y = -1
+    for _,ll in opts[i:]:
+        if ll == y: # Not a different destination.
             continue
-        elif len(val) == 1:
-            v = val[0]
-            if   tStr == 'str':  d[var] = v
-            elif tStr == 'int':  d[var] = int(v)
-            elif tStr == 'bool': d[var] = (v == 'True')
-        else: # List.
-            res = []
-            for v in val:
-                if   tStr == 'str':  res.append(v)
-                elif tStr == 'int':  res.append(int(v))
-                elif tStr == 'bool': res.append(v == 'True')
-            d[var] = res
-    f.close()
-    return
-
-def stateWrite(fname='state.adv'):
-    # Write dictionaries.
-    f = open(fname, 'w')
-    print('cave', file=f)
-    for k in c.keys(): # Cave state.
-        t = str(type(c[k]))
-        t = t[:t.rfind("'")]
-        t = t[t.find("'")+1:]
-        print('%s %s %s' % (k, str(c[k]), t), file=f)
-    print('game', file=f)
-    for k in g.keys(): # Game state.
-        if k in ['actspk','atab','cond','ctext','cval','fixd', 'hints',
-            'key','ktab','lines','ltext','mtext','plac', 'ptext',
-            'rtext','stext','travel']:
-            continue # Won't change so reread at restart.
-        if k[:2] == 'wd':
-            continue
-        t = str(type(g[k]))
-        t = t[:t.rfind("'")]
-        t = t[t.find("'")+1:]
-        if t == 'list':
-            t = str(type(g[k][0]))
-            t = t[:t.rfind("'")]
-            t = t[t.find("'")+1:]
-            l = str(g[k])
-            l = l.replace('[','')
-            l = l.replace(']','')
-            l = l.replace(' ','')
-            print('%s %s %s' % (k, l, t), file=f)
+        y = ll
+        m,n = divmod(ll, 1000)
+        if m == 0:
+            rules.append((0, 0, 0, n))
+            break # No need for alternatives.
+        elif m <= 100:
+            rules.append((1, m, 0, n))
+        elif m <= 200:
+            rules.append((2, m%100, 0, n))
+        elif m <= 300:
+            rules.append((3, m%100, 0, n))
         else:
-            print('%s %s %s' % (k, str(g[k]), t), file=f)
-    f.close()
-    print(' GAME SAVED.')
-    return
-
-def suspend(restart=False):
-    # SUSPEND.  Offer to exit leaving things restartable, but requiring a
-    # delay before restarting (so can't save the world before trying
-    # something risky).  Upon restarting, setup = -1 causes return to 8305 to
-    # pick up again.
-
-    global c, g, wizcom
-
-    if restart:
-        dbRead()
-        stateRead()
-        c['yea'] = start() # Line 8305
-        g['setup'] = 3
-        k = w['null']
-        return {'fn':'newLocation','goto':8, 'verb':k, 'kk':-1}
-    else:
-        if c['demo']:
-            spk = 201 # NO POINT IN SUSPENDING A DEMONSTRATION GAME.
-            return {'fn':'newTurn', 'spk':spk}
-        s = '\n I CAN SUSPEND YOUR ADVENTURE FOR YOU SO THAT YOU CAN'
-        s += (' RESUME LATER, BUT\n YOU WILL HAVE TO WAIT AT LEAST%3d'
-            % wizcom['latncy'])
-        s += ' MINUTES BEFORE CONTINUING.'
-        print(s)
-        if not yes(200,54,54): # IS THIS ACCEPTABLE?
-            return {'fn':'newTurn', 'spk':0}
-        fname = input(' FILE NAME? (NULL TO USE "state.adv") ').strip()
-        if fname == '':
-            fname = 'state.adv'
-        else:
-            if fname.find('.adv') == -1:
-                fname += '.adv'
-        c['saved'],c['savet'] = datime()
-        g['setup'] = -1
-        stateWrite(fname)
-        ciao()
-
-def take(intransitive=True, spk=0):
-    # Carry an object.  Special cases for bird and cage (if bird in cage, can't
-    # take one without the other).  Liquids also special, since they depend on
-    # status of bottle.  Also various side effects, etc.
-
-    if intransitive:
-        # Carry, no object given yet.  Ok if only one object present.
-        if g['atloc'][g['loc']] == 0 or g['link'][g['atloc'][g['loc']]] != 0:
-            return what()
-        for i in range(1, 5+1):
-            if g['dloc'][i] == g['loc'] and c['dflag'] >= 2:
-                # Dwarf here & have met a dwarf.
-                return what()
-        g['obj'] = g['atloc'][g['loc']]
-
-    if toting(g['obj']):
-        return {'fn':'newTurn', 'spk':spk}
-    spk = 25 # YOU CAN'T BE SERIOUS!
-    if g['obj'] == w['plant'] and g['prop'][w['plant']] <= 0:
-        spk = 115 # PLANT CANNOT BE PULLED FREE.
-    if g['obj'] == w['bear'] and g['prop'][w['bear']] == 1:
-        spk = 169 # BEAR IS STILL CHAINED TO THE WALL.
-    if g['obj'] == w['chain'] and g['prop'][w['bear']] != 0:
-        spk = 170 # THE CHAIN IS STILL LOCKED.
-    if g['fixed'][g['obj']] != 0:
-        return {'fn':'newTurn', 'spk':spk}
-    if g['obj'] in [w['water'], w['oil']]:
-        if not (here(w['bottle']) and liq() == g['obj']):
-            g['obj'] = w['bottle']
-            if toting(w['bottle']) and g['prop'][w['bottle']] == 1: # Empty.
-                fill(spk)
-            if g['prop'][w['bottle']] != 1:
-                spk = 105 # YOUR BOTTLE IS ALREADY FULL.
-            if not toting(w['bottle']):
-                spk = 104 # YOU HAVE NOTHING IN WHICH TO CARRY IT.
-            return {'fn':'newTurn', 'spk':spk}
-        g['obj'] = w['bottle']
-    if c['holdng'] >= 7:
-        rspeak(92) # YOU CAN'T CARRY ANYTHING MORE
-        return {'fn':'newTurn', 'spk':0}
-    if g['obj'] == w['bird'] and g['prop'][w['bird']] == 0:
-        if toting(w['rod']):
-            rspeak(26) # THE BIRD WAS UNAFRAID...
-            return {'fn':'newTurn', 'spk':0}
-        if not toting(w['cage']):
-            rspeak(27) # YOU CAN CATCH THE BIRD, BUT YOU CANNOT CARRY IT.
-            return {'fn':'newTurn', 'spk':0}
-        g['prop'][w['bird']] = 1
-    if ((g['obj'] == w['bird'] or g['obj'] == w['cage'])
-        and g['prop'][w['bird']] != 0):
-        carry(w['bird']+w['cage']-g['obj'], g['loc'])
-    carry(g['obj'], g['loc']) # The typical case!
-    k = liq()
-    if g['obj'] == w['bottle'] and k != 0: # k==0 no liquid here.
-        g['place'][k] = -1
-    return {'fn':'newTurn', 'spk':54}
-
-def throw(spk):
-    # THROW.  Same as discard unless axe.  Then same as attack except ignore
-    # bird, and if dwarf is present then one might be killed.  (Only way to
-    # do so!) Axe also special for dragon, bear, and troll.  Treasures
-    # special for troll.
-    #
-    # Synonyms: THROW, TOSS.
-
-    global g
-
-    if toting(w['rod2']) and g['obj'] == w['rod'] and not toting(w['rod']):
-        g['obj'] = w['rod2']
-    if not toting(g['obj']):
-        return {'fn':'newTurn', 'spk':spk}
-    # Next line asks, if not throwing treasure at troll...
-    if not (g['obj'] >= 50 and g['obj'] <= g['maxtrs'] and at(w['troll'])):
-        if g['obj'] == w['food'] and here(w['bear']):
-            # But throwing food is another story.
-            g['obj'] = w['bear']
-            return feed(spk)
-        if g['obj'] != w['axe']:
-            return discard(spk)
-        for i in range(1, 5+1):
-            # Needn't check dflag if axe is here.
-            if g['dloc'][i] == g['loc']:
-                break
-        else:
-            spk = 152 # AXE BOUNCES OFF DRAGON'S THICK SCALES
-            if at(w['dragon']) and g['prop'][w['dragon']] == 0:
-                rspeak(spk)
-                drop(w['axe'],g['loc'])
-                k = w['null']
-                return {'fn':'newLocation', 'goto':8, 'verb':k, 'kk':-1}
-            spk = 158 # TROLL DEFTLY CATCHES THE AXE...
-            if at(w['troll']):
-                rspeak(spk)
-                drop(w['axe'],g['loc'])
-                k = w['null']
-                return {'fn':'newLocation', 'goto':8, 'verb':k, 'kk':-1}
-            if here(w['bear']) and g['prop'][w['bear']] == 0:
-                # This'll teach him to throw the axe at the bear!
-                spk = 164 # AXE MISSES...
-                drop(w['axe'],g['loc'])
-                g['fixed'][w['axe']] = -1
-                g['prop'][w['axe']] = 1
-                juggle(w['bear'])
-                return {'fn':'newTurn', 'spk':spk}
-            g['obj'] = 0
-            attack(spk)
-        spk = 48 # DWARF DODGES OUT OF THE WAY.
-        # If saved not = -1, he bypassed the "start" call.
-        if not (randint(3) == 0 or c['saved'] != -1): # 1/3 kill rate.
-            g['dseen'][i] = False
-            g['dloc'][i] = 0 # Kill dwarf.
-            spk = 47 # YOU KILLED A LITTLE DWARF.
-            c['dkill'] += 1
-            if c['dkill'] == 1:
-                spk = 149 # YOU KILLED A LITTLE DWARF...BLACK SMOKE.
-        rspeak(spk)
-        drop(w['axe'],g['loc'])
-        k = w['null']
-        return {'fn':'newLocation', 'goto':8, 'verb':k, 'kk':-1}
-    spk = 159 # TROLL CATCHES TREASURE, SCURRIES OUT OF SIGHT
-    # Snarf a treasure for the troll.
-    drop(g['obj'], 0)
-    move(w['troll'], 0)
-    move(w['troll']+100, 0)
-    drop(w['troll2'], g['plac'][w['troll']])
-    drop(w['troll2']+100, g['fixd'][w['troll']])
-    juggle(w['chasm'])
-    return {'fn':'newTurn', 'spk':spk}
-
-def transitive(spk=54):
-    # Analyse a transitive verb.
-    # Line 4090
-
-    verb = g['verb']
-    match verb:
-        case  1: return take(False, spk)   # TAKE
-        case  2: return discard(spk)       # DROP
-        case  3: return say()              # SAY
-        case  4: return locking(False)     # OPEN
-        case  5: return newTurn(verb)      # NOTH
-        case  6: return locking(False)     # LOCK
-        case  7: return lampOn(spk)        # ON
-        case  8: return lampOff(spk)       # OFF
-        case  9: return wave(spk)          # WAVE
-        case 10: return newTurn(verb, spk) # CALM
-        case 11: return newTurn(verb, spk) # WALK
-        case 12: return attack(spk)        # KILL
-        case 13: return pour(spk)          # POUR
-        case 14: return eat(spk, False)    # EAT
-        case 15: return drink(spk)         # DRNK
-        case 16: return rub()              # RUB
-        case 17: return throw(spk)         # TOSS
-        case 18: return newTurn(verb, spk) # QUIT
-        case 19: return find(spk, verb)    # FIND
-        case 20: return find(spk, verb)    # INVN
-        case 21: return feed(spk)          # FEED
-        case 22: return fill(spk)          # FILL
-        case 23: return blast(spk)         # BLST
-        case 24: return newTurn(verb, spk) # SCOR
-        case 25: return newTurn(verb, spk) # FOO
-        case 26: return newTurn(verb, spk) # BRF
-        case 27: return read(spk, False)   # READ
-        case 28: return breakObj(spk)      # BREK
-        case 28: return wakeDwarves(spk)   # WAKE
-        case 29: return newTurn(verb, spk) # SUSP
-        case 20: return newTurn(verb, spk) # HOUR
-        case _: bug(24) # Transitive action verb exceeds goto list.
+            rules.append((4, m%100, m//100 - 3, n))
+    return tuple(rules)
 
 def vocab(ida, init):
 
@@ -3428,261 +1568,4457 @@ def vocab(ida, init):
     considered.  (Thus "steps", which is a motion verb as well as an object,
     may be located as an object.)  And it also means the ktab value is taken
     mod 1000.
-    '''
 
-    global ktab, atab, tabsiz
+    Rather than searching atab, the word is looked up in the vocab index
+    built by section4, which lists all of a word's definitions in table
+    order, so the first one of the right type is the one a search of atab
+    would have found.
+    '''
 
     # hash=ida.xor.'PHROG' # No need to hide words in core image.
-    for i in range(1, g['tabsiz']+1):
-        if g['ktab'][i] == -1:
-            v = -1
-            if init < 0:
-                return v
-            bug(5) # Required vocabulary word not found.
-        if init >= 0 and g['ktab'][i]//1000 != init:
-            continue
-        if g['atab'][i] == ida : #if atab[i] == hash:
-            v = g['ktab'][i]
-            if init >= 0:
-                v = v%1000
-            return v
-    bug(21)
+    defs = cave['vocab'].get(ida, ())
+    if init < 0:
+        return defs[0] if defs else -1
+    for v in defs:
+        if v//1000 == init:
+            return v%1000
+    bug(5) # Required vocabulary word not found.
 
-def wizard():
+def shift(val,dist):
+    #  return val left-shifted (logically) dist bits (right-shift if dist<0).
+
+    if   dist  < 0: return val >> -dist
+    elif dist == 0: return val
+    else:           return val << dist
+
+class Random:
     '''
-    Ask if he's a wizard.  If he says yes, make him prove it.  Return true if
-    he really is a wizard.
+    A game's random numbers.  Each game has its own, so that one can be
+    seeded and played again without anything else in the process disturbing
+    it.  Subclasses say where random() gets its numbers: see BlockRandom and
+    StdRandom.
     '''
 
-    global wizcom
-
-    wizard = yesm(16,0,7) # if not 'WIZARD?' then 'VERY WELL.'
-    if not wizard:
-        return False
+    def randint(self, n):
+        # 0 <= randint(n) < n.
+        return int(n*self.random())
 
-    #  He says he is.  First step: does he know anything magical?
+    def pct(self, n):
+        # True n% of the time (n integer from 0 to 100).
+        return 100*self.random() < n
 
-    mspeak(17) # PROVE IT!  SAY THE MAGIC WORD!
-    word,_,_,_ = getin()
-    if word != wizcom['magic']: # Is it 'DWARF'?
-        #  Aha!  An impostor!
-        mspeak(20) # FOO, YOU ARE NOTHING BUT A CHARLATAN!
-        return False 
+    def copy(self):
+        # Another generator, carrying on from where this one's got to.
+        new = type(self)()
+        new.setstate(self.getstate())
+        return new
 
-    if yesm(18,0,0): # KNOW WHAT I THOUGHT IT WAS?
-        #  Aha!  An impostor!
-        mspeak(20) # FOO, YOU ARE NOTHING BUT A CHARLATAN!
-        return False 
-    # Let's skip the challenge-reply. :-)
-    print(' AH, EM, IT HAS SLIPPED MY MIND.')
+class BlockRandom(Random):
+    '''
+    Numbers from numpy's generator, drawn BLOCK at a time.  Asking numpy
+    for them one by one costs far more per number than making them.  Seed
+    is anything numpy.random.default_rng takes; None seeds from the system.
+    '''
 
-    #  By George, he really *is* a wizard!
-    mspeak(19) # OH DEAR, YOU REALLY *ARE* A WIZARD!
-    return True
+    BLOCK = 1024
 
-def wakeDwarves(spk):
-    # WAKE.  Only use is to disturb the dwarves.
+    def __init__(self, seed=None):
+        import numpy
+        self.gen = numpy.random.default_rng(seed)
+        self.block = []
 
-    global c, g
+    def random(self):
+        try:
+            return self.block.pop()
+        except IndexError:
+            self.block = self.gen.random(self.BLOCK).tolist()
+            return self.block.pop()
+
+    def getstate(self):
+        # Where the numbers have got to, for setstate to carry on from.
+        return self.gen.bit_generator.state, self.block[:]
+
+    def setstate(self, state):
+        self.gen.bit_generator.state, block = state
+        self.block = list(block)
+
+class StdRandom(Random):
+    # Numbers from python's own generator, which games use unless they're
+    # given another.  Its random() is one call into C for each number,
+    # without the cost per call that BlockRandom buffers numpy's numbers
+    # against, so a block would save nothing: it's quicker than BlockRandom
+    # as it is (see bench.py random).  And it needs no numpy, which takes
+    # longer to import than a game at the terminal does to start up.
+    def __init__(self, seed=None):
+        self.gen = random.Random(seed)
+        self.random = self.gen.random
+
+    def getstate(self):
+        return self.gen.getstate()
+
+    def setstate(self, state):
+        self.gen.setstate(state)
+
+class VirtualClock:
+    '''
+    A clock for games played by a program rather than a person, such as
+    replays: it's (d, t) as datime returns them, starting from start and
+    only moving on when told to.
+    '''
 
-    if g['obj'] != w['dwarf'] or not c['closed']:
-        return {'fn':'newTurn', 'spk':spk}
-    rspeak(199) # NEAREST DWARF WAKES UP GRUMPILY...
-    dwarvesDisturbed()
+    def __init__(self, start=(17997, 600)): # A Saturday, 10am.
+        self.d, self.t = start
 
-def wave(spk):
-    # WAVE.  No effect unless waving rod at fissure.
+    def __call__(self):
+        return self.d, self.t
 
-    if not toting(g['obj']) or (g['obj'] == w['rod'] and toting(w['rod2'])):
-        spk = 29 # YOU AREN'T CARRYING IT!
-    if (g['obj'] != w['rod'] or not at(w['fissur'])
-        or not toting(g['obj']) or c['closng']):
-        return {'fn':'newTurn', 'spk':spk}
-    g['prop'][w['fissur']] = 1 - g['prop'][w['fissur']]
-    pspeak(w['fissur'], 2-g['prop'][w['fissur']])
-    return {'fn':'newTurn', 'spk':0}
+    def advance(self, minutes):
+        self.d, self.t = divmod(1440*self.d + self.t + minutes, 1440)
 
-def what():
+class JournalClock:
+    '''
+    The clock of a journaled game: clock read once as the game begins and
+    once for each line he types, and that time given all through the line.
+    The journal keeps each reading with its line, so that a recovered game
+    is played its lines at the times they were first played.
+    '''
 
-    # Random intransitive verbs come here.  Clear obj just in case (see
-    # "attack").
+    def __init__(self, clock):
+        self.clock = clock
+        self.now = clock()
 
-    # Line 8000
-    # w = a5toa1(wd1,wd1x,'WHAT?')
-    #print('\n %s' % w)
-    print(' ' + g['wd1'].strip() + g['wd1x'].strip() + ' WHAT?')
-    g['obj'] = 0
-    return {'fn':'newTurn', 'spk':-1}
+    def __call__(self):
+        return self.now
 
-def mspeak(i, nl=True):
+    def tick(self):
+        self.now = self.clock()
 
+class CounterRandom(Random):
     '''
-    Print the i-th "magic" message (Section 12 of database).
+    Numbers from python's generator, BLOCK at a time, block n drawn from it
+    seeded with seed and n.  Where one's got to is then just seed, n and
+    what's left of the block, so copying it (see Game.clone) costs next to
+    nothing.  Copying a StdRandom copies all 625 words of the Mersenne
+    Twister's state.  Seed is an int; None picks one at random.
     '''
-    global g
-    if i != 0:
-        speak(g['mtext'][i], nl=nl)
 
-def pspeak(msg, skip):
+    BLOCK = 64
+
+    def __init__(self, seed=None):
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.n = 0 # The next block.
+        self.block = []
+        self.gen = random.Random() # Shared by copies, reseeded every block.
 
+    def random(self):
+        try:
+            return self.block.pop()
+        except IndexError:
+            self.gen.seed((self.seed << 32) + self.n)
+            self.n += 1
+            r = self.gen.random
+            self.block = [r() for _ in range(self.BLOCK)]
+            return self.block.pop()
+
+    def getstate(self):
+        return self.seed, self.n, self.block[:]
+
+    def setstate(self, state):
+        self.seed, self.n, block = state
+        self.block = list(block)
+
+    def copy(self):
+        new = CounterRandom.__new__(CounterRandom)
+        new.seed, new.n, new.gen = self.seed, self.n, self.gen
+        new.block = self.block[:]
+        return new
+
+class Output:
     '''
-    Find the skip+1st message from msg and print it.  Msg should be the index
-    of the inventory message for object.  (inven+n+1 message is prop=n
-    message).
+    Where a game's output goes.  Game writes everything it says to its
+    output, a piece at a time, and flushes it at the end of every turn (or
+    whenever step() returns).  This one keeps the pieces and flush() hands
+    back the turn as one string, for a program playing the game to do what
+    it likes with.  Any object with write and flush will do instead: see
+    StreamOutput and NullOutput.
     '''
 
-    global g
-    speak(g['ptext'][msg], 1+skip)
+    def __init__(self):
+        self.parts = []
+        self.write = self.parts.append # No call of our own for every piece.
+
+    def flush(self):
+        out = ''.join(self.parts)
+        self.parts.clear()
+        return out
 
-def rspeak(i):
+class StreamOutput(Output):
     '''
-    Print the i-th "random" message (Section 6 of database).
+    Output for a stream such as sys.stdout: a turn goes out in a single
+    write, rather than a print() per message.
     '''
-    global g
-    if i != 0:
-        speak(g['rtext'][i])
 
-def shift(val,dist):
-    #  return val left-shifted (logically) dist bits (right-shift if dist<0).
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
 
-    if   dist  < 0: return val >> -dist
-    elif dist == 0: return val
-    else:           return val << dist
+    def flush(self):
+        self.stream.write(super().flush())
+        self.stream.flush()
+        return ''
+
+class NullOutput:
+    # Output for games nobody's watching, such as benchmarks and replays.
+    def write(self, s):
+        pass
 
-def speak(n, propMsg=-1, nl=True):
+    def flush(self):
+        return ''
+
+class SaveStore:
     '''
-    Print the message which starts at lines(n).  Precede it with a blank line
-    unless blklin is false.
+    Saved games, kept by player and slot (the name he saved it as) in an
+    SQLite database at path rather than as files in the current directory.
+    Finding, loading, replacing or deleting one is a lookup in the table's
+    primary key, and listing a player's games reads only his, so none of it
+    slows down as saves pile up.  The database is opened on first use, as
+    most games never save at all.
+
+    A player can claim his name with a password (see claim), so that a
+    server can keep everyone else from his games.  Names are trust on first
+    use: the first password given for a name is the one it keeps, and
+    whoever gives it first gets any games saved under it before then.
+
+    With background set, for a server, saves and deletes aren't committed
+    at once but kept in memory, where slots and load find them, until
+    wait() commits them in a thread, on a connection of its own, so that
+    nobody else's game stops for the disk meanwhile.  Everyone saving while
+    one commit is going shares the next, as with a Journal.  Claiming a
+    name and saving in the background both need path to be a file, not
+    ':memory:'.
     '''
 
-    global g
-
-    if n == 0:
-        return
-    msg = g['lines'][n]
-    if propMsg != -1:
-        msg = msg[propMsg] # Section 5 only.
-    if msg[:3] == '>$<': # Don't print anything.
-        return
-    if g['blklin']:
-        print('')
-    msg = msg.replace('\n', '\n ')
-    if nl:
-        print(' %s' % msg)
-    else:
-        print(' %s' % msg, end='')
-
-def start():
-    '''
-    Check to see if this is "prime time".  If so, only wizards may play,
-    though others may be allowed a short game for demonstration purposes.  If
-    setup<0, we're continuing from a saved game, so check for suitable
-    latency.  Return true if this is a demo game (value is ignored for
-    restarts).
-    '''
-
-    global wizcom
-
-    #  First find out whether it is prime time (save in ptime) and, if
-    #  restarting, whether it's too soon (save in soon).  Prime-time specs
-    #  are in wkday, wkend, and holid; see maint routine for details.  Latncy
-    #  is required delay before restarting.  Wizards may cut this to a
-    #  third.
-
-    d,t = datime()
-    primtm = wizcom['wkday']
-    if d%7 <= 1: # 0,1 are Sat,Sun.
-        primtm = wizcom['wkend']
-    if wizcom['hbegin'] <= d <= wizcom['hend']: # During a holiday.
-        primtm = wizcom['holid']
-    ptime = (primtm & (1<<(t//60))) != 0
-    soon = False 
-    if g['setup'] < 0:
-        delay = (d-c['saved'])*1440 + (t-c['savet'])
-        if delay < wizcom['latncy']:
-            print(' THIS ADVENTURE WAS SUSPENDED A MERE %3d MINUTES AGO.'
-                % delay)
-            soon = True 
-            if delay < wizcom['latncy']//3:
-                mspeak(2) # EVEN WIZARDS HAVE TO WAIT LONGER THAN THAT!
-                sys.exit(0)
-    # If neither too soon nor prime time, no problem.  Else specify what's
-    # wrong.
-    start = False 
-    if not soon:
-        if not ptime:
-            c['saved'] = -1
-            return start
-        # Come here if not restarting too soon (maybe not restarting at all),
-        # but it's prime time.  Give our hours and see if he's a wizard.  If
-        # not, then can't restart, but if just beginning then we can offer a
-        # short game.
-        mspeak(3) # COLOSSAL CAVE IS CLOSED.
-        hours()
-        mspeak(4) # ONLY WIZARDS NOW
-        if wizard():
-            c['saved'] = -1
-            return start
-        if g['setup'] < 0:
-            mspeak(9) # RESUME YOUR ADVENTURE LATER
-            sys.exit(0)
-        start = yesm(5,7,7) # WE ALLOW VISITORS TO MAKE SHORT EXPLORATIONS
-        if start:
-            c['saved'] = -1
-            return start
-        sys.exit(0)
-    # Come here if restarting too soon.  If he's a wizard, let him go
-    # (and note that it then doesn't matter whether it's prime time).
-    # else, tough beans.
-    mspeak(8) # ONLY A WIZARD THIS SOON
-    if wizard():
-        c['saved'] = -1
-        return start
-    mspeak(9) # RESUME YOUR ADVENTURE LATER
-    sys.exit(0)
+    ROUNDS = 100000 # Of pbkdf2, hashing a password.
+
+    def __init__(self, path=SAVESTORE, background=False):
+        self.path = path
+        self.db = None
+        self.background = background
+        self.pending = {} # (player, slot): data, or None if deleted.
+        self.writing = {} # The pending being committed now.
+        self.queued = self.committed = 0 # Counts of saves and deletes.
+        self.flushing = None # The commit wait() is waiting for.
+        self.wdb = None # Where commits are made, in the background.
+
+    def open(self, **kw):
+        # A new connection to the database, set up.
+        import sqlite3
+        db = sqlite3.connect(self.path, timeout=30, **kw)
+        # Write-ahead logging: readers don't wait for a save, and a save is
+        # one append to the log rather than a rewrite and two fsyncs.
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        with db:
+            db.execute('CREATE TABLE IF NOT EXISTS saves (player TEXT, '
+                'slot TEXT, data BLOB, PRIMARY KEY (player, slot)) '
+                'WITHOUT ROWID')
+            db.execute('CREATE TABLE IF NOT EXISTS players (player TEXT '
+                'PRIMARY KEY, salt BLOB, rounds INTEGER, hash BLOB)')
+        return db
+
+    def connect(self):
+        if self.db is None:
+            self.db = self.open()
+        return self.db
+
+    def slots(self, player):
+        # His saved games' slots, in order.
+        slots = {slot for slot, in self.connect().execute('SELECT slot FROM '
+            'saves WHERE player = ?', (player,))}
+        for unwritten in (self.writing, self.pending): # Oldest first.
+            for (p, slot), data in unwritten.items():
+                if p != player:
+                    continue
+                if data is None:
+                    slots.discard(slot)
+                else:
+                    slots.add(slot)
+        return sorted(slots)
+
+    def load(self, player, slot):
+        # The game he saved in slot, None if there isn't one.
+        for unwritten in (self.pending, self.writing): # Newest first.
+            if (player, slot) in unwritten:
+                return unwritten[player, slot]
+        row = self.connect().execute('SELECT data FROM saves WHERE player = ? '
+            'AND slot = ?', (player, slot)).fetchone()
+        return None if row is None else row[0]
+
+    def save(self, player, slot, data):
+        # Keep data in his slot, replacing whatever was there.
+        self.change(player, slot, data)
+
+    def delete(self, player, slot):
+        self.change(player, slot, None)
+
+    def change(self, player, slot, data):
+        if self.background:
+            self.pending[player, slot] = data
+            self.queued += 1
+        else:
+            self.write({(player, slot): data})
+
+    def write(self, batch):
+        # Commit batch, of (player, slot): data, or None to delete it.
+        if self.background:
+            if self.wdb is None:
+                self.wdb = self.open(check_same_thread=False)
+            db = self.wdb
+        else:
+            db = self.connect()
+        with db:
+            for (player, slot), data in batch.items():
+                if data is None:
+                    db.execute('DELETE FROM saves WHERE player = ? AND '
+                        'slot = ?', (player, slot))
+                else:
+                    db.execute('INSERT OR REPLACE INTO saves VALUES (?, ?, ?)',
+                        (player, slot, data))
+
+    async def wait(self):
+        # Commit, in the background: return once everything saved so far
+        # is.  Like Journal.wait.
+        import asyncio
+        want = self.queued
+        while self.committed < want:
+            if self.flushing is None:
+                self.flushing = asyncio.ensure_future(self.flushBatch())
+            await asyncio.shield(self.flushing)
+
+    async def flushBatch(self):
+        import asyncio
+        try:
+            self.writing, self.pending = self.pending, {}
+            upto = self.queued
+            await asyncio.to_thread(self.write, self.writing)
+            self.committed = upto
+        finally:
+            self.writing = {}
+            self.flushing = None
+
+    def claim(self, player, password):
+        '''
+        Whether password is player's: the one first given for his name, or
+        this one if it's the first.  Hashing it is slow on purpose, to make
+        guessing slow, so a server calls this in a thread.  It has a
+        connection of its own for that.
+        '''
+
+        import hmac
+        db = self.open()
+        try:
+            find = 'SELECT salt, rounds, hash FROM players WHERE player = ?'
+            row = db.execute(find, (player,)).fetchone()
+            if row is None:
+                salt = os.urandom(16)
+                with db:
+                    new = db.execute('INSERT OR IGNORE INTO players VALUES '
+                        '(?, ?, ?, ?)', (player, salt, self.ROUNDS,
+                        self.hash(password, salt, self.ROUNDS))).rowcount
+                if new:
+                    return True
+                row = db.execute(find, (player,)).fetchone() # Beaten to it.
+            salt, rounds, h = row
+            return hmac.compare_digest(self.hash(password, salt, rounds), h)
+        finally:
+            db.close()
+
+    @staticmethod
+    def hash(password, salt, rounds):
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, rounds)
+
+    def close(self):
+        for db in (self.db, self.wdb):
+            if db is not None:
+                db.close()
+        self.db = self.wdb = None
+
+class Journal:
+    '''
+    A crash-safe record of games being played, so that any that were going
+    when the process died can be carried on from where they were.  It's one
+    append-only file for all the games in the process.  When a game begins,
+    its player, its random number generator's state and the time go in.
+    After that, every line it's given goes in with the time it was given
+    (see JournalClock), and so does the end of the game.  Every SNAPEVERY
+    commands or so, a snapshot of the game goes in too.  That's its saved
+    state (see statePack), its generator state and what it last said, taken
+    while it's waiting for a command.  recover() rebuilds each unfinished
+    game from its newest snapshot, or from its beginning, and plays it the
+    lines that came after, at the times they came, so it ends up just where
+    it was.
+
+    Games with a History (UNDO) are never snapshotted, as a snapshot
+    couldn't bring back what he might yet undo.  The journal keeps every
+    line such a game has been given, for as long as it goes on, and
+    recovering it replays them all from its beginning.  One that's over
+    stays over here even if he undoes the end of it.
+
+    Records are only kept in memory until flush(), which writes all of
+    them with a single fsync, or until wait() in a server.  wait() returns
+    once everything recorded so far is on disk.  While one fsync is going,
+    whatever the other games record piles up for the next, so many games
+    share each fsync.  Each record is its length, a crc32 and the
+    marshalled record.  A torn record at the end, from dying mid-write,
+    is dropped when the journal is opened again.  Opening it also rewrites
+    it with only what the unfinished games still need.
+    '''
 
-def westOrW():
-    global c, g
+    SNAPEVERY = 100
+
+    def __init__(self, path):
+        self.path = path
+        self.live = self.read() # Session: its records since its snapshot.
+        self.sid = max(self.live, default=0) # The last session number used.
+        self.since = {} # Session: commands since its snapshot.
+        self.pending = [] # Records not yet written.
+        self.recorded = self.synced = 0 # Counts of records.
+        self.syncs = 0 # How many fsyncs it's taken.
+        self.flushing = None # The write wait() is waiting for.
+        tmp = '%s.%d' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            for records in self.live.values():
+                f.write(b''.join([self.frame(r) for r in records]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.f = open(path, 'ab')
+
+    def read(self):
+        # The records of the games that haven't ended, each from its last
+        # snapshot or its beginning.
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        live = {}
+        pos = 0
+        while pos+8 <= len(data):
+            n = int.from_bytes(data[pos:pos+4], 'big')
+            body = data[pos+8:pos+8+n]
+            crc = int.from_bytes(data[pos+4:pos+8], 'big')
+            if len(body) != n or zlib.crc32(body) != crc:
+                break # Torn by a crash.  Nothing after it was synced.
+            r = marshal.loads(body)
+            pos += 8+n
+            kind, sid = r[0], r[1]
+            if kind in ('begin', 'snap'):
+                live[sid] = [r]
+            elif kind == 'cmd' and sid in live:
+                live[sid].append(r)
+            elif kind == 'end':
+                live.pop(sid, None)
+        return live
+
+    @staticmethod
+    def frame(r):
+        body = marshal.dumps(r)
+        return (len(body).to_bytes(4, 'big')
+            + zlib.crc32(body).to_bytes(4, 'big') + body)
+
+    def record(self, *r):
+        self.pending.append(self.frame(r))
+        self.recorded += 1
+
+    def begin(self, game):
+        # A new game, before it's said anything.  Returns its session.
+        self.sid += 1
+        self.since[self.sid] = 0
+        game.clock = JournalClock(game.clock)
+        self.record('begin', self.sid, game.player, type(game.rng).__name__,
+            game.rng.getstate(),
+            None if game.history is None else game.history.cap,
+            game.clock.now)
+        return self.sid
+
+    def played(self, game, line, said):
+        # Game has played line, saying said.
+        sid = game.sid
+        self.record('cmd', sid, line, game.clock.now)
+        if sid not in self.since:
+            return # Over already, though UNDO may have brought it back.
+        if game.result is not None:
+            self.ended(game)
+            return
+        self.since[sid] += 1
+        if self.since[sid] >= self.SNAPEVERY and game.history is None:
+            snap = game.snapshot()
+            if snap is not None: # Else try again next turn.
+                self.record('snap', sid, game.player,
+                    type(game.rng).__name__, game.rng.getstate(), said, *snap)
+                self.since[sid] = 0
+
+    def ended(self, game):
+        self.record('end', game.sid)
+        self.since.pop(game.sid, None)
+
+    def drop(self, sid):
+        # Give up on unfinished session sid rather than recover it, so that
+        # it's gone from the journal when it's next opened.
+        del self.live[sid]
+        self.since.pop(sid, None)
+        self.record('end', sid)
+
+    def flush(self):
+        # Write everything recorded and wait for it to be on disk.
+        batch, self.pending = self.pending, []
+        upto = self.recorded
+        self.write(batch)
+        self.synced = upto
+
+    def write(self, batch):
+        if batch:
+            self.f.write(b''.join(batch))
+            self.f.flush()
+            os.fsync(self.f.fileno())
+            self.syncs += 1
+
+    async def wait(self):
+        # Flush, for a server: the write and fsync are done in a thread, and
+        # everyone waiting meanwhile shares the next one.
+        import asyncio
+        want = self.recorded
+        while self.synced < want:
+            if self.flushing is None:
+                self.flushing = asyncio.ensure_future(self.flushBatch())
+            await asyncio.shield(self.flushing)
+
+    async def flushBatch(self):
+        import asyncio
+        try:
+            batch, self.pending = self.pending, []
+            upto = self.recorded
+            await asyncio.to_thread(self.write, batch)
+            self.synced = upto
+        finally:
+            self.flushing = None
+
+    def recover(self, saves=None):
+        '''
+        Rebuild the games that hadn't ended when the journal was last open.
+        Returns a dictionary of session: (game, what it last said).  Each
+        game is its player's again, with his saved games in saves, and is
+        journaled here again.  Its output is an Output, which the caller
+        will likely want to replace (see Game.redirect).
+        '''
+
+        rngs = {'StdRandom': StdRandom, 'BlockRandom': BlockRandom,
+            'CounterRandom': CounterRandom}
+        games = {}
+        for sid, records in list(self.live.items()):
+            kind, _, player, rng, state, *rest = records[0]
+            clock = VirtualClock() # Set to each record's time in turn.
+            game = Game(rng=rngs[rng](), saves=saves, player=player,
+                clock=clock)
+            game.rng.setstate(state)
+            if kind == 'begin':
+                cap, (clock.d, clock.t) = rest
+                if cap is not None:
+                    game.history = History(cap)
+                said = game.begin()
+            else:
+                said, verb, data = rest
+                if not game.restore(verb, data):
+                    self.drop(sid) # Can't be had back, so never will be.
+                    continue
+            for _, _, line, (clock.d, clock.t) in records[1:]:
+                said = game.step(line)
+            game.journal, game.sid = self, sid
+            game.clock = JournalClock(datime)
+            self.since[sid] = len(records) - 1
+            games[sid] = (game, said)
+        return games
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+class History:
+    '''
+    Undo and redo for a game, if it has one: UNDO takes back the last line
+    he typed (a command or the answer to a question) and REDO puts it back.
+    An entry only keeps the parts of the game's state that its line
+    changed, as they were before and after: the slots of GameState that
+    changed and, for its arrays (place, fixed, prop, atloc, link and the
+    rest), just the items that did.  The exception is HISTOFTEN, the few
+    fields that nearly every line changes, which are kept whole for every
+    line rather than compared one by one.  What the game's state was after
+    the last line is kept here to compare with, and kept up to date with
+    the changes rather than copied anew, so a game with a history costs one
+    copy of its state plus the changes.  Once the entries come to more
+    than cap bytes (roughly), the oldest go.  The random numbers aren't
+    taken back, so the same thing tried again needn't turn out the same.
+
+    A game that's over can be undone through step(), but main() and the
+    Server stop once it's over, so their players can't take back the line
+    that ended it.
+    '''
 
-    if g['wd1'] == 'WEST':
-        c['iwest'] += 1
-        if c['iwest'] == 10:
-            rspeak(17) # IF YOU PREFER, SIMPLY TYPE W RATHER THAN WEST.
+    ENTRY = 300 # Rough bytes for an entry, and for each change in it.
+    CHANGE = 64
+
+    def __init__(self, cap=1<<16):
+        self.cap = cap
+        self.undos = deque()
+        self.redos = []
+        self.size = 0
+        self.often = None # His game's HISTOFTEN after the last line.
+        self.rare = None # Its HISTRARE.
+        self.arrays = None # Copies of its HISTARRAYS.
+        self.joined = None # And their bytes, one after another.
+
+    def play(self, game, line):
+        # Play line in game, as Game.go, noting what it changed.
+        if game.result is not None:
+            return game.flush() # Over: it changes nothing.
+        if self.often is None:
+            self.remember(game.g)
+            self.arrays = list(histArrays(game.g.copy()))
+        asked = game.asked
+        out = game.go(game.reply, line)
+        g = game.g
+        # Whether anything but HISTOFTEN changed is one comparison of tuples
+        # and one of bytes, in C, and most often nothing did.  Only then are
+        # the fields or arrays that changed found, by map and compress.
+        changes = []
+        n = 0
+        often, rare = histOften(g), histRare(g)
+        if rare != self.rare:
+            olds = self.rare
+            changes = [(HISTRARE[i], olds[i], rare[i])
+                for i in compress(range(len(rare)), map(ne, olds, rare))]
+            n = len(changes)
+            self.rare = rare
+        news = histArrays(g)
+        joined = b''.join(news)
+        if joined != self.joined:
+            self.joined = joined
+            for i in compress(range(len(news)), map(ne, self.arrays, news)):
+                old = self.arrays[i]
+                items = self.items(old, news[i])
+                changes.append((HISTARRAYS[i], items))
+                n += len(items)
+                for j, _, item in items: # Cheaper than copying it.
+                    old[j] = item
+        entry = (line, asked, game.asked, game.result, self.often, often,
+            changes, self.ENTRY + self.CHANGE*n)
+        self.often = often
+        self.undos.append(entry)
+        self.size += entry[-1]
+        while self.size > self.cap and len(self.undos) > 1:
+            self.size -= self.undos.popleft()[-1]
+        self.redos.clear()
+        return out
+
+    def remember(self, g):
+        # What GameState g is now, to compare with after the next line.
+        # The arrays are kept up to date by play and apply.
+        self.often, self.rare = histOften(g), histRare(g)
+        self.joined = b''.join(histArrays(g))
+
+    @staticmethod
+    def items(old, new):
+        # The items that differ between arrays old and new, as (index, old
+        # item, new item).  The bits that differ are found all at once, by
+        # xoring the arrays' bytes as ints, and then the highest item with
+        # any is taken off until there are none.
+        x = int.from_bytes(old, 'little') ^ int.from_bytes(new, 'little')
+        bits = 8*new.itemsize
+        items = []
+        while x:
+            i = (x.bit_length() - 1)//bits
+            items.append((i, old[i], new[i]))
+            x &= (1 << i*bits) - 1
+        return items
+
+    def undo(self, game):
+        if not self.undos:
+            game.print(' NOTHING TO UNDO.')
+            return game.flush()
+        entry = self.undos.pop()
+        self.size -= entry[-1]
+        self.redos.append(entry)
+        line, asked, _, _, often, _, changes, _ = entry
+        self.apply(game, often, changes, 1)
+        game.asked, game.result = asked, None
+        game.print(' UNDONE: %s' % line.strip().upper())
+        return game.flush()
+
+    def redo(self, game):
+        if not self.redos:
+            game.print(' NOTHING TO REDO.')
+            return game.flush()
+        entry = self.redos.pop()
+        self.size += entry[-1]
+        self.undos.append(entry)
+        line, _, asked, result, _, often, changes, _ = entry
+        self.apply(game, often, changes, 2)
+        game.asked, game.result = asked, result
+        game.print(' REDONE: %s' % line.strip().upper())
+        return game.flush()
+
+    def apply(self, game, often, changes, which):
+        # Set HISTOFTEN to often, and what changes changed to its old (which
+        # 1) or new (2) value, in his game and in what's kept of it here.
+        g = game.g
+        for k, v in zip(HISTOFTEN, often):
+            setattr(g, k, v)
+        for change in changes:
+            if len(change) == 3:
+                setattr(g, change[0], change[which])
+                continue
+            k, items = change
+            a, old = getattr(g, k), self.arrays[HISTARRAYS.index(k)]
+            for item in items:
+                a[item[0]] = old[item[0]] = item[which]
+            if k == 'place': # Keep toted up to date.
+                for i, *item in items:
+                    if item[which-1] == -1:
+                        g.toted.add(i)
+                    else:
+                        g.toted.discard(i)
+        self.remember(g)
 
-def yes(x,y,z):
-    ''' Call yesx (below) with messages from Section 6.
+class SessionState(GameState):
+    '''
+    The state of a game kept in a Sessions table: its arrays are views of
+    its rows of the table's arrays, and the rest of it is its own, as in a
+    GameState.  The game plays the same either way.  Loading a game
+    writes into the arrays rather than replacing them (see stateUnpack) so
+    it stays on the table, and a copy is an ordinary GameState, off it.
     '''
-    return yesx(x,y,z,rspeak)
 
-def yesm(x,y,z):
-    ''' Call yesx (below) with messages from Section 12.
+    __slots__ = ('table', 'row')
+
+    def copy(self):
+        new = GameState.copy(self)
+        for k,t,_ in SAVEARRAYS:
+            a = array(t)
+            a.frombytes(getattr(self, k).cast('B'))
+            setattr(new, k, a)
+        return new
+
+class Sessions:
+    '''
+    A view of many games' arrays at once, for looking across them: each
+    GameState array is a table with a row per session (session by object
+    for place, prop and fixed, session by dwarf for dloc, odloc and dseen,
+    and so on), and each game's arrays are views of its rows (see
+    SessionState).  How many lamps are lit, or where every dwarf is, is
+    then one numpy operation on a table rather than a loop over thousands
+    of games, as in the server's reports.
+
+    It's only a view.  The games play their own turns through it just as
+    they would off it, and the counters a turn keeps, the lamp's limit,
+    clock1 and clock2 and the hint counters in hintlc, stay per game and
+    are counted in that game's turns: games aren't played in step with
+    each other, so there's no turn of them all for one operation to count
+    for.  A game plays a little slower on the table than off it, as its
+    arrays are memoryviews.
+
+    Sessions are added with add() and taken off with remove().  There's
+    room for n to start with; the tables double when they're full.
     '''
-    return yesx(x,y,z,mspeak)
 
-def yesx(x,y,z,spk):
+    def __init__(self, n=64):
+        import numpy
+        self.tables = {k: numpy.zeros((n, size), t)
+            for k,t,size in SAVEARRAYS}
+        self.live = numpy.zeros(n, bool) # Rows in use.
+        self.states = n*[None] # The SessionState of each row in use.
+
+    def __len__(self):
+        return int(self.live.sum())
+
+    def add(self, game):
+        # Move game's state onto the table.  Returns its row.
+        import numpy
+        free = numpy.flatnonzero(~self.live)
+        if len(free) == 0:
+            self.grow()
+            free = numpy.flatnonzero(~self.live)
+        row = int(free[0])
+        g = game.g
+        new = SessionState.__new__(SessionState)
+        new.table, new.row = self, row
+        for k in GameState.__slots__:
+            if k not in self.tables:
+                setattr(new, k, getattr(g, k))
+        for k,t in self.tables.items():
+            t[row] = getattr(g, k)
+        self.attach(new)
+        self.live[row] = True
+        self.states[row] = new
+        game.g = new
+        return row
+
+    def remove(self, game):
+        # Move game's state off the table, freeing its row.
+        g = game.g
+        game.g = g.copy()
+        self.live[g.row] = False
+        self.states[g.row] = None
+
+    def attach(self, state):
+        # Point state's arrays at its rows.
+        for k,t in self.tables.items():
+            setattr(state, k, memoryview(t[state.row]))
+
+    def grow(self):
+        # Double the tables, and move every session's views to the new ones.
+        import numpy
+        n = len(self.live)
+        for k,t in self.tables.items():
+            self.tables[k] = numpy.concatenate([t, numpy.zeros_like(t)])
+        self.live = numpy.concatenate([self.live, numpy.zeros(n, bool)])
+        self.states += n*[None]
+        for state in self.states:
+            if state is not None:
+                self.attach(state)
+
+class Game:
     '''
-    Print message x, wait for yes/no answer.  If yes, print y and leave yea
-    true; if no, print z and leave yea false.  Spk is either rspeak or mspeak.
+    One game of adventure, there being no reason any more why a process
+    can't play any number of them, all sharing the one database (cave and
+    w).  The game's state is in g and everything that plays it is a method.
+    Nothing waits on input() or ends with sys.exit(): begin() starts the
+    game and step() plays a line he typed, each returning what the game has
+    to say back, up to the next question (whose prompt is prompt).  What it
+    says goes to out, an Output unless it's given another sink.  His saved
+    games are player's in saves, a SaveStore unless it's given another.  If
+    there's a journal, the game is recorded in it as it's played, and if
+    there's a history, he can undo what he's done.  The time
+    of day comes from clock, datime unless it's given a VirtualClock (and
+    through a JournalClock if it's journaled).  Where
+    the Fortran STOPs, GameOver is raised instead, which step() keeps as
+    result.
+
+    For the game to be able to stop and wait for him anywhere, a routine
+    which asks him something returns an "ask" to the top level, run(), just
+    like its other continuations saying what to do next.  The ask says what
+    to do with the reply when step() has it: the routine asking is called
+    back with what he typed as its last argument, reply.  (See getin,
+    inputCheck and yesx.)
     '''
 
-    while True:
-        if x != 0:
-            spk(x)
-        reply,_,_,_ = getin()
-        if reply in ['YES', 'Y', 'NO', 'N']:
+    def __init__(self, out=None, rng=None, saves=None, player='',
+        journal=None, clock=None, history=None):
+        dbRead() # Only the first game in a process reads anything.
+        self.g = GameState() # The many, many globals of adventure.
+        self.out = Output() if out is None else out # Where it all goes.
+        self.write = self.out.write
+        self.rng = StdRandom() if rng is None else rng
+        self.saves = SaveStore() if saves is None else saves
+        self.player = player # Whose saved games are his.
+        self.journal = journal
+        self.sid = None # His session in the journal.
+        self.clock = datime if clock is None else clock # (day, minute) now.
+        self.history = history # A History, for UNDO and REDO.
+        self.asked = None # The ask waiting for his reply.
+        self.result = None # The GameOver that ended the game.
+        self.postDbInit()
+
+    def begin(self):
+        # Start the game up, returning all it says up to the first question.
+        if self.journal is not None:
+            self.sid = self.journal.begin(self)
+        return self.go(self.adventures)
+
+    def step(self, command):
+        '''
+        Play a line he typed, the answer to whatever the game last asked him
+        (usually just for a command).  Return what the game says to that, up
+        to and including its next question.  Once result is set the game's
+        over and there's nothing more to say.
+        '''
+        if self.journal is not None:
+            self.clock.tick() # When he typed it, as journaled.
+        if self.history is not None:
+            word = command.strip().upper()
+            if word == 'UNDO':
+                out = self.history.undo(self)
+            elif word == 'REDO':
+                out = self.history.redo(self)
+            else:
+                out = self.history.play(self, command)
+        else:
+            out = self.go(self.reply, command)
+        if self.journal is not None:
+            self.journal.played(self, command, out)
+        return out
+
+    def quit(self):
+        # He's gone: end of input or hung up.  QUIT without the chance to
+        # change his mind.
+        if self.result is not None:
+            return self.flush()
+        self.g.gaveup = True
+        out = self.go(self.quitGame, False)
+        if self.journal is not None:
+            self.journal.ended(self)
+        return out
+
+    def go(self, fn, *args):
+        # Carry on from fn(*args) until the game needs to hear from him or is
+        # over, and return what it said on the way.
+        if self.result is None:
+            try:
+                self.run(fn(*args))
+            except GameOver as e:
+                self.asked = None
+                self.result = e
+        return self.flush()
+
+    def flush(self):
+        # Collect what the game's said so far, if out keeps it.
+        return self.out.flush()
+
+    def digest(self):
+        # A fingerprint of the game: its state as saved and the question it's
+        # waiting for an answer to.  Two games with the same digest play the
+        # same from here on, given the same random numbers, whichever
+        # process or run they're in.
+        h = hashlib.sha256(self.statePack())
+        h.update(repr(named(self.asked)).encode())
+        return h.hexdigest()
+
+    def clone(self):
+        '''
+        Another game just where this one is, to be played on without
+        changing this one (see step()).  It shares the database and the
+        save store with this one.  It has its own copies of the state, the
+        random numbers, the wizard's settings and a VirtualClock, and it
+        says things to an Output of its own.  It isn't journaled and has no
+        history.
+        '''
+
+        new = Game.__new__(Game)
+        new.__dict__.update(self.__dict__)
+        new.g = self.g.copy()
+        new.rng = self.rng.copy()
+        new.redirect(Output())
+        new.journal = new.sid = new.history = None
+        new.wizcom = dict(self.wizcom)
+        if isinstance(self.clock, VirtualClock):
+            new.clock = VirtualClock(self.clock())
+        elif isinstance(self.clock, JournalClock):
+            new.clock = self.clock.clock # Not journaled.
+        return new
+
+    def redirect(self, out):
+        # Say everything from now on to out instead.
+        self.out = out
+        self.write = out.write
+
+    def snapshot(self):
+        # The game as the journal keeps it, the verb it's waiting for a
+        # command after and its state, or None unless it's waiting for a
+        # command (which restore can pick up from).
+        if self.asked is None:
+            return None
+        then = self.asked[1]
+        if then[0] is not Game.getin or then[1][0] is not Game.command:
+            return None
+        return then[1][1], self.statePack()
+
+    def restore(self, verb, data):
+        # Carry on from a snapshot, waiting for a command.  False if data's
+        # not a game we can read.
+        if not self.stateUnpack(data):
+            return False
+        self.indexBuild()
+        self.run(self.getin((Game.command, verb)))
+        return True
+
+    @property
+    def prompt(self):
+        # What the game would have prompted him with when it used input().
+        return self.asked[0] if self.asked else ''
+
+    def print(self, *args, sep=' ', end='\n'):
+        # All the game says, bar speak()'s messages, comes here instead of
+        # going to sys.stdout.
+        self.write(sep.join([str(a) for a in args]) + end)
+
+    def bug(self, num):
+        # Bug (above) for those found while playing, ending just this game.
+        self.print(' FATAL ERROR, SEE SOURCE CODE FOR INTERPRETATION.')
+        self.print(' PROBABLE CAUSE: ERRONEOUS INFO IN DATABASE.')
+        self.print(' ERROR CODE =%2d\n' % num)
+        raise GameOver('bug')
+
+    def run(self, d):
+        '''
+        The top of the game loop, where all the continuations saying what to
+        do next end up.  A continuation is a tuple of the routine to call
+        (a function of Game, such as Game.newTurn) and its arguments, self
+        aside.  GOTO2 is "goto 2", the usual next turn, and NEWTURN[spk] is
+        newTurn after message spk: those are made once, not every turn.  An
+        ask (Game.ask) stops play until step() has his reply.
+        '''
+
+        while d is not None:
+            d = d[0](self, *d[1:])
+
+    def ask(self, prompt, then):
+        # Stop and wait for his reply, to be passed on to then.  See reply.
+        self.asked = (prompt, then)
+
+    def reply(self, line):
+        # Hand his reply to the routine that asked for it, as its last
+        # argument.
+        _, then = self.asked
+        self.asked = None
+        return then + (line,)
+
+    def toting(self, obj):
+        return self.g.place[obj] == -1
+
+    def here(self, obj):
+        return self.g.place[obj] in [-1, self.g.loc]
+
+    def at(self, obj):
+        return self.g.loc in [self.g.place[obj], self.g.fixed[obj]]
+
+    def dark(self):
+        g = self.g
+        if cave['cond'][g.loc] & 1: # Light bit set, not dark.
+            return False
+        if not self.here(w['lamp']): # No lamp here, must be dark.
+            return True
+        return g.prop[w['lamp']] == 0 # Light/dark when lamp on/off.
+
+    def liq(self):
+        '''What's in the bottle.'''
+
+        g = self.g
+        c = g.prop[w['bottle']]
+        match max(c, -1-c):
+            case 0: return w['water']
+            case 1: return 0
+            case 2: return w['oil']
+
+    def adventures(self):
+        # Start-up.  Is he allowed to play now?
+        return self.start((Game.welcome,))
+
+    def welcome(self, reply):
+        self.g.demo = reply
+        self.motd(False)
+        self.rng.random()
+        # WELCOME TO ADVENTURE!!  WOULD YOU LIKE INSTRUCTIONS?
+        return self.yes(65,1,0, (Game.instructions,))
+
+    def instructions(self, reply):
+        g = self.g
+
+        g.hinted[3] = reply
+        g.newloc = 1
+        g.loc = 1 # END OF A ROAD BEFORE A SMALL BRICK BUILDING.
+        g.setup = 3
+        g.limit = 330 # Lifetime of lamp in turns.
+        if g.hinted[3]:
+            g.limit = 1000 # Extra lamp time if instructions requested.
+        return GOTO2
+
+    def arrive(self):
+        # Line 2, dwarf stuff.
+        g = self.g
+        tk = 20*[0] # Used with dwarves later.
+
+        # Can't leave cave once it's closing (except by Main Office).
+        if (0 < g.newloc < 9) and g.closng:
+            self.rspeak(130) # EXIT CLOSED. LEAVE VIA OFFICE.
+            g.newloc = g.loc
+            if not g.panic:
+                g.clock2 = 15 # Give him 15 turns to leave.
+            g.panic = True
+
+        # See if a dwarf has seen him and has come from where he wants to go.
+        # If so, the dwarf's blocking his way.  If coming from place forbidden
+        # to pirate (dwarves rooted in place) let him get out (and attacked).
+        if not (g.newloc == g.loc or forced(g.loc)
+            or bitset(g.loc,3)):
+            for i in range(1, 5+1):
+                if g.odloc[i] != g.newloc or not g.dseen[i]:
+                    continue
+                g.newloc = g.loc
+                # A LITTLE DWARF WITH A BIG KNIFE BLOCKS YOUR WAY.
+                self.rspeak(2)
+                break
+        g.loc = g.newloc
+
+        # Dwarf stuff.  See earlier comments for description of variables.
+        # Remember sixth dwarf is pirate and is thus very different except for
+        # motion rules.
+
+        # First off, don't let the dwarves follow him into a pit or a wall.
+        # Activate the whole mess the first time he gets as far as the Hall of
+        # Mists (loc 15).  If newloc is forbidden to pirate (in particular, if
+        # it's beyond the troll bridge), bypass dwarf stuff.  That way pirate
+        # can't steal return toll, and dwarves can't meet the bear.  Also means
+        # dwarves won't follow him into dead end in maze, but c'est la vie.
+        # They'll wait for him outside the dead end.
+        if g.loc == 0 or forced(g.loc) or bitset(g.newloc,3):
+            return self.location()
+
+        if g.dflag == 0:
+            if g.loc >= 15: # In or beyond Hall of Mists.
+                g.dflag = 1 # Activate dwarves.
+            return self.location()
+
+        # When we encounter the first dwarf, we kill 0, 1, or 2 of the 5
+        # dwarves.  If any of the survivors is at loc, replace him with the
+        # alternate.
+        if g.dflag == 1:
+            if g.loc < 15 or self.rng.pct(95): # 5% of time, dwarf follows.
+                return self.location()
+            g.dflag = 2 # Indicate that dwarf is following.
+            for _ in range(1,2+1): # Kill up to 2 dwarves.
+                j = 1 + self.rng.randint(5)
+                # If saved not = -1, he bypassed the "start" call.
+                if self.rng.pct(50) and g.saved == -1:
+                    g.dloc[j] = 0 # Kill dwarf.
+            for i in range(1, 5+1):
+                if g.dloc[i] == g.loc: # Surviving dwarf here.
+                    g.dloc[i] = g.daltlc # Alternate from Nugget Rm.
+                g.odloc[i] = g.dloc[i] # Move dwarf here.
+            self.rspeak(3) # DWARF THREW AXE AT YOU AND MISSED.
+            self.drop(w['axe'], g.loc)
+            return self.location()
+
+        # Things are in full swing.  Move each dwarf at random, except if
+        # he's seen us he sticks with us.  Dwarves never go to locs <15.  If
+        # wandering at random, they don't back up unless there's no
+        # alternative.  If they don't have to move, they attack.  And, of
+        # course, dead dwarves don't do much of anything.
+        dtotal, attack, stick = self.dwarvesMove(tk)
+
+        # Now we know what's happening.  Let's tell the poor sucker about it.
+        if dtotal == 0: # Dwarf total is zero.
+            return self.location()
+        if dtotal != 1:
+            s = '\n THERE ARE %d THREATENING LITTLE DWARVES IN THE ROOM WITH '
+            s += 'YOU.'
+            self.print(s % dtotal)
+        else:
+            self.rspeak(4) # THREATENING LITTLE DWARF
+        if attack == 0:
+            return self.location()
+        if g.dflag == 2:
+            g.dflag = 3
+        # If saved not = -1, he bypassed the "start" call.  Dwarves get
+        # *very* mad!
+        if g.saved != -1:
+            g.dflag = 20
+        if attack == 1:
+            self.rspeak(5) #  KNIFE IS THROWN AT YOU!
+            k = 52
+        else:
+            self.print('\n %d OF THEM THROW KNIVES AT YOU!' % attack)
+            k = 6
+        if stick <= 1:
+            self.rspeak(k+stick)
+            if stick == 0:
+                return self.location()
+        else:
+            self.print('\n %d OF THEM GET YOU!' % stick)
+        g.oldlc2 = g.loc
+        return self.dead(pit=False)
+
+    def dwarvesMove(self, tk):
+        # Arrive's dwarves once things are in full swing (see dwarvesBatch,
+        # which does this for many games at once): each moves, the pirate
+        # robs him if he's spotted him, and the rest count how many are in
+        # the room, attack and hit.
+        g = self.g
+        dtotal = 0
+        attack = 0
+        stick = 0
+        for i in range(1, 6+1): # Loop through all dwarves.
+            if g.dloc[i] == 0: # Dead dwarf.
+                continue
+            self.dwarfMove(i, tk)
+            if not g.dseen[i]: # Not seen by dwarf.
+                continue
+            g.dloc[i] = g.loc
+            if i == 6: # == pirate.
+                # The pirate's spotted him.  He leaves him alone once we've
+                # found chest.  K counts if a treasure is here.  If not, and
+                # tally = tally2 plus one for an unseen chest, let the pirate
+                # be spotted.  Use place[messag] to determine if pirate's
+                # been seen, since place[chest] = 0 could mean he threw it to
+                # troll.
+                if g.loc == g.chloc or g.prop[w['chest']] >= 0:
+                    continue
+                # Only treasures he's toting or that are lying in the atloc
+                # list here can matter.
+                k = 0
+                for j in sorted(g.toted) + self.objectsAt(g.loc):
+                    if not 50 <= j <= cave['maxtrs']: # Treasures are >= 50.
+                        continue
+                    # Pirate won't take pyramid from Plover Room or Dark Room
+                    # (too easy!).
+                    if (j != w['pyram'] or not g.loc in
+                        [cave['plac'][w['pyram']], cave['plac'][w['emrald']]]):
+                        if self.toting(j): # Non-pyramid, non-emerald here.
+                            break
+                    if self.here(j):
+                        k = 1
+                else:
+                    if (g.tally == g.tally2+1      # Unseen chest.
+                        and k == 0                       # No treasure here.
+                        and g.place[w['messag']] == 0
+                        and self.here(w['lamp'])              # Lamp is here
+                        and g.prop[w['lamp']] == 1):  # and is on.
+                        self.rspeak(186) # FAINT RUSTLING NOISES...
+                        self.move(w['chest'], g.chloc)
+                        self.move(w['messag'], g.chloc2)
+                        g.dloc[6] = g.chloc
+                        g.odloc[6] = g.chloc
+                        g.dseen[6] = False
+                        continue
+                    if g.odloc[6] != g.dloc[6] and self.rng.pct(20):
+                        self.rspeak(127) # FAINT RUSTLING NOISES...
+                    continue
+
+                self.rspeak(128) # A BEARDED PIRATE!
+                if g.place[w['messag']] == 0:
+                    self.move(w['chest'],g.chloc)
+                self.move(w['messag'],g.chloc2)
+                for j in sorted(g.toted.union(self.objectsAt(g.loc))):
+                    if not 50 <= j < cave['maxtrs']:
+                        continue
+                    if (j == w['pyram'] and g.loc in
+                        [cave['plac'][w['pyram']], cave['plac'][w['emrald']]]):
+                        continue
+                    if self.at(j) and g.fixed[j] == 0:
+                        self.carry(j,g.loc)
+                    if self.toting(j):
+                        self.drop(j,g.chloc)
+                g.dloc[6] = g.chloc
+                g.odloc[6] = g.chloc
+                g.dseen[6] = False
+                continue
+
+            # This threatening little dwarf is in the room with him!
+            dtotal += 1
+            if g.odloc[i] != g.dloc[i]:
+                continue
+            attack += 1
+            if g.knfloc >= 0:
+                g.knfloc = g.loc # Put knife here.
+            if 1000*self.rng.random() < 95*(g.dflag-2):
+                stick += 1
+        return dtotal, attack, stick
+
+    def analyseObject(self, obj, verb=0):
+        '''
+        Analyse an object word.  See if the thing is here, whether we've got a
+        verb yet, and so on.  Object must be here unless verb is "find" or
+        "invent(ory)" (and no new verb yet to be analysed).  Water and oil are
+        also funny, since they are never actually dropped at any location, but
+        might be here inside the bottle or as a feature of the location.
+        '''
+
+        g = self.g
+
+        g.obj = obj # For use in transitive().
+        skip = g.fixed[obj] != g.loc and not self.here(obj)
+        while True:
+            if not skip:
+                if g.wd2 != '': # Line 5010
+                    return self.secondWord()
+                if g.verb != 0:
+                    spk = cave['actspk'][g.verb] # Default message for verb.
+                    return self.transitive(spk)
+                tk = g.wd1.strip() + g.wd1x.strip() + '?'
+                self.print('\n WHAT DO YOU WANT TO DO WITH THE %s' % tk)
+                return NEWTURN[-1]
+            skip = False
+            if obj == w['grate']: # Line 5100
+                if g.loc in [1,4,7]: # End of road, valley or streambed slit.
+                    obj = w['dprssn']
+                if 9 < g.loc < 15: # In cave, haven't reached Hall of Mists.
+                    obj = w['entrnc']
+                if obj != w['grate']:
+                    return (Game.newLocation, 8, obj, -1)
+            if obj == w['dwarf']:
+                upTop = False
+                for i in range(1, 5+1):
+                    if g.dloc[i] == g.loc and g.dflag >= 2:
+                        upTop = True
+                if upTop:
+                    continue
+            if ((self.liq() == obj and self.here(w['bottle']))
+                or obj == liqloc(g.loc)):
+                continue
+            if (g.obj == w['plant'] and self.at(w['plant2'])
+                and g.prop[w['plant2']] != 0):
+                g.obj = w['plant2']
+                continue
+            if g.obj == w['knife'] and g.knfloc == g.loc:
+                g.knfloc = -1
+                # DWARVES' KNIVES VANISH AS THEY STRIKE WALLS OF THE CAVE.
+                spk = 116
+                return NEWTURN[spk]
+            if g.obj == w['rod'] and self.here(w['rod2']):
+                g.obj = w['rod2']
+                continue
+            if (g.verb in [w['find'], w['invent']]) and g.wd2 == '':
+                continue
             break
-        print('\n PLEASE ANSWER THE QUESTION.')
+        tk = g.wd1.strip() + g.wd1x.strip() + ' HERE.'
+        self.print('\n I SEE NO %s' % tk)
+        return NEWTURN[0]
+
+    def analyseVerb(self, verb):
+        # Analyse a verb.  Remember what it was, go back for object if second
+        # word unless verb is "say", which snarfs arbitrary second word.
+
+        g = self.g
+        g.verb = verb
+        if g.wd2 != '' and verb != w['say']:
+            return self.secondWord()
+        if verb == w['say']:
+            if g.wd2 == '':
+                g.obj = 0
+            else:
+                g.obj = vocab(g.wd2,-1)
+        spk = cave['actspk'][verb] # Default message for verb.
+        if g.obj == 0:
+            return self.intransitive(spk)
+        else:
+            return self.transitive(spk)
+
+    def analyseWord(self):
+        g = self.g
+
+        i = vocab(g.wd1, -1)
+        if i == -1:
+            # Gee, i don't understand.
+            tk = g.wd1.strip() + g.wd1x.strip() + '".'
+            self.print('\n SORRY, I DON\'T KNOW THE WORD "%s' % tk)
+            return NEWTURN[-1]
+        wType,wNum = divmod(i, 1000)
+
+        '''
+        Section 4: Vocabulary.  Each line contains a number (n), a tab, and a
+           five-letter word.  Call m = n/1000.  If m = 0, then the word is a
+           motion verb for use in travelling (see section 3).  Else, if m = 1,
+           the word is an object.  Else, if m = 2, the word is an action verb
+           (such as "carry" or "attack").  Else, if m = 3, the word is a
+           special case verb (such as "dig") and n mod 1000 is an index into
+           section 6.  Objects from 50 to (currently, anyway) 79 are considered
+           treasures (for pirate, closeout).
+        '''
+
+        match wType:
+            case 0: # Motion verb.
+                return self.newLocation(8, wNum) # goto 2 or newLoc.
+            case 1: # Object.
+                return self.analyseObject(wNum) # newTurn or newLoc.
+            case 2: # Action verb.
+                return self.analyseVerb(wNum) # trans() or intrans()
+            case 3: # Special verb like "DIG".
+                return NEWTURN[wNum]
+            case _:
+                self.bug(22) # Vocabulary type (n/1000) not between 0 and 3.
+
+    def attack(self, spk):
+        # ATTACK.  Assume target if unambiguous.  "Throw" also links here.
+        # Attackable objects fall into two categories: enemies (snake, dwarf,
+        # etc.) and others (bird, clam).  Ambiguous if two enemies, or if no
+        # enemies but two others.
+        #
+        # Verb can be ATTAC,KILL,FIGHT,HIT,STRIK,SLAY.
+
+        g = self.g
 
-    if reply == 'YES' or reply == 'Y':
-        yesx = True 
-        if y != 0:
-            spk(y)
-    else:
-        yesx = False 
-        if z != 0:
-            spk(z)
-    return yesx
+        for i in range(1, 5+1):
+            if g.dloc[i] == g.loc and g.dflag >= 2:
+                break # Dwarf here and following player.
+        else:
+            i = 0
+        if g.obj == 0: # Intransitive, find object.
+            if i != 0: # Which following dwarf is present.
+                g.obj = w['dwarf']
+            if self.here(w['snake']):
+                g.obj = g.obj*100 + w['snake']
+            if self.at(w['dragon']) and g.prop[w['dragon']] == 0:
+                g.obj = g.obj*100 + w['dragon']
+            if self.at(w['troll']):
+                g.obj = g.obj*100 + w['troll']
+            if self.here(w['bear']) and g.prop[w['bear']] == 0:
+                g.obj = g.obj*100 + w['bear']
+            if g.obj > 100: # Multiple potential objects here.
+                return self.what() # Ask, ATTACK WHAT?
+            if g.obj == 0: # Still looking for object.
+                # Can't attack bird by throwing axe.
+                if self.here(w['bird']) and g.verb != w['throw']:
+                    g.obj = w['bird']
+                # Clam and oyster both treated as clam for intransitive case;
+                # no harm done.
+                if self.here(w['clam']) or self.here(w['oyster']):
+                    g.obj = 100*g.obj + w['clam']
+                if g.obj > 100: # Multiple potential objects here.
+                    return self.what()
+        if g.obj == w['bird']:
+            spk = 137 # OH, LEAVE THE POOR UNHAPPY BIRD ALONE.
+            if g.closed:
+                return NEWTURN[spk]
+            self.dstroy(w['bird'])
+            g.prop[w['bird']] = 0 # Dead bird.
+            # At initial loc.
+            if g.place[w['snake']] == cave['plac'][w['snake']]:
+                g.tally2 += 1 # Cannot find bird again.
+            spk = 45 # THE LITTLE BIRD IS NOW DEAD.
+        if g.obj == 0: # Never found an object.
+            spk = 44 # THERE IS NOTHING HERE TO ATTACK.
+        if g.obj in [w['clam'], w['oyster']]:
+            spk = 150 # THE SHELL IS VERY STRONG
+        if g.obj == w['snake']:
+            spk = 46 # ATTACKING THE SNAKE DOESN'T WORK.
+        if g.obj == w['dwarf']:
+            spk = 49 # WITH WHAT?  YOUR BARE HANDS?
+        if g.obj == w['dwarf'] and g.closed:
+            self.dwarvesDisturbed() # Game ends.
+        if g.obj == w['dragon']:
+            spk = 167 # THE POOR THING IS ALREADY DEAD!
+        if g.obj == w['troll']:
+            spk = 157 # TROLLS ARE CLOSE RELATIVES WITH THE ROCKS...
+        if g.obj == w['bear']:
+            spk = 165 + (g.prop[w['bear']] + 1)//2
+        if g.obj != w['dragon'] or g.prop[w['dragon']] != 0:
+            return NEWTURN[spk]
+        # Fun stuff for dragon.  If he insists on attacking it, win!  Set prop
+        # to dead, move dragon to central loc (still fixed), move rug there
+        # (not fixed), and move him there, too.  Then do a null motion to get
+        # new description.
+        self.rspeak(49) # WITH WHAT?  YOUR BARE HANDS?
+        g.verb = 0
+        g.obj = 0
+        return self.getin((Game.attackDragon,))
+
+    def attackDragon(self, reply):
+        # Well, does he mean to do it with his bare hands?
+        g = self.g
+
+        g.wd1,g.wd1x,g.wd2,g.wd2x = reply
+        if g.wd1 not in ['Y', 'YES']:
+            return self.foobarEtc(g.verb)
+        self.pspeak(w['dragon'],1) # YOU HAVE JUST VANQUISHED A DRAGON
+        g.prop[w['dragon']] = 2 # Dead.
+        g.prop[w['rug']] = 0 # Put rug here.
+        k = (cave['plac'][w['dragon']] + cave['fixd'][w['dragon']])//2
+        self.move(w['dragon'] + 100, -1)
+        self.move(w['rug'] + 100, 0)
+        self.move(w['dragon'], k)
+        self.move(w['rug'], k)
+        for obj in range(1, 100+1):
+            if (g.place[obj] == cave['plac'][w['dragon']]
+                or g.place[obj] == cave['fixd'][w['dragon']]):
+                self.move(obj, k)
+        g.loc = k
+        k = w['null']
+        return (Game.newLocation, 8, k, -1)
+
+    def badMotion(self, k):
+        #  Non-applicable motion.  Various messages depending on word given.
+
+        spk = 12 # I DON'T KNOW HOW TO APPLY THAT WORD HERE.
+        if 43 <= k <= 50:
+            spk = 9 # THERE IS NO WAY TO GO THAT DIRECTION.
+        if k in [29, 30]:
+            spk = 9
+        if k in [7, 36, 37]:
+            spk = 10 # USE COMPASS POINTS OR NEARBY OBJECTS.
+        if k in [11, 19]:
+            # USE COMPASS POINTS OR NAME SOMETHING IN GENERAL DIRECTION
+            spk = 11
+    #   if verb in [w['find'], w['invent']]: # XXX BUG??? verb, not k.
+        if k in [w['find'], w['invent']]:
+            spk = 59 # I CANNOT TELL YOU WHERE REMOTE THINGS ARE.
+        if k in [62, 65]:
+            spk = 42 # NOTHING HAPPENS.
+        if k == 17:
+            spk = 80 # WHICH WAY?
+        self.rspeak(spk)
+        return GOTO2 # goto 2
+
+    def blast(self, spk):
+        # BLAST.  No effect unless you've got dynamite, which is a neat trick!
+
+        g = self.g
+        if g.prop[w['rod2']] < 0 or not g.closed:
+            return NEWTURN[spk]
+        g.bonus = 133 # LOUD EXPLOSION...BURYING THE DWARVES
+        if g.loc == 115: # NE storage room.
+            g.bonus = 134 # LOUD EXPLOSION...BURYING THE SNAKES
+        if self.here(w['rod2']):
+            g.bonus = 135 # LOUD EXPLOSION...YOU ARE SPLASHED ACROSS WALLS
+        self.rspeak(g.bonus)
+        self.finish()
+
+    def breakObj(self, spk):
+        #  BREAK.  Only works for mirror in repository and, of course, the
+        #  vase.
+
+        g = self.g
+
+        if g.obj == w['mirror']:
+            spk = 148 # TOO FAR UP FOR YOU TO REACH.
+        if not (g.obj == w['vase'] and g.prop[w['vase']] == 0):
+            if g.obj != w['mirror'] or not g.closed:
+                return NEWTURN[spk]
+            self.rspeak(197) # MIRROR IT SHATTERS INTO A MYRIAD TINY FRAGMENTS.
+            self.dwarvesDisturbed()
+        spk = 198 # VASE HURLED DELICATELY TO THE GROUND.
+        if self.toting(w['vase']):
+            self.drop(w['vase'], g.loc)
+        g.prop[w['vase']] = 2 # Shattered.
+        g.fixed[w['vase']] = -1 # Gone.
+        return NEWTURN[spk]
+
+    def brief(self):
+        # BRIEF.  Intransitive only.  Suppress long descriptions after first
+        # time.
+
+        g = self.g
+
+        spk = 156 # I'LL ONLY DESCRIBE A PLACE IN FULL THE FIRST TIME
+        g.abbnum = 10000
+        g.detail = 3
+        return NEWTURN[spk]
+
+    def carry(self, obj, where):
+        '''
+        Start toting an object, removing it from the list of things at its
+        former location.  Incr holdng unless it was already being toted.  If
+        obj>100 (moving "fixed" second loc), don't change place or holdng.
+        Blink saves walking the list to find who points at obj.
+        '''
+
+        g = self.g
+
+        if obj <= 100:
+            if g.place[obj] == -1:
+                return
+            g.place[obj] = -1
+            g.toted.add(obj)
+            g.holdng += 1
+        prev = g.blink[obj]
+        nxt = g.link[obj]
+        if prev == 0: # Obj was first at where.
+            g.atloc[where] = nxt
+        else:
+            g.link[prev] = nxt
+        if nxt != 0:
+            g.blink[nxt] = prev
+        g.blink[obj] = 0 # As indexBuild would have it, off every list.
+
+    def caveMsg(self):
+        # CAVE.  Different messages depending on whether above ground.
+        g = self.g
+        if g.loc < 8:
+            self.rspeak(57) # I DON'T KNOW WHERE THE CAVE IS, TRY THE STREAM.
+        if g.loc >= 8:
+            self.rspeak(58) # I NEED MORE DETAILED INSTRUCTIONS TO DO THAT.
+        return GOTO2 # goto 2
+
+    def ciao(self, why='suspended'):
+        '''
+        Exits, after issuing reminder to save new core image.  Used when
+        suspending and when creating new version via magic mode.  On some
+        systems, the core image is lost once the program exits.  If so, set
+        k=31 instead of 32.
+
+        --
+        The above is of course no longer applicable, but let's print it for old
+        times' sake. (mm, Oct 2024)  Nor is waiting for him to acknowledge
+        the k=31 message, so that's gone.  Why is for the GameOver.
+        '''
+        k = 32
+        self.mspeak(k) # BE SURE TO SAVE YOUR CORE-IMAGE...
+        raise GameOver(why)
 
-if __name__ == '__main__':
-    main()
+    #
+    #   C a v e   C l o s i n g   a n d   S c o r i n g
+    #
+    #   closeClock1 & closeClock2
+
+        '''
+        These sections handle the closing of the cave.  The cave closes
+        "clock1" turns after the last treasure has been located (including the
+        pirate's chest, which may of course never show up).  Note that the
+        treasures need not have been taken yet, just located.  Hence clock1
+        must be large enough to get out of the cave (it only ticks while inside
+        the cave).  When it hits zero, we branch to 10000 to start closing the
+        cave, and then sit back and wait for him to try to get out.  If he
+        doesn't within clock2 turns, we close the cave; if he does try, we
+        assume he panics, and give him a few additional turns to get frantic
+        before we close.  When clock2 hits zero, we branch to 11000 to
+        transport him into the final puzzle.  Note that the puzzle depends upon
+        all sorts of random things.  For instance, there must be no water or
+        oil, since there are beanstalks which we don't want to be able to
+        water, since the code can't handle it.  Also, we can have no keys,
+        since there is a grate (having moved the fixed object!) there
+        separating him from all the treasures.  Most of these problems arise
+        from the use of negative prop numbers to suppress the object
+        descriptions until he's actually moved the objects.
+
+        When the first warning comes, we lock the grate, destroy the bridge,
+        kill all the dwarves (and the pirate), remove the troll and bear
+        (unless dead), and set "closng" to true.  Leave the dragon; too much
+        trouble to move it.  From now until clock2 runs out, he cannot unlock
+        the grate, move to any location outside the cave (loc<9), or create the
+        bridge.  Nor can he be resurrected if he dies.  Note that the snake is
+        already gone, since he got to the treasure accessible only via the hall
+        of the Mt. King.  Also, he's been in giant room (to get eggs), so we
+        can refer to it.  Also also, he's gotten the pearl, so we know the
+        bivalve is an oyster.  *And*, the dwarves must have been activated,
+        since we've found chest.
+        '''
+
+    def closeClock1(self):
+        g = self.g
+
+        # Line 10000
+        g.prop[w['grate']] = 0 # Lock the grate.
+        g.prop[w['fissur']] = 0 # Destroy the bridge.
+        for i in range(1, 6+1):
+            g.dseen[i] = False
+            g.dloc[i] = 0 # Kill each dwarf or pirate.
+        self.move(w['troll'], 0) # Remove troll.
+        self.move(w['troll']+100, 0)
+        self.move(w['troll2'], cave['plac'][w['troll']])
+        self.move(w['troll2']+100, cave['fixd'][w['troll']])
+        self.juggle(w['chasm'])
+        if g.prop[w['bear']] != 3: # ==3, already dead.
+            self.dstroy(w['bear']) # Remove bear.
+        g.prop[w['chain']] = 0 # Lock chain.
+        g.fixed[w['chain']] = 0
+        g.prop[w['axe']] = 0 # Take axe.
+        g.fixed[w['axe']] = 0
+        # "ALL ADVENTURERS EXIT IMMEDIATELY THROUGH MAIN OFFICE."
+        self.rspeak(129)
+        g.clock1 = -1
+        g.closng = True
+        return self.parseWords()
+
+    def closeClock2(self):
+
+        '''
+        Once he's panicked, and clock2 has run out, we come here to set up the
+        storage room.  The room has two locs, hardwired as 115 (NE) and 116
+        (SW).  At the NE end, we place empty bottles, a nursery of plants, a
+        bed of oysters, a pile of lamps, rods with stars, sleeping dwarves, and
+        him.  At the SW end we place grate over treasures, snake pit, covey of
+        caged birds, more rods, and pillows.  A mirror stretches across one
+        wall.  Many of the objects come from known locations and/or states
+        (E.g. the snake is known to have been destroyed and needn't be carried
+        away from its old "place"), making the various objects be handled
+        differently.  We also drop all other objects he might be carrying (lest
+        he have some which could cause trouble, such as the keys).  We describe
+        the flash of light and trundle back.
+        '''
+        g = self.g
+
+        # Line 11000
+        g.prop[w['bottle']] = self.put(w['bottle'],115,1)
+        g.prop[w['plant']] = self.put(w['plant'],115,0)
+        g.prop[w['oyster']] = self.put(w['oyster'],115,0)
+        g.prop[w['lamp']] = self.put(w['lamp'],115,0)
+        g.prop[w['rod']] = self.put(w['rod'],115,0)
+        g.prop[w['dwarf']] = self.put(w['dwarf'],115,0)
+        g.loc = 115
+        g.oldloc = 115
+        g.newloc = 115
+
+        # Leave the grate with normal (non-negative) property.
+        foo = self.put(w['grate'],116,0)
+        g.prop[w['snake']] = self.put(w['snake'],116,1)
+        g.prop[w['bird']] = self.put(w['bird'],116,1)
+        g.prop[w['cage']] = self.put(w['cage'],116,0)
+        g.prop[w['rod2']] = self.put(w['rod2'],116,0)
+        g.prop[w['pillow']] = self.put(w['pillow'],116,0)
+
+        g.prop[w['mirror']] = self.put(w['mirror'],115,0)
+        g.fixed[w['mirror']] = 116
+
+        for i in sorted(g.toted):
+            self.dstroy(i) # Remove anything he's carrying.
+
+        self.rspeak(132) # BLINDING FLASH OF LIGHT...
+        g.closed = True
+        return GOTO2 # goto 2
+
+    def closeDemo(self):
+        # And, of course, demo games are ended by the wizard.
+
+        g = self.g
+
+        # Line 13000
+        self.mspeak(1) # SOMEWHERE NEARBY IS COLOSSAL CAVE,...
+        g.gaveup = True
+        self.finish()
+
+    def dead(self, pit=True):
+        '''
+        "You're dead, Jim."
+
+        If the current loc is zero, it means the clown got himself killed.
+        We'll allow this maxdie times.  Maxdie is automatically set based on
+        the number of snide messages available.  Each death results in a
+        message (81, 83, etc.) which offers reincarnation; if accepted, this
+        results in message 82, 84, etc.  The last time, if he wants another
+        chance, he gets a snide remark as we exit.  When reincarnated, all
+        objects being carried get dropped at oldlc2 (presumably the last place
+        prior to being killed) without change of props.  The loop runs
+        backwards to assure that the bird is dropped before the cage.  (This
+        kluge could be changed once we're sure all references to bird and cage
+        are done by keywords.)  The lamp is a special case (it wouldn't do to
+        leave it in the cave).  It is turned off and left outside the building
+        (only if he was carrying it, of course).  He himself is left inside the
+        building (and heaven help him if he tries to XYZZY back into the cave
+        without the lamp!).  Oldloc is zapped so he can't just "retreat".
+        '''
+
+        g = self.g
+
+        # The easiest way to get killed is to fall into a pit in pitch
+        # darkness.
+        if pit:
+            self.rspeak(23) # YOU BROKE EVERY BONE IN YOUR BODY!
+            g.oldlc2 = g.loc
+
+        #  Okay, he's dead.  Let's get on with it.
+        if g.closng:
+            # He died during closing time.  No resurrection.  Tally up a death
+            # and exit.
+            self.rspeak(131) # IT LOOKS AS THOUGH YOU'RE DEAD...CALL IT A DAY.
+            g.numdie += 1
+            self.finish()
+        # REINCARNATE?
+        return self.yes(81+g.numdie*2, 82+g.numdie*2, 54, (Game.reincarnate,))
+
+    def reincarnate(self, reply):
+        # Back from the dead, if he wants to be and we'll have him.
+        g = self.g
+
+        g.yea = reply
+        g.numdie += 1
+        if g.numdie == g.maxdie or not g.yea:
+            self.finish()
+        g.place[w['water']] = 0
+        g.place[w['oil']] = 0
+        g.toted.discard(w['water'])
+        g.toted.discard(w['oil'])
+        if self.toting(w['lamp']):
+            g.prop[w['lamp']] = 0
+        for i in sorted(g.toted, reverse=True):
+            k = g.oldlc2
+            if i == w['lamp']:
+                k = 1
+            self.drop(i, k)
+        g.loc = 3 # Resurrected, back to the building!
+        g.oldloc = g.loc
+        return self.location() # Back to top of game loop.
+
+    def discard(self, spk, goto9021=False):
+        # Discard object.  "Throw" also comes here for most objects.  Special
+        # cases for bird (might attack snake or dragon) and cage (might contain
+        # bird) and vase.  Drop coins at vending machine for extra batteries.
+        #
+        # Also: DROP,RELEA,FREE,DISCA,DUMP.
+
+        g = self.g
+        if not goto9021:
+            # Line 9020
+            if (self.toting(w['rod2']) and g.obj == w['rod']
+                and not self.toting(w['rod'])):
+                g.obj = w['rod2'] # rod2 is in Storage Area, SW end.
+            if not self.toting(g.obj):
+                return NEWTURN[spk]
+            if g.obj == w['bird'] and self.here(w['snake']):
+                self.rspeak(30) # LITTLE BIRD ATTACKS THE GREEN SNAKE...
+                if g.closed:
+                    self.dwarvesDisturbed()
+                self.dstroy(w['snake'])
+                # Set prop for use by travel options
+                g.prop[w['snake']] = 1 # Snake run off by bird.
+                skipTop = False
+            else:
+                skipTop = True
 
+        while True:
+            if not skipTop or goto9021:
+                k = self.liq() # Line 9021
+                if k == g.obj:
+                    g.obj = w['bottle']
+                if g.obj == w['bottle'] and k != 0:
+                    g.place[k] = 0
+                    g.toted.discard(k)
+                if g.obj == w['cage'] and g.prop[w['bird']] != 0:
+                    self.drop(w['bird'],g.loc) # Set bird free.
+                if g.obj == w['bird']:
+                    g.prop[w['bird']] = 0
+                self.drop(g.obj,g.loc)
+                return NEWTURN[0]
+            skipTop = False
+            if g.obj == w['coins'] and self.here(w['vend']):
+                self.dstroy(w['coins']) # Take his money.
+                self.drop(w['batter'], g.loc) # Fresh batteries for payment.
+                self.pspeak(w['batter'], 0) # THERE ARE FRESH BATTERIES HERE.
+                return NEWTURN[0]
+            elif (g.obj == w['bird'] and self.at(w['dragon'])
+                and g.prop[w['dragon']] == 0): # Bird and living dragon.
+                self.rspeak(154) # BIRD ATTACKS DRAGON, BURNT TO A CINDER.
+                self.dstroy(w['bird'])
+                g.prop[w['bird']] = 0 # Dead bird.
+                if g.place[w['snake']] == cave['plac'][w['snake']]:
+                    g.tally2 += 1 # Cannot find bird again.
+                return NEWTURN[0]
+            elif g.obj == w['bear'] and self.at(w['troll']):
+                self.rspeak(163) # TROLL SCURRIES AWAY.
+                self.move(w['troll'], 0)
+                self.move(w['troll']+100, 0)
+                self.move(w['troll2'], cave['plac'][w['troll']])
+                self.move(w['troll2']+100, cave['fixd'][w['troll']])
+                self.juggle(w['chasm'])
+                g.prop[w['troll']] = 2
+            elif (g.obj != w['vase'] or g.loc == cave['plac'][w['pillow']]):
+                self.rspeak(54) # OK
+            else:
+                g.prop[w['vase']] = 2 # VASE DROPS WITH A DELICATE CRASH.
+                if self.at(w['pillow']):
+                    g.prop[w['vase']] = 0 # VASE RESTING ON VELVET PILLOW.
+                self.pspeak(w['vase'], g.prop[w['vase']]+1)
+                if g.prop[w['vase']] != 0:
+                    g.fixed[w['vase']] = -1 # Vase destroyed.
+        return NEWTURN[0]
+
+    def drink(self, spk):
+        # DRINK.  If no object, assume water and look for it here.  If water is
+        # in the bottle, drink that, else must be at a water loc, so drink
+        # stream.
+        #
+        # spk is default message, i.e., spk == cave['actspk'][g.verb]
+
+        g = self.g
+        if (g.obj == 0                      # No object specified
+            and liqloc(g.loc) != w['water'] # and no water here
+            and (self.liq() != w['water']           # and (no water in bottle
+                or not self.here(w['bottle']))):    #     or no bottle here)
+            return self.what()
+        if g.obj != 0 and g.obj != w['water']: # obj not water.
+            spk = 110 # DON'T BE RIDICULOUS!
+        if (spk == 110 or self.liq() != w['water']
+            or not self.here(w['bottle'])):
+            return NEWTURN[spk]
+        g.prop[w['bottle']] = 1 # Bottle empty.
+        g.place[w['water']] = 0 # No water here.
+        g.toted.discard(w['water'])
+        spk = 74 # THE BOTTLE OF WATER IS NOW EMPTY.
+        return NEWTURN[spk]
+
+    def drop(self, obj, where):
+        '''
+        Place an object at a given loc, prefixing it onto the atloc list.  Decr
+        holdng if the object was being toted.
+        '''
+
+        g = self.g
+
+        if obj <= 100: # Only object numbers are < 100.
+            if g.place[obj] == -1: # If object is here,
+                g.holdng -= 1 # Toting one less object.
+            g.place[obj] = where
+            g.toted.discard(obj)
+        else:
+            g.fixed[obj-100] = where
+        if where <= 0:
+            return
+        nxt = g.atloc[where]
+        g.link[obj] = nxt
+        g.blink[obj] = 0
+        if nxt != 0:
+            g.blink[nxt] = obj
+        g.atloc[where] = obj
+
+    def dstroy(self, obj):
+        '''
+        Permanently eliminate "object" by moving to a non-existent location.
+        '''
+        self.move(obj, 0)
+
+    def dwarfMove(self, i, tk):
+        '''
+        Move dwarf i (6 is the pirate) at random to one of the places he can
+        wander to from dloc[i] (see dbBuild), but not back to odloc[i] unless
+        there's no alternative, and note whether he's seen him.  Tk is scratch
+        space for the candidates.
+        '''
+
+        g = self.g
+
+        j = 1
+        odloc = g.odloc[i]
+        for newloc in cave['pirnbr' if i == 6 else 'dwfnbr'][g.dloc[i]]:
+            if newloc == odloc or (j > 1 and newloc == tk[j-1]):
+                continue
+            if j >= 20: # Beyond end of tk[].
+                break
+            tk[j] = newloc
+            j += 1
+        tk[j] = odloc
+        if j >= 2:
+            j -= 1
+        j = 1 + self.rng.randint(j)
+        g.odloc[i] = g.dloc[i]
+        g.dloc[i] = tk[j]
+        g.dseen[i] = (
+            (g.dseen[i] and g.loc >= 15) # Seen and >= Hall of Mists.
+            or g.dloc[i] == g.loc        # Dwarf is here.
+            or g.odloc[i] == g.loc)      # Dwarf was just here.
+
+    def dwarvesDisturbed(self):
+        # Oh dear, he's disturbed the dwarves.
+        self.rspeak(136) # RUCKUS HAS AWAKENED THE DWARVES
+        self.finish()
+
+    def eat(self, spk, intransitive=True):
+        # EAT. Intransitive: assume food if present, else ask what.
+        # Transitive: food ok, some things lose appetite, rest are ridiculous.
+
+        g = self.g
+        if intransitive:
+            if not self.here(w['food']):
+                return self.what()
+            self.dstroy(w['food'])
+            spk = 72 # THANK YOU, IT WAS DELICIOUS!
+        else:
+            if g.obj == w['food']:
+                self.dstroy(w['food'])
+                spk = 72 # THANK YOU, IT WAS DELICIOUS!
+            elif g.obj in [w['bird'], w['snake'], w['clam'], w['oyster'],
+                w['dwarf'], w['dragon'], w['troll'], w['bear']]:
+                spk = 71 # I THINK I JUST LOST MY APPETITE.
+        return NEWTURN[spk]
+
+    def feed(self, spk):
+        # FEED.  If bird, no seed.  Snake, dragon, troll: quip.  If dwarf, make
+        # him mad.  Bear, special.
+        g = self.g
+
+        if g.obj == w['bird']:
+            spk = 100 # HAVE NO BIRD SEED.
+        elif g.obj in [w['snake'], w['dragon'], w['troll']]:
+            spk = 102 # NOTHING HERE IT WANTS TO EAT (EXCEPT PERHAPS YOU).
+            if g.obj == w['dragon'] and g.prop[w['dragon']] != 0:
+                spk = 110 # DON'T BE RIDICULOUS!
+            if g.obj == w['troll']:
+                spk = 182 # GLUTTONY IS NOT ONE OF THE TROLL'S VICES.
+            if not (g.obj != w['snake'] or g.closed
+                or not self.here(w['bird'])):
+                spk = 101 # THE SNAKE HAS NOW DEVOURED YOUR BIRD.
+                self.dstroy(w['bird'])        # Remove bird.
+                g.prop[w['bird']] = 0 # Dead bird.
+                g.tally2 += 1         # Cannot find bird again.
+        elif g.obj == w['dwarf']:
+            if self.here(w['food']):
+                spk = 103 # YOU FOOL, DWARVES EAT ONLY COAL!
+                g.dflag += 1
+        elif g.obj == w['bear']:
+            if g.prop[w['bear']] == 0: # Locked to chain.
+                spk = 102 # NOTHING HERE IT WANTS TO EAT (EXCEPT PERHAPS YOU).
+            if g.prop[w['bear']] == 3: # Dead bear.
+                spk = 110 # DON'T BE RIDICULOUS!
+            if self.here(w['food']):
+                self.dstroy(w['food'])
+                g.prop[w['bear']] = 1 # Free and fed.
+                g.fixed[w['axe']] = 0
+                g.prop[w['axe']] = 0
+                spk = 168 # WOLFS DOWN FOOD, CALMS DOWN.
+            return NEWTURN[spk]
+        else:
+            spk = 14 # I'M GAME.  WOULD YOU CARE TO EXPLAIN HOW?
+        return NEWTURN[spk]
+
+    def feeFie(self):
+        # FEE FIE FOE FOO (and FUM).  Advance to next state if given in proper
+        # order.  Look up wd1 in section 3 of vocab to determine which word
+        # we've got.  Last word zips the eggs back to the Giant Room (unless
+        # already there).
+
+        g = self.g
+
+        k = vocab(g.wd1,3) # FEE -> k==3001%1000==1, etc.
+        spk = 42 # NOTHING HAPPENS.
+        if g.foobar != 1 - k:
+            if g.foobar != 0:
+                spk = 151 # CAN'T YOU READ?  NOW YOU'D BEST START OVER.
+            return NEWTURN[spk]
+        g.foobar = k # Track progress (word num) saying FEE FIE FOE FOO.
+        if k != 4:
+            return NEWTURN[54] # newTurn()
+        g.foobar = 0
+        # cur loc == orig loc.
+        if (g.place[w['eggs']] == cave['plac'][w['eggs']]
+            or (self.toting(w['eggs']) and g.loc == cave['plac'][w['eggs']])):
+            return NEWTURN[spk]
+        # Bring back troll if we steal the eggs back from him before crossing.
+        if (g.place[w['eggs']] == 0 and g.place[w['troll']] == 0
+            and g.prop[w['troll']] == 0):
+            g.prop[w['troll']] = 1 # Troll is back.
+        k = 2                                 # DONE! Default message.
+        if self.here(w['eggs']):                   # If eggs here, take them.
+            k = 1 # NEST OF GOLDEN EGGS VANISHED!
+        if g.loc == cave['plac'][w['eggs']]:  # In Giant Room, bring eggs back.
+            k = 0 # LARGE NEST HERE, FULL OF GOLDEN EGGS!
+        self.move(w['eggs'], cave['plac'][w['eggs']]) # Zip eggs to Giant Room.
+        self.pspeak(w['eggs'], k)
+        return NEWTURN[0]
+
+    def fill(self, spk):
+        # FILL.  Bottle must be empty, and some liquid available.  (Vase is
+        # nasty.)
+
+        g = self.g
+        if g.obj != w['vase']:
+            if g.obj != 0 and g.obj != w['bottle']:
+                return NEWTURN[spk]
+            if g.obj == 0 and not self.here(w['bottle']):
+                return self.what()
+            spk = 107 # YOUR BOTTLE IS NOW FULL OF WATER.
+            if liqloc(g.loc) == 0:
+                # THERE IS NOTHING HERE WITH WHICH TO FILL THE BOTTLE.
+                spk = 106
+            if self.liq() != 0:
+                spk = 105 # YOUR BOTTLE IS ALREADY FULL.
+            if spk != 107:
+                return NEWTURN[spk]
+            g.prop[w['bottle']] = cave['cond'][g.loc]%4//2*2
+            k = self.liq()
+            if self.toting(w['bottle']):
+                g.place[k] = -1
+                g.toted.add(k)
+            if k == w['oil']:
+                spk = 108 # YOUR BOTTLE IS NOW FULL OF OIL.
+            return NEWTURN[spk]
+        spk = 29 # YOU AREN'T CARRYING IT!
+        if liqloc(g.loc) == 0:
+            spk = 144 # THERE IS NOTHING HERE WITH WHICH TO FILL THE VASE.
+        if liqloc(g.loc) == 0 or not self.toting(w['vase']):
+            return NEWTURN[spk]
+        self.rspeak(145) # TEMPERATURE HAS DELICATELY SHATTERED THE VASE.
+        g.prop[w['vase']] = 2
+        g.fixed[w['vase']] = -1
+        return self.discard(spk, goto9021=True)
+
+    def find(self, spk, k):
+        #  FIND.  Might be carrying it, or it might be here.  Else give caveat.
+
+        g = self.g
+        if (self.at(g.obj) or (self.liq() == g.obj and self.at(w['bottle']))
+            or k == liqloc(g.loc)):
+            spk = 94 # I BELIEVE WHAT YOU WANT IS RIGHT HERE WITH YOU.
+        for i in range(1, 5+1):
+            if (g.dloc[i] == g.loc and g.dflag >= 2
+                and g.obj == w['dwarf']):
+                spk = 94 # I BELIEVE WHAT YOU WANT IS RIGHT HERE WITH YOU.
+        if g.closed:
+            spk = 138 # I DARESAY WHATEVER YOU WANT IS AROUND HERE SOMEWHERE.
+        if self.toting(g.obj):
+            spk = 24 # YOU ARE ALREADY CARRYING IT!
+        return NEWTURN[spk]
+
+    def finish(self, scorng=False):
+        g = self.g
+
+        #  Exit code.
+
+        #  The present scoring algorithm is as follows:
+        #     Objective:          Points:        Present Total Possible:
+        #  Getting well into cave   25                    25
+        #  Each treasure < chest    12                    60
+        #  Treasure chest itself    14                    14
+        #  Each treasure > chest    16                   144
+        #  Surviving             (max-num)*10             30
+        #  Not quitting              4                     4
+        #  Reaching "closng"        25                    25
+        #  "Closed": Quit/killed    10
+        #            Klutzed        25
+        #            Wrong way      30
+        #            Success        45                    45
+        #  Came to Witt's End        1                     1
+        #  Round out the total       2                     2
+        #                                       Total:   350
+        #  (Points can also be deducted for using hints.)
+
+        score = 0
+        mxscor = 0
+
+        #  First tally up the treasures.  Must be in building and not broken.
+        #  Give the poor guy 2 points just for finding each treasure.
+        for i in cave['trsrs']:
+            k = 12                # Easily found treasures.
+            if i == w['chest']:   # Treasure chest.
+                k = 14
+            if i > w['chest']:    # Hard to find treasures.
+                k = 16
+            # Free 2 pts.  Treasure found, maybe not in bldg.
+            if g.prop[i] >= 0:
+                score += 2
+            if g.place[i] == 3 and g.prop[i] == 0: # In bldg & not broken.
+                score += k - 2    # In bldg, so take back free 2 points.
+            mxscor += k
+
+        # Now look at how he finished and how far he got.  Maxdie and numdie
+        # tell us how well he survived.  Gaveup says whether he exited via
+        # quit.  Dflag will tell us if he ever got suitably deep into the cave.
+        # Closng still indicates whether he reached the endgame.  And if he got
+        # as far as "cave closed" (indicated by "closed"), then bonus is zero
+        # for mundane exits or 133, 134, 135 if he blew it (so to speak).
+        score += (g.maxdie - g.numdie)*10
+        mxscor += g.maxdie*10
+        if not (scorng or g.gaveup):
+            score += 4
+        mxscor += 4
+        if g.dflag != 0:
+            score += 25
+        mxscor += 25
+        if g.closng:
+            score += 25
+        mxscor += 25
+        if g.closed:
+            if g.bonus ==   0: score += 10
+            if g.bonus == 135: score += 25
+            if g.bonus == 134: score += 30
+            if g.bonus == 133: score += 45
+        mxscor += 45
+
+        # Did he come to Witt's End as he should?
+        if g.place[w['magzin']] == 108: # 108 is Witt's End.
+            score += 1
+        mxscor += 1
+
+        # Round it off.
+        score += 2
+        mxscor += 2
+
+        # Deduct points for hints.  Hints < 4 are special; see database
+        # description.
+        for i in range(1, cave['hntmax']+1):
+            if g.hinted[i]:
+                score -= cave['hints'][i][2]
+
+        # Return to score command if that's where we came from.
+        if scorng:
+            return score,mxscor
+
+        # That should be good enough.  Let's tell him all about it.
+        self.print('\n\n\n YOU SCORED%4d OUT OF A POSSIBLE%4d USING%5d TURNS.'
+            % (score,mxscor,g.turns))
+
+        for i in range(1, cave['clsses']+1):
+            if cave['cval'][i] >= score:
+                break
+        else:
+            self.print('\n YOU JUST WENT OFF MY SCALE!!\n')
+            raise GameOver('finished', score, mxscor)
+
+        self.speak(cave['ctext'][i])
+        if i == cave['clsses']-1:
+            self.print('\n TO ACHIEVE THE NEXT HIGHER RATING ',
+            'WOULD BE A NEAT TRICK!\n\n CONGRATULATIONS!!\n')
+        else:
+            k = cave['cval'][i] + 1-score
+            kk = 'S.'
+            if k == 1:
+                kk = '. '
+            self.print('\n TO ACHIEVE THE NEXT HIGHER RATING, '
+                'YOU NEED%3d MORE POINT%2s\n' % (k,kk))
+        raise GameOver('finished', score, mxscor)
+
+    def foobarEtc(self, verb):
+        # Every input, check "foobar" flag.  If zero, nothing's going on.  If
+        # pos, make neg.  If neg, he skipped a word, so make it zero.
+
+        g = self.g
+
+        # Line 2608
+        g.foobar = min(0, -g.foobar)
+        if g.turns == 0 and g.wd1 == 'MAGIC' and g.wd2 == 'MODE':
+            return self.maint() # Game eventually exits if he's a wizard..
+        g.turns += 1
+        if g.demo and g.turns >= self.wizcom['short']:
+            self.closeDemo() # Game ends.
+        if g.turns == 3:
+            g.xxd,g.xxt = self.clock()
+        if g.turns == 45:
+            # See if timer UUO has been zapped; if so, he's cheating.
+            yyd,yyt = self.clock()
+            if g.xxd == yyd and g.xxt == yyt:
+                g.saved = 0
+        if verb == w['say'] and g.wd2 != '':
+            verb = 0
+        if verb == w['say']:
+            return self.say()
+        if g.tally == 0 and g.loc >= 15 and g.loc != 33:
+            g.clock1 -= 1 # Hall of Mists or beyond, but not Y2.
+        if g.clock1 == 0:
+            return self.closeClock1()
+        if g.clock1 < 0:
+            g.clock2 -= 1
+        if g.clock2 == 0:
+            return self.closeClock2() # goto 2
+        if g.prop[w['lamp']] == 1:
+            g.limit -= 1
+        if (g.limit <= 30 and self.here(w['batter'])
+            and g.prop[w['batter']] == 0 and self.here(w['lamp'])):
+            return self.lampRecharge()
+        if g.limit == 0:
+            return self.lampOut()
+        if g.limit < 0 and g.loc <= 8:
+            self.lampOutQuit() # Game ends.
+        if g.limit <= 30:
+            return self.lampNeedBatteries()
+        return self.parseWords()
+
+    def getHint(self, hint, then):
+        '''
+        Hints
+
+        Come here if he's been long enough at required loc(s) for some unused
+        hint.  Hint number is in variable "hint".  Branch to quick test for
+        additional conditions, then come back to do neat stuff.  Goto 40010 if
+        conditions are met and we want to offer the hint.  Goto 40020 to clear
+        hintlc back to zero, 40030 to take no action yet.  If the hint's
+        offered, it's back to then once he's answered, else None.
+        '''
+
+        g = self.g
+
+        # Now for the quick tests.  See database description for one-line
+        # notes.
+        match hint:
+            case 4: # Cave
+                if g.prop[w['grate']] != 0 or self.here(w['keys']):
+                    g.hintlc[hint] = 0
+                    return
+            case 5: # Bird
+                if not (self.here(w['bird']) and self.toting(w['rod'])
+                    and g.oldobj == w['bird']):
+                    return
+            case 6: # Snake
+                if not self.here(w['snake']) or self.here(w['bird']):
+                    g.hintlc[hint] = 0
+                    return
+            case 7: # Maze
+                if (g.atloc[g.loc] != 0 or g.atloc[g.oldloc] != 0
+                    or g.atloc[g.oldlc2] != 0 or g.holdng <= 1):
+                    g.hintlc[hint] = 0
+                    return
+            case 8: # Dark
+                if not (g.prop[w['emrald']] != -1
+                    and g.prop[w['pyram']] == -1):
+                    g.hintlc[hint] = 0
+                    return
+            case 9: # Witt
+                pass
+            case _:
+                self.bug(27) # Hint number exceeds goto list.
+
+        g.hintlc[hint] = 0
+        return self.yes(cave['hints'][hint][3],0,54,
+            (Game.hintOffered, hint, then))
+
+    def hintOffered(self, hint, then, reply):
+        # Line 40010.  Did he want to know more?
+        if not reply:
+            return then
+        self.print('\n I AM PREPARED TO GIVE YOU A HINT, BUT IT WILL COST YOU',
+            '%2d POINTS.' % cave['hints'][hint][2])
+        return self.yes(175, cave['hints'][hint][4], 54, # WANT THE HINT?
+            (Game.hintTaken, hint, then))
+
+    def hintTaken(self, hint, then, reply):
+        g = self.g
+
+        g.hinted[hint] = reply
+        if g.hinted[hint] and g.limit > 30:
+            g.limit += 30*cave['hints'][hint][2]
+        g.hintlc[hint] = 0
+        return then
+
+    def getin(self, then, five=False, reply=None):
+
+    #  Get a command from the adventurer.  Snarf out the first word, pad it
+    #  with blanks, and return it in word1.  Chars 6 thru 10 are returned in
+    #  word1x, in case we need to print out the whole word in an error message.
+    #  Any number of blanks may follow the word.  If a second word appears, it
+    #  is returned in word2 (chars 6 thru 10 in word2x), else word2 is set to
+    #  zero.  The four are the reply passed on to then.
+
+        if reply is None:
+            return (Game.ask, ' ', (Game.getin, then, five))
+        word1 = word1x = word2 = word2x = ''
+        word = reply.strip().upper().split() # Expecting 1 or 2 words.
+        n = len(word)
+        if n > 2:
+            self.print('\n PLEASE STICK TO 1- AND 2-WORD COMMANDS.\n')
+            return self.getin(then, five)
+        fmt = '%5s' if five else '%s'
+        if n == 2:
+            w = word[1]
+            word2  = fmt % w[:5]
+            word2x = fmt % w[5:]
+        if n >= 1:
+            w = word[0]
+            word1  = fmt % w[:5]
+            word1x = fmt % w[5:]
+        if n == 0:
+            return self.getin(then, five)
+        return then + ((word1, word1x, word2, word2x),)
+
+    def goBack(self, kk):
+        # Handle "GO BACK".  Look for verb which goes from loc to oldloc, or to
+        # oldlc2 if oldloc has forced-motion.  K2 saves entry -> forced loc ->
+        # previous loc.
+
+        # Line 20
+        g = self.g
+        k = g.oldloc
+        if forced(k):
+            k = g.oldlc2
+        g.oldlc2 = g.oldloc
+        g.oldloc = g.loc
+        k2 = 0
+        if k == g.loc:
+            self.rspeak(91) # I NO LONGER REMEMBER HOW YOU GOT HERE.
+            return GOTO2
+        while True:
+            ll = (abs(cave['travel'][kk])//1000)%1000
+            if ll == k:
+                k = abs(cave['travel'][kk])%1000
+                return (Game.newLocation, 9, k, -1)
+            if ll <= 300:
+                j = cave['key'][ll]
+                if forced(ll) and (abs(cave['travel'][j])//1000)%1000 == k:
+                    k2 = kk
+            if cave['travel'][kk] < 0:
+                break
+            kk += 1
+        kk = k2
+        if kk == 0:
+            self.rspeak(140) # YOU CAN'T GET THERE FROM HERE.
+            return GOTO2
+        k = abs(cave['travel'][kk])%1000
+        return (Game.newLocation, 9, k, -1)
+
+    def hours(self):
+
+    #  Announce the current hours when the cave is open for adventuring.  This
+    #  info is stored in wkday, wkend, and holid, where bit shift(1,n) is on
+    #  iff the hour from n:00 to n:59 is "prime time" (cave closed).  Wkday is
+    #  for weekdays, wkend for weekends, holid for holidays.  Next holiday is
+    #  from hbegin to hend.
+
+        self.print('')
+        self.hoursx(self.wizcom['wkday'],'MON -',' FRI:')
+        self.hoursx(self.wizcom['wkend'],'SAT -',' SUN:')
+        self.hoursx(self.wizcom['holid'],'HOLID','AYS: ')
+        d,t = self.clock()
+        if (self.wizcom['hend'] < d
+            or self.wizcom['hend'] < self.wizcom['hbegin']):
+            return
+        if self.wizcom['hbegin'] <= d:
+            self.print('\n TODAY IS A HOLIDAY, NAMELY %s'
+                % self.wizcom['hname'])
+            return
+        d = self.wizcom['hbegin'] - d
+        t = 'DAYS, '
+        if d == 1:
+            t = 'DAY, '
+        self.print('\n THE NEXT HOLIDAY WILL BE IN%3d %5s NAMELY %s'
+            % (d,t,self.wizcom['hname']))
+
+    def hoursShow(self):
+        # HOURS.  Report current non-prime-time hours.
+
+        self.mspeak(6) # COLOSSAL CAVE IS OPEN AT THE FOLLOWING HOURS:
+        self.hours()
+        return NEWTURN[0]
+
+    def hoursx(self, h,day1,day2):
+        '''
+        Used by hours (above) to print hours for either weekdays or weekends.
+        '''
+
+        first = True 
+        frm = -1
+        if h == 0:
+            self.print('          %-5s%-5s  OPEN ALL DAY' % (day1,day2))
+            return
+        while True:
+            frm = frm + 1
+            if (h & (1<<frm)) != 0:
+                continue
+            if frm >= 24:
+                break
+            till = frm
+            while True:
+                till += 1
+                if not ((h & (1<<till)) == 0 and till != 24):
+                    break
+            self.print('          %-5s%-5s%4d:00 TO%3d:00'
+                % (day1,day2,frm,till))
+            self.print('%20s%4d:00 TO%3d:00' % (' ',frm,till))
+            first =  False 
+            frm = till
+        if first:
+            self.print('          %-5s%-5s  CLOSED ALL DAY'% (day1,day2))
+
+    def indexBuild(self):
+        '''
+        Recompute what's derived from place, atloc and link after loading a
+        game: the set of toted objects, which isn't saved, and the back links,
+        which games suspended before there were any don't have.
+        '''
+
+        g = self.g
+
+        g.toted = {i for i in range(1, 100+1) if self.toting(i)}
+        g.blink[:] = array('h', 201*[0])
+        for i in range(1, cave['locsiz']+1):
+            prev = 0
+            obj = g.atloc[i]
+            while obj != 0:
+                g.blink[obj] = prev
+                prev = obj
+                obj = g.link[obj]
+
+    def inputCheck(self, then, s=' ', dtype=str, emptyOk=False, reply=None):
+        # Ask with prompt s for a dtype, which is passed on to then.
+        if reply is None:
+            return (Game.ask, s, (Game.inputCheck, then, s, dtype, emptyOk))
+        try:
+            reply = reply.strip()
+            if reply == '':
+                if emptyOk:
+                    if   dtype == bool: v = False
+                    elif dtype == int:  v = 0
+                    elif dtype == str:  v = ''
+                    return then + (v,)
+                return self.inputCheck(then, s, dtype, emptyOk)
+            return then + (dtype(reply),)
+        except ValueError:
+            t = str(dtype)
+            t = t[1+t.find("'"):] # Extract, e.g., int from "<class 'int'>".
+            t = t[:t.rfind("'")]
+            if t=='INT': t = 'INTEGER'
+            self.print(' %s NEEDED.' % t.upper())
+            return self.inputCheck(then, s, dtype, emptyOk)
+
+    def intransitive(self, spk):
+
+        # Analyse an intransitive verb (ie, no object given yet).  The goto
+        # list at line 4080 is INTRANSITIVE, indexed by verb.
+
+        verb = self.g.verb
+        return INTRANSITIVE[verb](self, verb, spk)
+
+    def inventory(self):
+        #  INVENTORY.  If object, treat same as find.  Else report on current
+        #  burden.
+
+        g = self.g
+        spk = 98
+        for i in sorted(g.toted):
+            if i == w['bear']:
+                continue
+            if spk == 98:
+                self.rspeak(99) # YOU ARE CURRENTLY HOLDING THE FOLLOWING:
+            g.blklin = False
+            self.pspeak(i, -1)
+            g.blklin = True
+            spk = 0
+        if self.toting(w['bear']):
+            spk = 141 # YOU ARE BEING FOLLOWED BY A VERY LARGE, TAME BEAR.
+        return NEWTURN[spk]
+
+    def juggle(self, obj):
+        '''
+        Juggle an object by picking it up and putting it down again, the
+        purpose being to get the object to the front of the chain of things at
+        its loc.
+        '''
+
+        g = self.g
+
+        i = g.place[obj]
+        j = g.fixed[obj]
+        self.move(obj, i)
+        self.move(obj+100, j)
+
+    def lampNeedBatteries(self):
+        # Line 12200
+        g = self.g
+        if g.lmwarn or not self.here(w['lamp']):
+            return self.parseWords()
+        g.lmwarn = True
+        spk = 187 # GO BACK FOR THOSE BATTERIES.
+        if g.place[w['batter']] == 0:
+            spk = 183 # START WRAPPING THIS UP...or FIND SOME FRESH BATTERIES.
+        if g.prop[w['batter']] == 1:
+            spk = 189 # OUT OF SPARE BATTERIES.
+        self.rspeak(spk)
+        return self.parseWords()
+
+    def lampOff(self, spk):
+        # Lamp off
+        g = self.g
+        if not self.here(w['lamp']):
+            return NEWTURN[spk]
+        g.prop[w['lamp']] = 0
+        self.rspeak(40) # YOUR LAMP IS NOW OFF.
+        if self.dark():
+            self.rspeak(16) # IT IS NOW PITCH DARK.
+        return NEWTURN[0]
+
+    def lampOn(self, spk):
+        # Light lamp
+        g = self.g
+        if not self.here(w['lamp']):
+            return NEWTURN[spk]
+        spk = 184
+        if g.limit < 0:
+            return NEWTURN[spk]
+        g.prop[w['lamp']] = 1
+        self.rspeak(39) # YOUR LAMP IS NOW ON.
+        if g.wzdark:
+            self.location()
+        return NEWTURN[0]
+
+    def lampOut(self):
+        # Line 12400
+        g = self.g
+        g.limit = -1
+        g.prop[w['lamp']] = 0
+        if self.here(w['lamp']):
+            self.rspeak(184) # YOUR LAMP HAS RUN OUT OF POWER.
+        return self.parseWords()
+
+    def lampOutQuit(self):
+        # Line 12600
+        g = self.g
+
+        self.rspeak(185) # NOT MUCH POINT IN WANDERING AROUND WITHOUT A LAMP.
+        g.gaveup = True
+        self.finish()
+
+    def lampRecharge(self):
+        '''
+        Another way we can force an end to things is by having the lamp give
+        out.  When it gets close, we come here to warn him.  We go to 12000 if
+        the lamp and fresh batteries are here, in which case we replace the
+        batteries and continue.  12200 is for other cases of lamp dying.  12400
+        is when it goes out, and 12600 is if he's wandered outside and the lamp
+        is used up, in which case we force him to give up.
+        '''
+
+        # Line 12000
+        g = self.g
+        self.rspeak(188) # YOUR LAMP IS GETTING DIM...REPLACING BATTERIES.
+        g.prop[w['batter']] = 1
+        if self.toting(w['batter']):
+            self.drop(w['batter'],g.loc)
+        g.limit += 2500
+        g.lmwarn = False
+        return self.parseWords()
+
+    def location(self):
+        # Describe the current location and (maybe) get next command.
+
+        g = self.g
+
+        # Print text for current loc.
+        if g.loc == 0:
+            return self.dead(pit=False) # He's dead.
+        kk = cave['stext'][g.loc]
+        if g.abb[g.loc]%g.abbnum == 0 or kk == 0:
+            kk = cave['ltext'][g.loc]
+        if not (forced(g.loc) or not self.dark()):
+            if g.wzdark and self.rng.pct(35):
+                return self.dead()
+            kk = cave['rtext'][16] # IT IS NOW PITCH DARK
+        if self.toting(w['bear']):
+            self.rspeak(141) # FOLLOWED BY A VERY LARGE, TAME BEAR
+        self.speak(kk)
+        k = 1
+        if forced(g.loc):
+            return (Game.newLocation, 8, k, -1)
+        # 1/4 chance at Y2.
+        if g.loc == 33 and self.rng.pct(25) and not g.closng:
+            self.rspeak(8) # HOLLOW VOICE SAYS "PLUGH"
+
+        # Print out descriptions of objects at this location.  If not closing
+        # and property value is negative, tally off another treasure.  Rug is
+        # special case; once seen, its prop is 1 (dragon on it) till dragon is
+        # killed.  Similarly for chain; prop is initially 1 (locked to bear).
+        # These hacks are because prop = 0 is needed to get full score.
+
+        if self.dark():
+            return NEWTURN[0]
+        g.abb[g.loc] += 1
+        i = g.atloc[g.loc]
+        obj = 0 # Added by mm.
+        while True:
+            if i == 0:
+                return NEWTURN[0]
+            obj = i
+            if obj > 100:
+                obj -= 100
+            if obj == w['steps'] and self.toting(w['nugget']):
+                i = g.link[i]
+                continue
+            else:
+                if g.prop[obj] < 0:
+                    if g.closed:
+                        i = g.link[i]
+                        continue
+                    g.prop[obj] = 0
+                    if obj == w['rug'] or obj == w['chain']:
+                        g.prop[obj] = 1
+                    g.tally -= 1
+                    # If remaining treasures too elusive, zap his lamp.
+                    if g.tally == g.tally2 and g.tally != 0:
+                        g.limit = min(35, g.limit)
+                kk = g.prop[obj]
+                if obj == w['steps'] and g.loc == g.fixed[w['steps']]:
+                    kk = 1
+                self.pspeak(obj, kk)
+                i = g.link[i]
+
+    def locking(self, intransitive=True):
+        #  Lock, unlock, no object given.  Assume various things if present.
+        g = self.g
+
+        if intransitive:
+            if self.here(w['clam']):
+                g.obj = w['clam']
+            if self.here(w['oyster']):
+                g.obj = w['oyster']
+            if self.at(w['door']):
+                g.obj = w['door']
+            if self.at(w['grate']):
+                g.obj = w['grate']
+            if g.obj != 0 and self.here(w['chain']):
+                return self.what()
+            if self.here(w['chain']):
+                g.obj = w['chain']
+            if g.obj == 0:
+                spk = 28 # THERE IS NOTHING HERE WITH A LOCK!
+                return NEWTURN[spk]
+
+        # Lock, unlock object.  Special stuff for opening clam/oyster and for
+        # chain.
+
+        if g.obj == w['clam'] or g.obj == w['oyster']: # Clam/oyster.
+            k = 0
+            if g.obj == w['oyster']:
+                k = 1
+            spk = 124+k
+            if self.toting(g.obj):
+                spk = 120+k # PUT DOWN CLAM/OYSTER BEFORE OPENING IT.
+            if not self.toting(w['tridnt']):
+                spk = 122+k # NOTHING STRONG ENOUGH TO OPEN CLAM/OYSTER.
+            if g.verb == w['lock']:
+                spk = 61 # WHAT?
+            if spk != 124: # GLISTENING PEARL FALLS OUT OF CLAM AND ROLLS AWAY.
+                return NEWTURN[spk]
+            self.dstroy(w['clam'])
+            self.drop(w['oyster'],g.loc) # Give it its proper name!
+            # Roll pearl to cul-de-sac, 2 rooms from oyster.
+            self.drop(w['pearl'],105)
+            return NEWTURN[spk]
+        if g.obj == w['door']:
+            spk = 111 # DOOR IS EXTREMELY RUSTY AND REFUSES TO OPEN.
+        if g.obj == w['door'] and g.prop[w['door']] == 1:
+            spk = 54 # OK
+        if g.obj == w['cage']:
+            spk = 32 # IT HAS NO LOCK.
+        if g.obj == w['keys']:
+            spk = 55 # YOU CAN'T UNLOCK THE KEYS.
+        if g.obj == w['grate'] or g.obj == w['chain']:
+            spk = 31 # YOU HAVE NO KEYS!
+        if spk != 31 or not self.here(w['keys']):
+            return NEWTURN[spk]
+        if g.obj == w['chain']: # Chain.
+            if g.verb == w['lock']:
+                spk = 172 # THE CHAIN IS NOW LOCKED.
+                if g.prop[w['chain']] != 0:
+                    spk = 34 # IT WAS ALREADY LOCKED.
+                if g.loc != cave['plac'][w['chain']]:
+                    spk = 173 # NOTHING HERE TO WHICH THE CHAIN CAN BE LOCKED.
+                if spk != 172:
+                    return NEWTURN[spk]
+                g.prop[w['chain']] = 2
+                if self.toting(w['chain']):
+                    self.drop(w['chain'],g.loc)
+                g.fixed[w['chain']] = -1
+                return NEWTURN[spk]
+            spk = 171 # THE CHAIN IS NOW UNLOCKED.
+            if g.prop[w['bear']] == 0:
+                spk = 41 # NO WAY TO GET PAST THE BEAR
+            if g.prop[w['chain']] == 0:
+                spk = 37 # IT WAS ALREADY UNLOCKED.
+            if spk != 171: # THE CHAIN IS NOW UNLOCKED.
+                return NEWTURN[spk]
+            g.prop[w['chain']] = 0
+            g.fixed[w['chain']] = 0
+            if g.prop[w['bear']] != 3: # ==3, dead bear.
+                g.prop[w['bear']] = 2 # Free.
+            g.fixed[w['bear']] = 2 - g.prop[w['bear']]
+            return NEWTURN[spk]
+        if not g.closng:
+            k = 34 + g.prop[w['grate']] # GRATE NOW LOCKED/WAS LOCKED.
+            g.prop[w['grate']] = 1 # Unlocked.
+            if g.verb == w['lock']:
+                g.prop[w['grate']] = 0 # Locked.
+            k += 2*g.prop[w['grate']]
+            return NEWTURN[k]
+        if not g.panic:
+            g.clock2 = 15
+        g.panic = True
+        k = 130 # THIS EXIT IS CLOSED.
+        return NEWTURN[k]
+
+    def lookAround(self):
+        # LOOK.  Can't give more detail.  Pretend it wasn't dark (though it may
+        # "now" be dark) so he won't fall into a pit while staring into the
+        # gloom.
+
+        g = self.g
+        if g.detail < 3:
+            self.rspeak(15) # I AM NOT ALLOWED TO GIVE MORE DETAIL.
+        g.detail += 1
+        g.wzdark = False
+        g.abb[g.loc] = 0
+        return GOTO2 #goto 2
+
+    def maint(self, step=0, reply=None):
+
+        '''
+        Someone said the magic word to invoke maintenance mode.  Make sure he's
+        a wizard.  If so, let him tweak all sorts of random things, then exit
+        so can save tweaked version.  Since magic word must be first command
+        given, only thing which needs to be fixed up is abb(1).  Each step
+        takes the reply to the question the one before it asked.
+        '''
+
+        g = self.g
+        then = (Game.maint, step+1)
+
+        match step:
+            case 0:
+                return self.wizard(then)
+            case 1:
+                if not reply:
+                    return NEWTURN[0]
+                g.blklin = False 
+                return self.yesm(10,0,0, then) # DO YOU WISH TO SEE THE HOURS?
+            case 2:
+                if reply:
+                    self.hours()
+                # DO YOU WISH TO CHANGE THE HOURS?
+                return self.yesm(11,0,0, then)
+            case 3:
+                if reply:
+                    return self.newhrs(then)
+                return self.maint(4)
+            case 4:
+                # DO YOU WISH TO (RE)SCHEDULE THE NEXT HOLIDAY?
+                return self.yesm(26,0,0, then)
+            case 5:
+                if not reply:
+                    return self.maint(9)
+                self.mspeak(27) # TO BEGIN HOW MANY DAYS FROM TODAY?
+                return self.inputCheck(then, dtype=int)
+            case 6:
+                self.wizcom['hbegin'] = reply
+                self.mspeak(28) # TO LAST HOW MANY DAYS (ZERO IF NO HOLIDAY)?
+                return self.inputCheck(then, dtype=int)
+            case 7:
+                self.wizcom['hend'] = reply
+                d,t = self.clock()
+                self.wizcom['hbegin'] += d
+                self.wizcom['hend'] += self.wizcom['hbegin'] - 1
+                self.mspeak(29) # TO BE CALLED WHAT (UP TO 20 CHARACTERS)?
+                return self.inputCheck(then)
+            case 8:
+                self.wizcom['hname'] = reply.upper()
+                return self.maint(9)
+            case 9:
+                s = (' LENGTH OF SHORT GAME (NULL TO LEAVE AT%3d): '
+                    % self.wizcom['short'])
+                return self.inputCheck(then, s, dtype=int, emptyOk=True)
+            case 10:
+                if reply > 0:
+                    self.wizcom['short'] = reply
+                # NEW MAGIC WORD (NULL TO LEAVE UNCHANGED):
+                self.mspeak(12, nl=False)
+                return self.inputCheck(then, emptyOk=True)
+            case 11:
+                if reply != '':
+                    self.wizcom['magic'] = reply
+                # NEW MAGIC NUMBER (NULL TO LEAVE UNCHANGED):
+                self.mspeak(13, nl=False)
+                return self.inputCheck(then, dtype=int, emptyOk=True)
+            case 12:
+                if reply > 0:
+                    self.wizcom['magnm'] = reply
+                s = (' LATENCY FOR RESTART (NULL TO LEAVE AT%3d): '
+                    % self.wizcom['latncy'])
+                return self.inputCheck(then, s, dtype=int, emptyOk=True)
+            case 13:
+                if 0 < reply < 45:
+                    # TOO SMALL!  ASSUMING MINIMUM VALUE (45 MINUTES).
+                    self.mspeak(30)
+                if reply > 0:
+                    self.wizcom['latncy'] = max(45, reply)
+                # DO YOU WISH TO CHANGE THE MESSAGE OF THE DAY?
+                return self.yesm(14,0,0, then)
+            case 14:
+                if reply:
+                    return self.motd(True, then)
+        g.saved = 0
+        g.setup = 2
+        g.abb[1] = 0
+        self.mspeak(15) # OKAY.  YOU CAN SAVE THIS VERSION NOW.
+        g.blklin= True 
+        f = open('hours', 'w')
+        for k in self.wizcom.keys():
+            print('%s %s' % (k, str(self.wizcom[k])), file=f)
+        f.close()
+        self.ciao('maintained')
+
+    def motd(self, alter, then=None, msg='', reply=None):
+        '''
+        Handles message of the day.  If alter is true, read a new message from
+        the wizard a line at a time, then go on to then.  Else print the
+        current one.  Message is initially null.
+        '''
+
+        if not alter:
+            if self.wizcom['motd'] != '':
+                self.print(' %s' % self.wizcom['motd'])
+            return
+        if reply is None:
+            self.mspeak(23) # LIMIT LINES TO 70 CHARS.  END WITH NULL LINE.
+        else:
+            line = reply.upper()
+            if len(line) > 70:
+                self.mspeak(24) # LINE TOO LONG, RETYPE:
+            elif line == '':
+                self.wizcom['motd'] = msg
+                return then
+            elif len(msg)+len(line) >= 100: # Limit motd to 100 chars.
+                self.mspeak(25) # NOT ENOUGH ROOM FOR ANOTHER LINE...
+                self.wizcom['motd'] = msg
+                return then
+            else:
+                msg += line
+        return self.inputCheck((Game.motd, True, then, msg), emptyOk=True)
+
+    def motionsSpecial(self, k, kk):
+        # Special motions come here.  Labelling convention: statement
+        # numbers nnnxx (xx = 00-99) are used for special case number
+        # nnn (nnn = 301-500).  K is the motion verb and kk the index of the
+        # travel option that brought us here.
+
+        g = self.g
+
+        match g.newloc-300: # goto (30100,30200,30300)newloc
+            case 1: # loc is either 99/alcove or 100/plover.
+                # Travel 301.  Plover-alcove passage.  Can carry only emerald.
+                # Note: travel table must include "useless" entries going
+                # through passage, which can never be used for actual motion,
+                # but can be spotted by "go back".
+    #           g.newloc = 99 + 100 - g.loc
+                g.newloc = 99 if g.loc==100 else 100 # Go to other end.
+                # Holding nothing or only emerald.
+                if (g.holdng == 0
+                    or (g.holdng == 1 and self.toting(w['emrald']))):
+                    return GOTO2 # goto 2
+                g.newloc = g.loc # Don't move.
+                self.rspeak(117) # WON'T FIT THROUGH THE TUNNEL WITH YOU.
+                return GOTO2 # goto 2
+            case 2:
+                # Travel 302.  Plover transport.  Drop the emerald (only use
+                # special travel if toting it), so he's forced to use the
+                # plover-passage to get it out.  Having dropped it, go back and
+                # pretend he wasn't carrying it after all.
+                self.drop(w['emrald'],g.loc)
+                return (Game.newLocation, 12, k, kk)
+            case 3:
+                # Travel 303.  Troll bridge.  Must be done only as special
+                # motion so that dwarves won't wander across and encounter the
+                # bear.  (They won't follow the player there because that
+                # region is forbidden to the pirate.)  If prop(troll) = 1, he's
+                # crossed since paying, so step out and block him.  (Standard
+                # travel entries check for prop(troll) = 0.)  Special stuff for
+                # bear.
+                if g.prop[w['troll']] != 1:
+                    g.newloc = (cave['plac'][w['troll']]
+                        + cave['fixd'][w['troll']] - g.loc)
+                    if g.prop[w['troll']] == 0:
+                        g.prop[w['troll']] = 1
+                    if not self.toting(w['bear']):
+                        return GOTO2 # goto 2
+                    # YOU STUMBLE BACK AND FALL INTO THE CHASM.
+                    self.rspeak(162)
+                    g.prop[w['chasm']] = 1
+                    g.prop[w['troll']] = 2
+                    self.drop(w['bear'], g.newloc)
+                    g.fixed[w['bear']] = -1 # Destroy bear.
+                    g.prop[w['bear']] = 3   # Dead bear.
+                    if g.prop[w['spices']] < 0:
+                        g.tally2 += 1       # Cannot find spices again.
+                    g.oldlc2 = g.newloc
+                    return self.dead()
+                self.pspeak(w['troll'], 1) # No msg, chased away.
+                g.prop[w['troll']] = 0
+                self.move(w['troll2'], 0)
+                self.move(w['troll2']+100, 0)
+                self.move(w['troll'], cave['plac'][w['troll']])
+                self.move(w['troll']+100, cave['fixd'][w['troll']])
+                self.juggle(w['chasm'])
+                g.newloc = g.loc
+                return GOTO2 # goto 2
+            case _:
+                self.bug(20) # Special travel (500>l>300) exceeds goto list.
+
+    def move(self, obj,where):
+
+        '''
+        Place any object anywhere by picking it up and dropping it.  May
+        already be toting, in which case the carry is a no-op.  Mustn't pick up
+        objects which are not at any loc, since carry wants to remove objects
+        from atloc chains.
+        '''
+
+        g = self.g
+
+        if obj <= 100:
+            frm = g.place[obj]
+        else:
+            frm = g.fixed[obj-100]
+        if 0 < frm <= 300:
+            self.carry(obj, frm)
+        self.drop(obj, where)
+
+    def newhrs(self, then, step=0, reply=None):
+        '''
+        Set up new hours for the cave.  Specified as inverse--i.e., when is it
+        closed due to prime time?  See hours (above) for desc of variables.
+        Each step takes the hours newhrx read for the one before it.
+        '''
+
+        again = (Game.newhrs, then, step+1)
+
+        match step:
+            case 0:
+                self.mspeak(21)
+                return self.newhrx(again, 'WEEKD','AYS:')
+            case 1:
+                self.wizcom['wkday'] = reply
+                return self.newhrx(again, 'WEEKE','NDS:')
+            case 2:
+                self.wizcom['wkend'] = reply
+                return self.newhrx(again, 'HOLID','AYS:')
+        self.wizcom['holid'] = reply
+        self.mspeak(22)
+        self.hours()
+        return then
+
+    def newhrx(self, then, day1,day2, newhrx=None, frm=None, reply=None):
+        '''
+        Input prime time specs and set up a word of internal format, which is
+        passed on to then.  Frm is the FROM: hour once he's given it.
+        '''
+
+        if newhrx is None:
+            newhrx = 0
+            self.print(' PRIME TIME ON %-5s%-5s' % (day1,day2))
+        elif frm is None:
+            frm = reply
+            if not (0 <= frm < 24):
+                return then + (newhrx,)
+            return self.inputCheck((Game.newhrx, then, day1,day2, newhrx, frm),
+                ' TILL: ', dtype=int)
+        else:
+            till = reply
+            till -= 1
+            if not (frm <= till < 24):
+                return then + (newhrx,)
+            for i in range(frm, till+1):
+                newhrx |= 1<<i
+        return self.inputCheck((Game.newhrx, then, day1,day2, newhrx, None),
+            ' FROM: ', dtype=int)
+
+    def newLocation(self, goto, k, kk=-1):
+        '''
+        Figure out the new location
+
+        Given the current location in "loc", and a motion verb number in "k",
+        put the new location in "newloc".  The current loc is saved in "oldloc"
+        in case he wants to retreat.  The current oldloc is saved in oldlc2, in
+        case he dies.  (If he does, newloc will be limbo, and oldloc will be
+        what killed him, so we need oldlc2, which is the last place he was
+        safe.)
+
+        The travel options for k at loc come precompiled from moves (see
+        dbBuild and travelRules) and are tried in order until one's condition
+        is met.  Kk is the index of the option being tried, so that after
+        special code (goto 12) we can carry on with the next one.
+        '''
+
+        g = self.g
+        if goto == 8:
+            # Line 8
+            g.newloc = g.loc
+            if cave['key'][g.loc] == 0:
+                self.bug(26) # Location has no travel entries.
+            if k == w['null']:
+                return GOTO2 # goto 2
+            elif k == w['back']:
+                return self.goBack(cave['key'][g.loc])
+            elif k == w['look']:
+                self.lookAround() # goto 2
+                return GOTO2 # goto 2
+            elif k == w['cave']:
+                self.caveMsg() # goto 2
+                return GOTO2 # goto 2
+            g.oldlc2 = g.oldloc
+            g.oldloc = g.loc
+
+        rules = cave['moves'].get((g.loc,k)) or cave['moves'].get((g.loc,1))
+        if goto <= 9:
+            # Line 9
+            if rules is None:
+                return self.badMotion(k)
+            kk = 0
+        else:
+            # Line 12.  Special code wants the next option after the current
+            # one.
+            kk += 1
+
+        while True: # Check for conditional travel.  Lines 11 to 14.
+            if kk == len(rules):
+                self.bug(25) # Conditional travel entry with no alternative.
+            test, obj, val, dest = rules[kk]
+            if test == 0:                           # Unconditional.
+                break
+            if test == 1 and self.rng.pct(obj):     # obj% probability.
+                break
+            if test == 2 and self.toting(obj):      # Carrying obj.
+                break
+            # Carrying or here.
+            if test == 3 and (self.toting(obj) or self.at(obj)):
+                break
+            if test == 4 and g.prop[obj] != val:    # Prop not val.
+                break
+            kk += 1
+
+        g.newloc = dest # Line 16
+        if g.newloc <= 300:
+            return GOTO2 # goto 2
+        if g.newloc <= 500:
+            return self.motionsSpecial(k, kk)
+        self.rspeak(g.newloc-500)
+        g.newloc = g.loc
+        return GOTO2 # goto 2
+
+    def newTurn(self, verb, spk=54): # 54 is number for OK.
+        g = self.g
+
+        if spk > 0:
+            self.rspeak(spk)
+        if spk > -1: # A poor way to implement GOTO 2012.
+            verb = 0 # Line 2012
+            g.oldobj = g.obj
+            g.obj = 0
+
+        # Check if this loc is eligible for any hints.  If been here long
+        # enough, branch to help section (on later page).  Hints all come back
+        # here eventually to finish the loop.  Ignore "hints" < 4 (special
+        # stuff, see database notes).
+        return self.hints(verb, 4)
+
+    def hints(self, verb, first):
+        # The rest of newTurn, from hint first on.  Hints he's offered come
+        # back here for the next.
+        g = self.g
+
+        # Many GOTO 2600
+        for hint in range(first, cave['hntmax']+1): # Line 2600
+            if g.hinted[hint]:
+                continue
+            if not bitset(g.loc,hint):
+                g.hintlc[hint] = -1
+            g.hintlc[hint] += 1
+            if g.hintlc[hint] >= cave['hints'][hint][1]:
+                d = self.getHint(hint,
+                    (Game.hints, verb, hint+1))
+                if d is not None:
+                    return d
+
+        #  Kick the random number generator just to add variety to the chase.
+        #  Also, if closing time, check for any objects being toted with prop <
+        #  0 and set the prop to -1-prop.  This way objects won't be described
+        #  until they've been picked up and put down separate from their
+        #  respective piles.  Don't tick clock1 unless well into cave (and not
+        #  at Y2).
+
+        if g.closed:
+            if g.prop[w['oyster']] < 0 and self.toting(w['oyster']):
+                # SOMETHING WRITTEN ON UNDERSIDE OF OYSTER.
+                self.pspeak(w['oyster'], 1)
+            for i in g.toted:
+                if g.prop[i] < 0:
+                    g.prop[i] = -1 - g.prop[i]
+        g.wzdark = self.dark()
+        if g.knfloc > 0 and g.knfloc != g.loc:
+            g.knfloc = 0
+        self.rng.random()
+        return self.getin((Game.command, verb))
+
+    def command(self, verb, reply):
+        # At last, what he wants to do.
+        g = self.g
+
+        g.wd1,g.wd1x,g.wd2,g.wd2x = reply
+        return self.foobarEtc(verb)
+
+    def objectsAt(self, loc):
+        '''
+        Objects whose place is loc, from the atloc list (so leaving out the
+        obj>100 entries for second locs of fixed objects).
+        '''
+
+        g = self.g
+        objs = []
+        obj = g.atloc[loc]
+        while obj != 0:
+            if obj <= 100:
+                objs.append(obj)
+            obj = g.link[obj]
+        return objs
+
+    def parseWords(self):
+        # Line 19999
+        g = self.g
+        k = 43 # WHERE?
+        if liqloc(g.loc) == w['water']:
+            k = 70 # YOUR FEET ARE NOW WET.
+        if g.wd1 == 'ENTER' and (g.wd2 in ['STREA', 'WATER']):
+            return NEWTURN[k]
+        if g.wd1 == 'ENTER' and g.wd2 != '':
+            return self.secondWord() # Move wd2 to wd1.
+        if (g.wd1 in ['WATER', 'OIL'] and g.wd2 in ['PLANT', 'DOOR']
+            and self.at(vocab(g.wd2,1))): # Use liquid name as verb POUR.
+            g.wd2 = 'POUR'
+        self.westOrW()
+        return self.analyseWord()
+
+    def postDbInit(self):
+        # Finish constructing internal data format
+        g = self.g
+
+        # If setup = 2 we don't need to do this.  It's only necessary if we
+        # haven't done it at all or if the program has been run since then.
+        if g.setup == 2:
+            return
+
+        # Having read in the database, certain things are now constructed.
+        # Props are set to zero.  (Cond was finished off by dbBuild.)  The
+        # plac and fixd arrays are used to set up atloc[n] as the first
+        # object at location n, and link[obj] as the next object at the
+        # same location as obj, with blink[obj] the one before it (0 if
+        # first).  (Obj>100 indicates that fixed(obj-100) = loc; link[obj]
+        # is still the correct link to use.)  Abb is zeroed; it controls
+        # whether the abbreviated description is printed.  Counts mod 5
+        # unless "look" is used.
+        for i in range(1, 100+1):
+            g.place[i] = 0
+            g.prop[i] = 0
+            g.toted.discard(i)
+            g.link[i] = 0
+            g.link[i+100] = 0
+            g.blink[i] = 0
+            g.blink[i+100] = 0
+        for i in range(1, cave['locsiz']+1):
+            g.abb[i] = 0
+            g.atloc[i] = 0
+
+        #  Set up the atloc and link arrays as described above.  We'll use the
+        #  drop subroutine, which prefaces new objects on the lists.  Since we
+        #  want things in the other order, we'll run the loop backwards.  If
+        #  the object is in two locs, we drop it twice.  This also sets up
+        #  "place" and "fixed" as copies of "plac" and "fixd".  Also, since
+        #  two-placed objects are typically best described last, we'll drop
+        #  them first.
+        for i in range(1, 100+1):
+            k = 101 - i
+            if cave['fixd'][k] <= 0:
+                continue
+            self.drop(k+100, cave['fixd'][k])
+            self.drop(k, cave['plac'][k])
+        for i in range(1, 100+1):
+            k = 101 - i
+            g.fixed[k] = cave['fixd'][k]
+            if cave['plac'][k] != 0 and cave['fixd'][k] <= 0:
+                self.drop(k, cave['plac'][k])
+
+        # Treasures, as noted earlier, are objects 50 through maxtrs (currently
+        # 79).  Their props are initially -1, and are set to 0 the first time
+        # they are described.  Tally keeps track of how many are not yet found,
+        # so we know when to close the cave.  Tally2 counts how many can never
+        # be found (e.g. if lost bird or bridge).
+        g.tally = 0
+        g.tally2 = 0
+        # Go through treasures, which are >50.
+        for i in range(50, cave['maxtrs']+1):
+            if cave['ptext'][i] != 0: # ==0 means no object info here.
+                g.prop[i] = -1 # Treasure not yet found.
+            g.tally -= g.prop[i]
+
+        # Clear the hint stuff.  hintlc[i] is how long he's been at loc with
+        # cond bit i.  hinted[i] is true iff hint i has been used.
+        for i in range(1, cave['hntmax']+1):
+            g.hinted[i] = False
+            g.hintlc[i] = 0
+
+        '''
+        Initialise the dwarves.  Dloc is loc of dwarves, hard-wired in.  Odloc
+        is prior loc of each dwarf, initially garbage.  Daltlc is alternate
+        initial loc for dwarf, in case one of them starts out on top of the
+        adventurer.  (No 2 of the 5 initial locs are adjacent.)  Dseen is true
+        if dwarf has seen him.  Dflag controls the level of activation of all
+        this:
+           0     No dwarf stuff yet (wait until reaches hall of mists)
+           1     Reached hall of mists, but hasn't met first dwarf
+           2     Met first dwarf, others start moving, no knives thrown yet
+           3     A knife has been thrown (first set always misses)
+           3+    Dwarves are mad (increases their accuracy)
+        Sixth dwarf is special (the pirate).  He always starts at his chest's
+        eventual location inside the maze.  This loc is saved in chloc for ref.
+        The dead end in the other maze has its loc stored in chloc2.
+        '''
+        g.chloc = 114 # DEAD END
+        g.chloc2 = 140 # DEAD END
+        g.dseen[1:6+1] = array('b', 6*[False])
+        g.dflag = 0
+        g.dloc[1] = 19 # HALL OF THE MOUNTAIN KING
+        g.dloc[2] = 27 # WEST SIDE OF FISSURE IN HALL OF MISTS
+        g.dloc[3] = 33 # LARGE ROOM "Y2" ON A ROCK
+        g.dloc[4] = 44 # TWISTY LITTLE PASSAGES, ALL ALIKE
+        g.dloc[5] = 64 # COMPLEX JUNCTION LARGE ROOM ABOVE
+        g.dloc[6] = g.chloc
+        g.daltlc = 18 # NUGGET OF GOLD ROOM
+
+        '''
+        Other random flags and counters, as follows:
+         turns   Tallies how many commands he's given (ignores yes/no)
+         limit   Lifetime of lamp (not set here)
+         iwest   How many times he's said "WEST" instead of "W"
+         knfloc  0 if no knife here, loc if knife here, -1 after caveat
+         detail  How often we've said "not allowed to give more detail"
+         abbnum  How often we should print non-abbreviated descriptions
+         maxdie  Number of reincarnation messages available (up to 5)
+         numdie  Number of times killed so far
+         holdng  Number of objects being carried
+         dkill   Number of dwarves killed (unused in scoring, needed for msg)
+         foobar  Current progress in saying "FEE FIE FOE FOO".
+         bonus   Used to determine amount of bonus if he reaches closing
+         clock1  Number of turns from finding last treasure till closing
+         clock2  Number of turns from first warning till blinding flash
+         Logicals were explained earlier
+        '''
+
+        g.abbnum = 5
+        g.bonus  = 0
+        g.clock1 = 30
+        g.clock2 = 50
+        g.closed = False
+        g.closng = False
+        g.demo   = False
+        g.detail = 0
+        g.dkill  = 0
+        g.foobar = 0
+        g.gaveup = False
+        g.holdng = 0
+        g.iwest  = 0
+        g.lmwarn = False
+        g.numdie = 0
+        g.panic  = False
+        g.saved  = 0
+        g.savet  = 0
+        g.scorng = False
+        g.turns  = 0
+        g.wzdark = False
+        g.yea    = False
+        for i in range(4+1):
+            if cave['rtext'][2*i+81] != 0:
+                g.maxdie = i + 1
+
+        # If setup = 1, report on amount of arrays actually used, to permit
+        # reductions.
+    #   if g.setup != 1:
+    #       return
+        g.setup = 2
+
+        for kk in range(cave['locsiz'], 0, -1): # Section 1.
+            if cave['ltext'][kk] != 0:
+                break
+        g.obj = 0
+        for k in range(1, 100+1): # Section 5.
+            if cave['ptext'][k] != 0:
+                g.obj += 1
+        for k in range(1, cave['tabndx']+1): # Section 4.
+            if cave['ktab'][k]//1000 == 2:
+                verb = cave['ktab'][k] - 2000
+        for j in range(cave['rtxsiz'], 0, -1): # Section 6.
+            if cave['rtext'][j] != 0:
+                break
+        for i in range(cave['magsiz'], 0, -1): # Section 12.
+            if cave['mtext'][i] != 0:
+                break
+
+        if False:
+            k = 100
+            self.print(' TABLE SPACE USED:')
+            self.print(' %6d OF %6d WORDS OF MESSAGES'
+                % (cave['linbytes']//5, cave['linsiz']))
+            self.print(' %6d OF %6d TRAVEL OPTIONS'
+                % (cave['trvs'], cave['trvsiz']))
+            self.print(' %6d OF %6d VOCABULARY WORDS'
+                % (cave['tabndx'], cave['tabsiz']))
+            self.print(' %6d OF %6d LOCATIONS' % (kk, cave['locsiz']))
+            self.print(' %6d OF %6d OBJECTS' % (g.obj, k))
+            self.print(' %6d OF %6d ACTION VERBS' % (verb, cave['vrbsiz']))
+            self.print(' %6d OF %6d RTEXT MESSAGES' % (j, cave['rtxsiz']))
+            self.print(' %6d OF %6d CLASS MESSAGES'
+                % (cave['clsses'], cave['clsmax']))
+            self.print(' %6d OF %6d HINTS' % (cave['hntmax'], cave['hntsiz']))
+            self.print(' %6d OF %6d MAGIC MESSAGES' % (i, cave['magsiz']))
+
+        # Finally, since we're clearly setting things up for the first time...
+        self.wizcom = poof()
+
+    def pour(self, spk):
+        #  POUR.  If no object, or object is bottle, assume contents of bottle.
+        #  Special tests for pouring water or oil on plant or rusty door.
+
+        g = self.g
+        if g.obj == w['bottle'] or g.obj == 0:
+            g.obj = self.liq()
+        if g.obj == 0:
+            return self.what()
+        if not self.toting(g.obj):
+            return NEWTURN[spk]
+        spk = 78 # YOU CAN'T POUR THAT.
+        if g.obj != w['oil'] and g.obj != w['water']:
+            return NEWTURN[spk]
+        g.prop[w['bottle']] = 1
+        g.place[g.obj] = 0
+        g.toted.discard(g.obj)
+        spk = 77 # YOUR BOTTLE IS EMPTY AND THE GROUND IS WET.
+        if not (self.at(w['plant']) or self.at(w['door'])):
+            return NEWTURN[spk]
+
+        if not self.at(w['door']):
+            spk = 112 # THE PLANT INDIGNANTLY SHAKES THE OIL OFF ITS LEAVES...
+            if g.obj != w['water']:
+                return NEWTURN[spk]
+            self.pspeak(w['plant'], g.prop[w['plant']] + 1)
+            g.prop[w['plant']] = (g.prop[w['plant']] + 2)%6
+            g.prop[w['plant2']] = g.prop[w['plant']]//2
+            k = w['null']
+            return (Game.newLocation, 8, k, -1)
+        g.prop[w['door']] = 0
+        if g.obj == w['oil']:
+            g.prop[w['door']] = 1
+        spk = 113 + g.prop[w['door']]
+        return NEWTURN[spk]
+
+    def put(self, obj,where,pval):
+        '''
+        Put is the same as move, except it returns a value used to set up the
+        negated prop values for the repository objects.
+        '''
+        self.move(obj, where)
+        return -1 - pval
+
+    def quitGame(self, verify=True, reply=None):
+        # QUIT.  Intransitive only.  Verify intent and exit if that's what he
+        # wants.  Reply is what he said when asked.
+        g = self.g
+
+        if verify:
+            # DO YOU REALLY WANT TO QUIT NOW?
+            return self.yes(22,54,54, (Game.quitGame, False))
+        if reply is not None:
+            g.gaveup = reply
+        if g.gaveup:
+            self.finish()
+        return NEWTURN[0]
+
+    def read(self, spk, intransitive=True):
+        #  READ.  Magazines in dwarvish, message we've seen, and . . . oyster?
+        g = self.g
+
+        if intransitive: # Find object.
+            if self.here(w['magzin']):
+                g.obj = w['magzin']
+            if self.here(w['tablet']):
+                g.obj = g.obj*100 + w['tablet']
+            if self.here(w['messag']):
+                g.obj = g.obj*100 + w['messag']
+            if g.closed and self.toting(w['oyster']):
+                g.obj = w['oyster']
+            if g.obj > 100 or g.obj == 0 or self.dark():
+                return self.what()
+
+        obj = g.obj
+        if self.dark():
+            s = (g.wd1.strip() + g.wd1x.strip()).upper()
+            self.print(' I SEE NO %s HERE.' % s)
+        if obj == w['magzin']:
+            spk = 190 # MAGAZINE IS WRITTEN IN DWARVISH.
+        if obj == w['tablet']:
+            spk = 196 # "CONGRATULATIONS ON BRINGING LIGHT INTO THE DARK-ROOM!"
+        if obj == w['messag']:
+            spk = 191 # "NOT MAZE WHERE PIRATE LEAVES TREASURE CHEST."
+        if obj == w['oyster'] and g.hinted[2] and self.toting(w['oyster']):
+            spk = 194 # IT SAYS THE SAME THING IT DID BEFORE.
+        if (obj != w['oyster'] or g.hinted[2]
+            or not self.toting(w['oyster']) or not g.closed):
+            return NEWTURN[spk]
+        # READ IT.  READ IT ANYWAY?
+        return self.yes(192,193,54, (Game.readOyster,))
+
+    def readOyster(self, reply):
+        self.g.hinted[2] = reply
+        return NEWTURN[0]
+
+    def rub(self):
+        # RUB.  Yields various snide remarks.
+        g = self.g
+
+        if g.obj != w['lamp']:
+            spk = 76 # PECULIAR.  NOTHING UNEXPECTED HAPPENS.
+        return NEWTURN[spk]
+
+    def say(self):
+        #  SAY.  Echo wd2 (or wd1 if no wd2 (Say WHAT?, etc.).)  Magic words
+        #  override.
+        g = self.g
+
+        tk = g.wd2.strip() + g.wd2x.strip() + '".'
+        if g.wd2.strip() != '':
+            g.wd1 = g.wd2
+        i = vocab(g.wd1, -1)
+        # XYZZY, PLUGH, PLOVE, FEE, FIE, FOE, FOO, FUM
+        if not (i in [62, 65, 71, 2025]): # Magic words.
+            self.print('\n OKAY, "%s".' % g.wd1)
+            return NEWTURN[0]
+        g.wd2 = ''
+        g.obj = 0
+        return self.analyseWord()
+
+    def score(self):
+        # SCORE.  Go to scoring section, which will return to 8241 if scorng is
+        # true.
+
+        score,mxscor = self.finish(scorng=True)
+        self.print('\n IF YOU WERE TO QUIT NOW, YOU WOULD SCORE%4d '
+            'OUT OF A POSSIBLE%4d.' % (score,mxscor))
+        # DO YOU INDEED WISH TO QUIT NOW?  Might or might not quit.
+        return self.yes(143,54,54, (Game.quitGame, False))
+
+    def secondWord(self):
+        g = self.g
+        # Get second word for analysis.
+        g.wd1,g.wd1x = g.wd2,g.wd2x
+        g.wd2 = ''
+        self.westOrW() # goto 2610
+        return self.analyseWord()
+
+    def stateRead(self, then, reply=None):
+        '''Doing this brute force rather than pickle or similar so that it can
+        be ported with ease to micropython for calculators, in particular.
+        Reply is his pick if there's more than one, and it's on to then after.
+        '''
+
+        #   F i n d   g a m e   t o   l o a d
+        slots = self.saves.slots(self.player)
+        if reply is not None:
+            n = reply # The one he picked.
+            n -= 1
+            slot = slots[n]
+        elif len(slots) == 0:
+            self.print(' I SEE NO SAVED GAME HERE.')
+            return then
+        elif len(slots) == 1:
+            slot = slots[0] # One saved game, no need to ask user.
+        elif len(slots) > 1:
+            self.print(' I SEE THESE SAVED GAMES:')
+            for i,s in enumerate(slots):
+                self.print(' %d. %s' % (i+1,s))
+            return self.inputCheck((Game.stateRead, then),
+                ' ENTER NUMBER OF GAME TO RESUME: ', dtype=int)
+
+        #   L o a d   g a m e
+        data = self.saves.load(self.player, slot)
+        if data is None or not self.stateUnpack(data):
+            self.print(' THAT SAVED GAME IS DAMAGED.')
+        return then
+
+    def stateUnpack(self, data):
+        '''
+        Load the game saved as data, as made by statePack.  Games saved before
+        the binary format are text, which is still understood.  Return False
+        if it's damaged or from a version of the program that saved games
+        differently.
+        '''
+
+        if data[:len(SAVEMAGIC)] != SAVEMAGIC:
+            try:
+                return self.stateLoadText(bytes(data).decode())
+            except (UnicodeDecodeError, ValueError):
+                return False
+        header = SAVEMAGIC + SAVEVERSION.to_bytes(2, 'big')
+        body = memoryview(data)[len(header)+4:]
+        size = SAVESCALARS.size
+        size += sum(n*array(t).itemsize for _,t,n in SAVEARRAYS)
+        if (data[:len(header)] != header or len(body) != size
+            or data[len(header):len(header)+4]
+                != zlib.crc32(body).to_bytes(4, 'big')):
+            return False
+        g = self.g
+        for k,v in zip(SAVEFIELDS, SAVESCALARS.unpack_from(body)):
+            setattr(g, k, v)
+        pos = SAVESCALARS.size
+        for k,t,n in SAVEARRAYS:
+            a = array(t)
+            a.frombytes(body[pos:pos+n*a.itemsize])
+            if sys.byteorder == 'big':
+                a.byteswap()
+            getattr(g, k)[:] = a # In place: see SessionState.
+            pos += n*a.itemsize
+        return True
+
+    def stateLoadText(self, text):
+        # Load a game saved as text, one line per variable: its name, its
+        # value (comma separated if an array) and its type.
+        # Older games have a 'cave' section as well as 'game', from when the
+        # state was kept in two dictionaries.  Each had a stale copy of
+        # something the other kept properly, so skip those.  Skip database
+        # tables too.
+        g = self.g
+        stale = {'cave':['knfloc'], 'game':['dflag']}
+        sect = 'game'
+        for line in text.split('\n'):
+            line = line.strip()
+            if line == '': #EOF
+                break
+            if line in ['cave', 'game']:
+                sect = line
+                continue
+            var,val,tStr = line.split()
+            if var not in GameState.__slots__ or var in stale[sect]:
+                continue
+            val = val.split(',')
+            if len(val) == 0:
+                continue
+            elif len(val) == 1:
+                v = val[0]
+                if   tStr == 'str':  setattr(g, var, v)
+                elif tStr == 'int':  setattr(g, var, int(v))
+                elif tStr == 'bool': setattr(g, var, v == 'True')
+            else: # Array.
+                res = []
+                for v in val:
+                    if   tStr == 'int':  res.append(int(v))
+                    elif tStr == 'bool': res.append(v == 'True')
+                a = getattr(g, var)
+                a[:] = array(memoryview(a).format, res)
+        return True
+
+    def statePack(self):
+        # The game state as saved: SAVEMAGIC, SAVEVERSION and a crc32 of the
+        # rest, which is laid out as saveLayout describes.  The database
+        # isn't saved, it won't change so is reread at restart.
+        g = self.g
+        body = [SAVESCALARS.pack(*[getattr(g, k) for k in SAVEFIELDS])]
+        for k,t,_ in SAVEARRAYS:
+            a = getattr(g, k)
+            if sys.byteorder == 'big':
+                a = array(t, a)
+                a.byteswap()
+            body.append(a.tobytes())
+        body = b''.join(body)
+        return (SAVEMAGIC + SAVEVERSION.to_bytes(2, 'big')
+            + zlib.crc32(body).to_bytes(4, 'big') + body)
+
+    def stateWrite(self, slot='state.adv'):
+        # Save the game in his slot of the save store.
+        self.saves.save(self.player, slot, self.statePack())
+        self.print(' GAME SAVED.')
+        return
+
+    def suspend(self, restart=False):
+        # SUSPEND.  Offer to exit leaving things restartable, but requiring a
+        # delay before restarting (so can't save the world before trying
+        # something risky).  Upon restarting, setup = -1 causes return to 8305
+        # to pick up again.
+
+        g = self.g
+
+        if restart:
+            self.postDbInit()
+            return self.stateRead((Game.resumeLoaded,))
+        else:
+            if g.demo:
+                spk = 201 # NO POINT IN SUSPENDING A DEMONSTRATION GAME.
+                return NEWTURN[spk]
+            s = '\n I CAN SUSPEND YOUR ADVENTURE FOR YOU SO THAT YOU CAN'
+            s += (' RESUME LATER, BUT\n YOU WILL HAVE TO WAIT AT LEAST%3d'
+                % self.wizcom['latncy'])
+            s += ' MINUTES BEFORE CONTINUING.'
+            self.print(s)
+            # IS THIS ACCEPTABLE?
+            return self.yes(200,54,54, (Game.suspendAccepted,))
+
+    def suspendAccepted(self, reply):
+        if not reply:
+            return NEWTURN[0]
+        return self.inputCheck((Game.suspendTo,),
+            ' FILE NAME? (NULL TO USE "state.adv") ', emptyOk=True)
+
+    def suspendTo(self, reply):
+        g = self.g
+
+        slot = reply
+        if slot == '':
+            slot = 'state.adv'
+        else:
+            if slot.find('.adv') == -1:
+                slot += '.adv'
+        g.saved,g.savet = self.clock()
+        g.setup = -1
+        self.stateWrite(slot)
+        self.ciao()
+
+    def resumeLoaded(self):
+        self.indexBuild()
+        return self.start((Game.resumeStarted,))
+
+    def resumeStarted(self, reply):
+        g = self.g
+
+        g.yea = reply # Line 8305
+        g.setup = 3
+        k = w['null']
+        return (Game.newLocation, 8, k, -1)
+
+    def take(self, intransitive=True, spk=0):
+        # Carry an object.  Special cases for bird and cage (if bird in cage,
+        # can't take one without the other).  Liquids also special, since they
+        # depend on status of bottle.  Also various side effects, etc.
+
+        g = self.g
+        if intransitive:
+            # Carry, no object given yet.  Ok if only one object present.
+            if g.atloc[g.loc] == 0 or g.link[g.atloc[g.loc]] != 0:
+                return self.what()
+            for i in range(1, 5+1):
+                if g.dloc[i] == g.loc and g.dflag >= 2:
+                    # Dwarf here & have met a dwarf.
+                    return self.what()
+            g.obj = g.atloc[g.loc]
+
+        if self.toting(g.obj):
+            return NEWTURN[spk]
+        spk = 25 # YOU CAN'T BE SERIOUS!
+        if g.obj == w['plant'] and g.prop[w['plant']] <= 0:
+            spk = 115 # PLANT CANNOT BE PULLED FREE.
+        if g.obj == w['bear'] and g.prop[w['bear']] == 1:
+            spk = 169 # BEAR IS STILL CHAINED TO THE WALL.
+        if g.obj == w['chain'] and g.prop[w['bear']] != 0:
+            spk = 170 # THE CHAIN IS STILL LOCKED.
+        if g.fixed[g.obj] != 0:
+            return NEWTURN[spk]
+        if g.obj in [w['water'], w['oil']]:
+            if not (self.here(w['bottle']) and self.liq() == g.obj):
+                g.obj = w['bottle']
+                # Empty.
+                if self.toting(w['bottle']) and g.prop[w['bottle']] == 1:
+                    self.fill(spk)
+                if g.prop[w['bottle']] != 1:
+                    spk = 105 # YOUR BOTTLE IS ALREADY FULL.
+                if not self.toting(w['bottle']):
+                    spk = 104 # YOU HAVE NOTHING IN WHICH TO CARRY IT.
+                return NEWTURN[spk]
+            g.obj = w['bottle']
+        if g.holdng >= 7:
+            self.rspeak(92) # YOU CAN'T CARRY ANYTHING MORE
+            return NEWTURN[0]
+        if g.obj == w['bird'] and g.prop[w['bird']] == 0:
+            if self.toting(w['rod']):
+                self.rspeak(26) # THE BIRD WAS UNAFRAID...
+                return NEWTURN[0]
+            if not self.toting(w['cage']):
+                # YOU CAN CATCH THE BIRD, BUT YOU CANNOT CARRY IT.
+                self.rspeak(27)
+                return NEWTURN[0]
+            g.prop[w['bird']] = 1
+        if ((g.obj == w['bird'] or g.obj == w['cage'])
+            and g.prop[w['bird']] != 0):
+            self.carry(w['bird']+w['cage']-g.obj, g.loc)
+        self.carry(g.obj, g.loc) # The typical case!
+        k = self.liq()
+        if g.obj == w['bottle'] and k != 0: # k==0 no liquid here.
+            g.place[k] = -1
+            g.toted.add(k)
+        return NEWTURN[54]
+
+    def throw(self, spk):
+        # THROW.  Same as discard unless axe.  Then same as attack except
+        # ignore bird, and if dwarf is present then one might be killed.  (Only
+        # way to do so!) Axe also special for dragon, bear, and troll.
+        # Treasures special for troll.
+        #
+        # Synonyms: THROW, TOSS.
+
+        g = self.g
+
+        if (self.toting(w['rod2']) and g.obj == w['rod']
+            and not self.toting(w['rod'])):
+            g.obj = w['rod2']
+        if not self.toting(g.obj):
+            return NEWTURN[spk]
+        # Next line asks, if not throwing treasure at troll...
+        if not (g.obj >= 50 and g.obj <= cave['maxtrs']
+            and self.at(w['troll'])):
+            if g.obj == w['food'] and self.here(w['bear']):
+                # But throwing food is another story.
+                g.obj = w['bear']
+                return self.feed(spk)
+            if g.obj != w['axe']:
+                return self.discard(spk)
+            for i in range(1, 5+1):
+                # Needn't check dflag if axe is here.
+                if g.dloc[i] == g.loc:
+                    break
+            else:
+                spk = 152 # AXE BOUNCES OFF DRAGON'S THICK SCALES
+                if self.at(w['dragon']) and g.prop[w['dragon']] == 0:
+                    self.rspeak(spk)
+                    self.drop(w['axe'],g.loc)
+                    k = w['null']
+                    return (Game.newLocation, 8, k, -1)
+                spk = 158 # TROLL DEFTLY CATCHES THE AXE...
+                if self.at(w['troll']):
+                    self.rspeak(spk)
+                    self.drop(w['axe'],g.loc)
+                    k = w['null']
+                    return (Game.newLocation, 8, k, -1)
+                if self.here(w['bear']) and g.prop[w['bear']] == 0:
+                    # This'll teach him to throw the axe at the bear!
+                    spk = 164 # AXE MISSES...
+                    self.drop(w['axe'],g.loc)
+                    g.fixed[w['axe']] = -1
+                    g.prop[w['axe']] = 1
+                    self.juggle(w['bear'])
+                    return NEWTURN[spk]
+                g.obj = 0
+                self.attack(spk)
+            spk = 48 # DWARF DODGES OUT OF THE WAY.
+            # If saved not = -1, he bypassed the "start" call.
+            # 1/3 kill rate.
+            if not (self.rng.randint(3) == 0 or g.saved != -1):
+                g.dseen[i] = False
+                g.dloc[i] = 0 # Kill dwarf.
+                spk = 47 # YOU KILLED A LITTLE DWARF.
+                g.dkill += 1
+                if g.dkill == 1:
+                    spk = 149 # YOU KILLED A LITTLE DWARF...BLACK SMOKE.
+            self.rspeak(spk)
+            self.drop(w['axe'],g.loc)
+            k = w['null']
+            return (Game.newLocation, 8, k, -1)
+        spk = 159 # TROLL CATCHES TREASURE, SCURRIES OUT OF SIGHT
+        # Snarf a treasure for the troll.
+        self.drop(g.obj, 0)
+        self.move(w['troll'], 0)
+        self.move(w['troll']+100, 0)
+        self.drop(w['troll2'], cave['plac'][w['troll']])
+        self.drop(w['troll2']+100, cave['fixd'][w['troll']])
+        self.juggle(w['chasm'])
+        return NEWTURN[spk]
+
+    def transitive(self, spk=54):
+        # Analyse a transitive verb.  The goto list at line 4090 is
+        # TRANSITIVE, indexed by verb.
+
+        verb = self.g.verb
+        return TRANSITIVE[verb](self, verb, spk)
+
+    def wizard(self, then, step=0, reply=None):
+        '''
+        Ask if he's a wizard.  If he says yes, make him prove it.  Then is
+        passed true if he really is a wizard.  Step says which question reply
+        answers.
+        '''
+
+        again = (Game.wizard, then, step+1)
+        match step:
+            case 0:
+                # if not 'WIZARD?' then 'VERY WELL.'
+                return self.yesm(16,0,7, again)
+            case 1:
+                if not reply:
+                    return then + (False,)
+
+                #  He says he is.  First step: does he know anything magical?
+
+                self.mspeak(17) # PROVE IT!  SAY THE MAGIC WORD!
+                return self.getin(again)
+            case 2:
+                word,_,_,_ = reply
+                if word != self.wizcom['magic']: # Is it 'DWARF'?
+                    #  Aha!  An impostor!
+                    self.mspeak(20) # FOO, YOU ARE NOTHING BUT A CHARLATAN!
+                    return then + (False,)
+                return self.yesm(18,0,0, again) # KNOW WHAT I THOUGHT IT WAS?
+            case 3:
+                if reply:
+                    #  Aha!  An impostor!
+                    self.mspeak(20) # FOO, YOU ARE NOTHING BUT A CHARLATAN!
+                    return then + (False,)
+        # Let's skip the challenge-reply. :-)
+        self.print(' AH, EM, IT HAS SLIPPED MY MIND.')
+
+        #  By George, he really *is* a wizard!
+        self.mspeak(19) # OH DEAR, YOU REALLY *ARE* A WIZARD!
+        return then + (True,)
+
+    def wakeDwarves(self, spk):
+        # WAKE.  Only use is to disturb the dwarves.
+
+        g = self.g
+
+        if g.obj != w['dwarf'] or not g.closed:
+            return NEWTURN[spk]
+        self.rspeak(199) # NEAREST DWARF WAKES UP GRUMPILY...
+        self.dwarvesDisturbed()
+
+    def wave(self, spk):
+        # WAVE.  No effect unless waving rod at fissure.
+
+        g = self.g
+        if (not self.toting(g.obj)
+            or (g.obj == w['rod'] and self.toting(w['rod2']))):
+            spk = 29 # YOU AREN'T CARRYING IT!
+        if (g.obj != w['rod'] or not self.at(w['fissur'])
+            or not self.toting(g.obj) or g.closng):
+            return NEWTURN[spk]
+        g.prop[w['fissur']] = 1 - g.prop[w['fissur']]
+        self.pspeak(w['fissur'], 2-g.prop[w['fissur']])
+        return NEWTURN[0]
+
+    def what(self):
+
+        # Random intransitive verbs come here.  Clear obj just in case (see
+        # "attack").
+
+        # Line 8000
+        # w = a5toa1(wd1,wd1x,'WHAT?')
+        #print('\n %s' % w)
+        g = self.g
+        self.print(' ' + g.wd1.strip() + g.wd1x.strip() + ' WHAT?')
+        g.obj = 0
+        return NEWTURN[-1]
+
+    def mspeak(self, i, nl=True):
+
+        '''
+        Print the i-th "magic" message (Section 12 of database).
+        '''
+        if i != 0:
+            self.speak(cave['mtext'][i], nl=nl)
+
+    def pspeak(self, msg, skip):
+
+        '''
+        Find the skip+1st message from msg and print it.  Msg should be the
+        index of the inventory message for object.  (inven+n+1 message is
+        prop=n message).
+        '''
+
+        self.speak(cave['ptext'][msg], 1+skip)
+
+    def rspeak(self, i):
+        '''
+        Print the i-th "random" message (Section 6 of database).
+        '''
+        if i != 0:
+            self.speak(cave['rtext'][i])
+
+    def speak(self, n, propMsg=-1, nl=True):
+        '''
+        Print the message which starts at lines(n).  Precede it with a blank
+        line unless blklin is false.  The message comes ready to print from
+        speech (see dbBuild).
+        '''
+
+        if n == 0:
+            return
+        msg = cave['speech'][n]
+        if propMsg != -1:
+            msg = msg[propMsg] # Section 5 only.
+        if msg is None: # Don't print anything.
+            return
+        if not nl:
+            msg = msg[:-1]
+        if self.g.blklin:
+            msg = '\n' + msg
+        self.write(msg)
+
+    def start(self, then, step=0, reply=None):
+        '''
+        Check to see if this is "prime time".  If so, only wizards may play,
+        though others may be allowed a short game for demonstration purposes.
+        If setup<0, we're continuing from a saved game, so check for suitable
+        latency.  Then is passed true if this is a demo game (value is ignored
+        for restarts).  Step says which question reply answers.
+        '''
+
+        g = self.g
+
+        match step:
+            case 1: # Is he a wizard, in prime time?
+                if reply:
+                    g.saved = -1
+                    return then + (False,)
+                if g.setup < 0:
+                    self.mspeak(9) # RESUME YOUR ADVENTURE LATER
+                    raise GameOver('closed')
+                # WE ALLOW VISITORS TO MAKE SHORT EXPLORATIONS
+                return self.yesm(5,7,7, (Game.start, then, 2))
+            case 2: # Would he like a short game?
+                if reply:
+                    g.saved = -1
+                    return then + (True,)
+                raise GameOver('closed')
+            case 3: # Is he a wizard, restarting too soon?
+                if reply:
+                    g.saved = -1
+                    return then + (False,)
+                self.mspeak(9) # RESUME YOUR ADVENTURE LATER
+                raise GameOver('closed')
+
+        #  First find out whether it is prime time (save in ptime) and, if
+        #  restarting, whether it's too soon (save in soon).  Prime-time specs
+        #  are in wkday, wkend, and holid; see maint routine for details.
+        #  Latncy is required delay before restarting.  Wizards may cut this to
+        #  a third.
+
+        d,t = self.clock()
+        primtm = self.wizcom['wkday']
+        if d%7 <= 1: # 0,1 are Sat,Sun.
+            primtm = self.wizcom['wkend']
+        # During a holiday.
+        if self.wizcom['hbegin'] <= d <= self.wizcom['hend']:
+            primtm = self.wizcom['holid']
+        ptime = (primtm & (1<<(t//60))) != 0
+        soon = False 
+        if g.setup < 0:
+            delay = (d-g.saved)*1440 + (t-g.savet)
+            if delay < self.wizcom['latncy']:
+                self.print(' THIS ADVENTURE WAS SUSPENDED A MERE %3d MINUTES '
+                    'AGO.' % delay)
+                soon = True 
+                if delay < self.wizcom['latncy']//3:
+                    # EVEN WIZARDS HAVE TO WAIT LONGER THAN THAT!
+                    self.mspeak(2)
+                    raise GameOver('closed')
+        # If neither too soon nor prime time, no problem.  Else specify what's
+        # wrong.
+        start = False 
+        if not soon:
+            if not ptime:
+                g.saved = -1
+                return then + (start,)
+            # Come here if not restarting too soon (maybe not restarting at
+            # all), but it's prime time.  Give our hours and see if he's a
+            # wizard.  If not, then can't restart, but if just beginning then
+            # we can offer a short game.
+            self.mspeak(3) # COLOSSAL CAVE IS CLOSED.
+            self.hours()
+            self.mspeak(4) # ONLY WIZARDS NOW
+            return self.wizard((Game.start, then, 1))
+        # Come here if restarting too soon.  If he's a wizard, let him go
+        # (and note that it then doesn't matter whether it's prime time).
+        # else, tough beans.
+        self.mspeak(8) # ONLY A WIZARD THIS SOON
+        return self.wizard((Game.start, then, 3))
+
+    def westOrW(self):
+        g = self.g
+
+        if g.wd1 == 'WEST':
+            g.iwest += 1
+            if g.iwest == 10:
+                # IF YOU PREFER, SIMPLY TYPE W RATHER THAN WEST.
+                self.rspeak(17)
+
+    def yes(self, x,y,z,then):
+        ''' Call yesx (below) with messages from Section 6.
+        '''
+        return self.yesx(x,y,z,'rspeak',then)
+
+    def yesm(self, x,y,z,then):
+        ''' Call yesx (below) with messages from Section 12.
+        '''
+        return self.yesx(x,y,z,'mspeak',then)
+
+    def yesx(self, x,y,z,spk,then,reply=None):
+        '''
+        Print message x, wait for yes/no answer.  If yes, print y and leave yea
+        true; if no, print z and leave yea false.  Spk is either rspeak or
+        mspeak.  Yea is the reply passed on to then.
+        '''
+
+        if reply is None:
+            if x != 0:
+                getattr(self, spk)(x)
+            return self.getin((Game.yesx, x, y, z, spk, then))
+        reply,_,_,_ = reply
+        if reply not in ['YES', 'Y', 'NO', 'N']:
+            self.print('\n PLEASE ANSWER THE QUESTION.')
+            return self.yesx(x,y,z,spk,then)
+
+        if reply == 'YES' or reply == 'Y':
+            yesx = True 
+            if y != 0:
+                getattr(self, spk)(y)
+        else:
+            yesx = False 
+            if z != 0:
+                getattr(self, spk)(z)
+        return then + (yesx,)
+
+class Server:
+    '''
+    Plays adventure over TCP for as many people as care to connect, each
+    with a Game of his own, all in the one process and sharing the one
+    database.  He's first asked his name, which is whose saved games his
+    are, and its password, so that players' SAVEs and RESTOREs don't get
+    each other's.  The password is the one given the first time the name
+    was (see SaveStore.claim), so a name is his who used it first, and
+    whoever gets the password wrong TRIES times is hung up on.  After that
+    it's line at a time: whatever he sends up to a newline is played as his
+    next command and the game's answer (and its next prompt) sent back.
+    Nothing more is read from him until all of that has gone, so someone
+    who won't or can't take what he's sent holds up only his own game and
+    the server never buffers more than a window's worth for him.  Saves are
+    committed in the background (see SaveStore), and he isn't sent the
+    answer to a SAVE until his is.
+
+    Sessions is how many are connected now, turns the time each step() took
+    for the most recent of the turns played.  Every so often the server
+    reports these on stderr.  A game that goes wrong (raises anything but
+    GameOver) ends with a line telling him so, and its traceback goes to
+    stderr, but everyone else plays on.
+
+    With a journal, every game is recorded in it, and nobody is sent the
+    answer to a command until the command is safely on disk.  The fsync
+    that puts it there is shared with everyone else waiting for one.
+    A game whose player goes without finishing it is ended in the journal,
+    however he went.  Games cut short by the server dying are recovered
+    from the journal when it starts again, and each is given back to its
+    player, just where it was, when he next logs in.  Until then it stays
+    in the journal, in case the server dies again first.
+
+    With history set, each game gets a History of that many bytes, so its
+    player can UNDO and REDO.  With table set, the games' arrays are kept
+    in a Sessions table, a view of them all, and the reports say how many
+    lamps are lit, a look at every game at once.  That's for a program
+    running the server itself; --serve doesn't set it.
+    '''
+
+    MAXLINE = 1024  # Longest line he may type.
+    NAMELEN = 32    # Longest name he may go by.
+    TRIES = 3       # Wrong passwords he may give.
+    WINDOW = 1<<16  # Most sent to him and not yet taken before he's waited on.
+
+    def __init__(self, every=60, journal=None, history=None, table=False,
+        saves=None):
+        self.every = every # Seconds between reports.
+        self.journal = journal
+        self.history = history
+        self.table = Sessions() if table else None
+        self.sessions = 0
+        self.games = 0 # Games started since the server was.
+        self.played = 0 # Turns played since then.
+        self.crashes = 0 # Games that went wrong since then.
+        self.turns = deque(maxlen=10000)
+        self.saves = SaveStore(background=True) if saves is None else saves
+        self.recovered = {} # Player: his game cut short, and what it said.
+
+    async def play(self, reader, writer):
+        # One connection: a game from start to end, or until he hangs up.
+        writer.transport.set_write_buffer_limits(high=self.WINDOW)
+        self.sessions += 1
+        game = player = None
+        try:
+            player = await self.name(reader, writer)
+            if player is None:
+                return # Gone before saying who he is.
+            game, said = self.recovered.pop(player, (None, None))
+            if game is None:
+                self.games += 1
+                game = Game(saves=self.saves, player=player,
+                    journal=self.journal, history=None if self.history is None
+                    else History(self.history))
+            if self.table is not None:
+                self.table.add(game)
+            if said is None:
+                out = game.begin()
+            else:
+                out = (' YOUR LAST GAME WAS CUT SHORT.  HERE IT IS, JUST'
+                    ' WHERE YOU LEFT IT.\n\n' + said)
+            while True:
+                if self.journal is not None:
+                    await self.journal.wait()
+                await self.saves.wait()
+                writer.write((out + game.prompt).encode())
+                await writer.drain()
+                if game.result is not None:
+                    break
+                try:
+                    line = await reader.readline()
+                except ValueError: # Over MAXLINE.  Not a player.
+                    line = b''
+                if not line:
+                    game.quit()
+                    break
+                t = time.perf_counter()
+                out = game.step(line.decode(errors='replace').rstrip('\r\n'))
+                self.turns.append(time.perf_counter() - t)
+                self.played += 1
+        except ConnectionError:
+            pass # Gone without saying goodbye.
+        except Exception:
+            # His game's gone wrong, not the server.  It's ended in the
+            # journal below, as it was never finished.
+            import traceback
+            self.crashes += 1
+            print('game of %r crashed:' % player, file=sys.stderr)
+            traceback.print_exc()
+            writer.write(b'\n SORRY, SOMETHING HAS GONE WRONG WITH YOUR '
+                b'GAME AND IT CANNOT GO ON.\n')
+        finally:
+            self.sessions -= 1
+            if (self.journal is not None and game is not None
+                    and game.result is None and game.sid is not None):
+                self.journal.ended(game) # Nobody's left to carry it on.
+            if self.table is not None and game is not None:
+                self.table.remove(game)
+            writer.close()
+
+    async def name(self, reader, writer):
+        # Who he is, once he's given the name's password.  None if he hangs
+        # up first or can't give it.
+        import asyncio
+        for _ in range(self.TRIES):
+            name = await self.ask(reader, writer,
+                b' WHAT NAME ARE YOUR SAVED GAMES KEPT UNDER? ')
+            if name is None:
+                return None
+            name = ' '.join(name.upper().split())[:self.NAMELEN]
+            password = await self.ask(reader, writer,
+                b' AND WHAT IS ITS PASSWORD? ')
+            if password is None:
+                return None
+            if await asyncio.to_thread(self.saves.claim, name, password):
+                return name
+            writer.write(b' THAT IS NOT THE PASSWORD FOR THAT NAME.\n')
+        return None
+
+    async def ask(self, reader, writer, prompt):
+        # His answer to prompt, asked until he gives one.  None if he hangs
+        # up first.
+        while True:
+            writer.write(prompt)
+            await writer.drain()
+            try:
+                line = await reader.readline()
+            except ValueError: # Over MAXLINE.
+                return None
+            if not line:
+                return None
+            line = line.decode(errors='replace').strip()
+            if line:
+                return line
+
+    def stats(self):
+        # A line on how things are going.
+        s = ('%d sessions, %d games and %d turns since start'
+            % (self.sessions, self.games, self.played))
+        if self.crashes:
+            s += ', %d crashed' % self.crashes
+        if self.journal is not None:
+            s += ', %d fsyncs' % self.journal.syncs
+        if self.table is not None:
+            prop = self.table.tables['prop'][self.table.live]
+            s += ', %d lamps lit' % (prop[:, w['lamp']] == 1).sum()
+        if self.turns:
+            t = sorted(self.turns)
+            s += (', turn latency mean %.2f ms, 99%% %.2f ms, max %.2f ms'
+                % (1000*sum(t)/len(t), 1000*t[99*len(t)//100], 1000*t[-1]))
+        return s
+
+    async def report(self):
+        import asyncio
+        while True:
+            await asyncio.sleep(self.every)
+            print(self.stats(), file=sys.stderr, flush=True)
+
+    async def serve(self, host, port):
+        # Accept players until cancelled.
+        import asyncio
+        dbRead() # Once, now, rather than in the first player's turn.
+        if self.journal is not None:
+            games = self.journal.recover(self.saves)
+            for sid in sorted(games): # Only his newest is given back.
+                game, said = games[sid]
+                old = self.recovered.get(game.player)
+                if old is not None:
+                    self.journal.drop(old[0].sid)
+                self.recovered[game.player] = game, said
+            if games:
+                print('%d games recovered from the journal' % len(games),
+                    file=sys.stderr, flush=True)
+        server = await asyncio.start_server(self.play, host, port,
+            limit=self.MAXLINE)
+        for sock in server.sockets:
+            print('serving adventure on %s port %d' % sock.getsockname()[:2],
+                file=sys.stderr, flush=True)
+        report = asyncio.ensure_future(self.report())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            report.cancel()
+            await self.saves.wait()
+            if self.journal is not None:
+                self.journal.flush()
+            print(self.stats(), file=sys.stderr, flush=True)
+
+# The continuations run() is given most often, made once.  NEWTURN covers
+# every spk from -1 (carry on without line 2012) to the last rtext message.
+GOTO2 = (Game.arrive,)
+NEWTURN = {spk: (Game.newTurn, 0, spk) for spk in range(-1, 205+1)}
+
+# The action verbs' goto lists (lines 4080 and 4090), indexed by verb and
+# called as handler(game, verb, spk) with spk the verb's default message (see
+# section 8).  verbCheck() makes sure every action verb has one of each.
+INTRANSITIVE = (
+    None,
+    lambda game, verb, spk: game.take(spk=spk),      # TAKE, now newTurn(v)
+    lambda game, verb, spk: game.what(),             # DROP
+    lambda game, verb, spk: game.what(),             # SAY
+    lambda game, verb, spk: game.locking(),          # OPEN
+    lambda game, verb, spk: game.newTurn(verb),      # NOTH
+    lambda game, verb, spk: game.locking(),          # LOCK
+    lambda game, verb, spk: game.lampOn(spk),        # ON
+    lambda game, verb, spk: game.lampOff(spk),       # OFF
+    lambda game, verb, spk: game.what(),             # WAVE
+    lambda game, verb, spk: game.what(),             # CALM
+    lambda game, verb, spk: game.newTurn(verb, spk), # WALK
+    lambda game, verb, spk: game.attack(spk),        # KILL
+    lambda game, verb, spk: game.pour(spk),          # POUR
+    lambda game, verb, spk: game.eat(spk),           # EAT
+    lambda game, verb, spk: game.drink(spk),         # DRNK
+    lambda game, verb, spk: game.what(),             # RUB
+    lambda game, verb, spk: game.what(),             # TOSS
+    lambda game, verb, spk: game.quitGame(),         # QUIT
+    lambda game, verb, spk: game.what(),             # FIND
+    lambda game, verb, spk: game.inventory(),        # INVN
+    lambda game, verb, spk: game.what(),             # FEED
+    lambda game, verb, spk: game.fill(spk),          # FILL
+    lambda game, verb, spk: game.blast(spk),         # BLST
+    lambda game, verb, spk: game.score(),            # SCOR
+    lambda game, verb, spk: game.feeFie(),           # FOO
+    lambda game, verb, spk: game.brief(),            # BRF
+    lambda game, verb, spk: game.read(spk),          # READ
+    lambda game, verb, spk: game.what(),             # BREK
+    lambda game, verb, spk: game.what(),             # WAKE
+    lambda game, verb, spk: game.suspend(),          # SUSP
+    lambda game, verb, spk: game.hoursShow(),        # HOUR
+    lambda game, verb, spk: game.suspend(restart=True), # RESUM
+)
+TRANSITIVE = (
+    None,
+    lambda game, verb, spk: game.take(False, spk),   # TAKE
+    lambda game, verb, spk: game.discard(spk),       # DROP
+    lambda game, verb, spk: game.say(),              # SAY
+    lambda game, verb, spk: game.locking(False),     # OPEN
+    lambda game, verb, spk: game.newTurn(verb),      # NOTH
+    lambda game, verb, spk: game.locking(False),     # LOCK
+    lambda game, verb, spk: game.lampOn(spk),        # ON
+    lambda game, verb, spk: game.lampOff(spk),       # OFF
+    lambda game, verb, spk: game.wave(spk),          # WAVE
+    lambda game, verb, spk: game.newTurn(verb, spk), # CALM
+    lambda game, verb, spk: game.newTurn(verb, spk), # WALK
+    lambda game, verb, spk: game.attack(spk),        # KILL
+    lambda game, verb, spk: game.pour(spk),          # POUR
+    lambda game, verb, spk: game.eat(spk, False),    # EAT
+    lambda game, verb, spk: game.drink(spk),         # DRNK
+    lambda game, verb, spk: game.rub(),              # RUB
+    lambda game, verb, spk: game.throw(spk),         # TOSS
+    lambda game, verb, spk: game.newTurn(verb, spk), # QUIT
+    lambda game, verb, spk: game.find(spk, verb),    # FIND
+    lambda game, verb, spk: game.find(spk, verb),    # INVN
+    lambda game, verb, spk: game.feed(spk),          # FEED
+    lambda game, verb, spk: game.fill(spk),          # FILL
+    lambda game, verb, spk: game.blast(spk),         # BLST
+    lambda game, verb, spk: game.newTurn(verb, spk), # SCOR
+    lambda game, verb, spk: game.newTurn(verb, spk), # FOO
+    lambda game, verb, spk: game.newTurn(verb, spk), # BRF
+    lambda game, verb, spk: game.read(spk, False),   # READ
+    lambda game, verb, spk: game.breakObj(spk),      # BREK
+    lambda game, verb, spk: game.wakeDwarves(spk),   # WAKE
+    lambda game, verb, spk: game.newTurn(verb, spk), # SUSP
+    lambda game, verb, spk: game.newTurn(verb, spk), # HOUR
+    lambda game, verb, spk: game.newTurn(verb, spk), # RESUM
+)
+
+USAGE = '''\
+python advent.py                     Play at the terminal.
+python advent.py --seed N            ... with the random numbers seeded N.
+python advent.py --journal FILE      ... journaled in FILE, so that a game
+                                     cut short carries on where it was.
+python advent.py --serve [PORT [HOST [JOURNAL [UNDO]]]]
+                                     Serve games over TCP, journaled in
+                                     JOURNAL, with UNDO bytes of undo each.
+python advent.py --replay SEED FILE ...
+                                     Replay commands, one a line, and time
+                                     them.
+python advent.py --batch GAMES FILE [WORKERS]
+                                     Replay commands with GAMES seeds, over
+                                     WORKERS processes, and sum up.
+python advent.py --import FILE ...   Put games saved as files in the store.
+python advent.py --compile           Write the database's snapshot.
+python advent.py --dwarves           Where dwarves and the pirate get to.
+
+A journaled game with UNDO is never snapshotted in the journal, so the
+journal keeps every line of it for as long as it goes on, and recovering
+it replays them all from its beginning.
+'''
+
+if __name__ == '__main__':
+    if sys.argv[1:2] in (['--help'], ['-h']):
+        print(USAGE, end='')
+    elif sys.argv[1:] == ['--compile']:
+        dbCompile()
+    elif sys.argv[1:2] == ['--import']:
+        # python advent.py --import file.adv ...  Games saved as files by
+        # earlier versions, into the save store under their file names.
+        saves = SaveStore()
+        for fname in sys.argv[2:]:
+            with open(fname, 'rb') as f:
+                saves.save('', os.path.basename(fname), f.read())
+        saves.close()
+    elif sys.argv[1:2] == ['--seed']:
+        main(int(sys.argv[2]))
+    elif sys.argv[1:2] == ['--replay']:
+        # python advent.py --replay seed file ...  Each file has a command a
+        # line.  Prints how fast each played, and its final state's digest.
+        for fname in sys.argv[3:]:
+            with open(fname) as f:
+                cmds = f.read().splitlines()
+            game, n, t = replay(cmds, int(sys.argv[2]))
+            print('%s: %d turns, %.0f turns/sec, %s%s' % (fname, n,
+                n/t if t else 0, game.digest(),
+                '' if game.result is None else ' (%s)' % game.result.why))
+    elif sys.argv[1:2] == ['--batch']:
+        # python advent.py --batch games file [workers]  Replays the commands
+        # in file (one a line) with seeds 0 to games-1, and sums up.
+        with open(sys.argv[3]) as f:
+            cmds = f.read().splitlines()
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        t = time.perf_counter()
+        results = batch([cmds], range(int(sys.argv[2])), workers)
+        t = time.perf_counter() - t
+        n = len(results)
+        scores = sorted([r['score'] for r in results])
+        print('%d games in %.2f sec, %.0f games/sec, %.0f turns/sec' % (n, t,
+            n/t, sum([r['turns'] for r in results])/t))
+        print('score mean %.1f, min %d, median %d, max %d out of %d' % (
+            sum(scores)/n, scores[0], scores[n//2], scores[-1],
+            results[0]['mxscor']))
+        print('%d deaths, %d reached closing, %d closed' % (
+            sum([r['deaths'] for r in results]),
+            sum([r['closng'] for r in results]),
+            sum([r['closed'] for r in results])))
+        whys = {}
+        for r in results:
+            whys[r['why']] = whys.get(r['why'], 0) + 1
+        print(', '.join(['%s %d' % (why or 'unfinished', k)
+            for why, k in sorted(whys.items(), key=lambda i: -i[1])]))
+    elif sys.argv[1:2] == ['--dwarves']:
+        # python advent.py --dwarves  What dwarfStats works out, for every
+        # location a dwarf or the pirate can get to.
+        stats = dwarfStats()
+        print(' loc  dwarf %   meet turns  pirate %  ambush %')
+        for loc in range(len(stats['dwarf'])):
+            if stats['meet'][loc] == float('inf') and not stats['ambush'][loc]:
+                continue
+            print('%4d %8.2f %12.1f %9.2f %9.2f' % (loc,
+                100*stats['dwarf'][loc], stats['meet'][loc],
+                100*stats['pirate'][loc], 100*stats['ambush'][loc]))
+    elif sys.argv[1:2] == ['--journal']:
+        main(journal=sys.argv[2])
+    elif sys.argv[1:2] == ['--serve']:
+        # python advent.py --serve [port [host [journal [undo bytes]]]]
+        import asyncio
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 7777
+        host = sys.argv[3] if len(sys.argv) > 3 else None
+        journal = Journal(sys.argv[4]) if len(sys.argv) > 4 and sys.argv[4] \
+            else None
+        history = int(sys.argv[5]) if len(sys.argv) > 5 else None
+        try:
+            asyncio.run(Server(journal=journal, history=history).serve(host,
+                port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        main()
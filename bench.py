@@ -0,0 +1,685 @@
+#!/usr/bin/env python
+
+'''
+Rough timings of the parts of advent.py that run on every turn.  Run
+"python bench.py" for all of them, or name the ones wanted, e.g. "python
+bench.py vocab".  The numbers only mean something when compared with each
+other on the same machine.
+'''
+
+import copy, os, py_compile, subprocess, tempfile, time, sys, tracemalloc
+from array import array
+import numpy.random
+import advent
+
+def setup():
+    # A freshly initialised game, just as main() would have it.
+    return advent.Game()
+
+def rate(fn, n):
+    # Calls of fn per second, best of three runs of n calls.
+    best = None
+    for _ in range(3):
+        t = time.perf_counter()
+        for _ in range(n):
+            fn()
+        t = time.perf_counter() - t
+        best = t if best is None else min(best, t)
+    return n/best
+
+def vocabScan(ida, init):
+    # The search vocab() used to do: walk atab until the word or the -1.
+    cave = advent.cave
+    for i in range(1, cave['tabsiz']+1):
+        if cave['ktab'][i] == -1:
+            return -1
+        if init >= 0 and cave['ktab'][i]//1000 != init:
+            continue
+        if cave['atab'][i] == ida:
+            v = cave['ktab'][i]
+            if init >= 0:
+                v = v%1000
+            return v
+
+def benchVocab():
+    # Typical command words, early and late in the table, plus a miss.
+    setup()
+    words = ['N', 'WEST', 'XYZZY', 'TAKE', 'LAMP', 'INVEN', 'PLUGH', 'SCORE',
+        'GOLD', 'KILL', 'FOO', 'BLORT']
+    for name,fn in [('scan', vocabScan), ('index', advent.vocab)]:
+        r = rate(lambda: [fn(wd, -1) for wd in words], 20000)
+        print(' vocab %-6s %10.0f lookups/sec' % (name, r*len(words)))
+    words = ['STEPS', 'LAMP', 'CHAIN', 'SPICE']
+    for name,fn in [('scan', vocabScan), ('index', advent.vocab)]:
+        r = rate(lambda: [fn(wd, 1) for wd in words], 20000)
+        print(' vocab %-6s %10.0f typed lookups/sec' % (name, r*len(words)))
+
+def dwarfScan(g, i, tk):
+    # How the dwarf loop in adventures() used to pick a dwarf's next loc:
+    # walk travel from key[dloc] filtering every candidate on every turn.
+    cave = advent.cave
+    j = 1
+    kk = cave['key'][g.dloc[i]]
+    if kk != 0:
+        while True:
+            g.newloc = abs(cave['travel'][kk])//1000%1000
+            if not (g.newloc < 15 or g.newloc > 300
+                or g.newloc == g.odloc[i]
+                or (j > 1 and g.newloc == tk[j-1]) or j >= 20
+                or g.newloc == g.dloc[i] or advent.forced(g.newloc)
+                or (i == 6 and advent.bitset(g.newloc,3))
+                or abs(cave['travel'][kk])//1000000 == 100):
+                tk[j] = g.newloc
+                j += 1
+            kk += 1
+            if cave['travel'][kk-1] < 0:
+                break
+    tk[j] = g.odloc[i]
+    if j >= 2:
+        j -= 1
+    j = 1 + numpy.random.randint(j)
+    g.odloc[i] = g.dloc[i]
+    g.dloc[i] = tk[j]
+    g.dseen[i] = ((g.dseen[i] and g.loc >= 15)
+        or g.dloc[i] == g.loc or g.odloc[i] == g.loc)
+
+def benchDwarves():
+    # The dwarf phase of one turn once all six are on the move: each dwarf
+    # picks somewhere to go.  He's far away in the maze, so nobody sees him.
+    game = setup()
+    g = game.g
+    tk = 20*[0]
+    scan = lambda i, tk: dwarfScan(g, i, tk)
+    for name,fn in [('scan', scan), ('table', game.dwarfMove)]:
+        g.loc = 116
+        g.dloc[1:] = array('h', [19, 27, 33, 44, 64, 114])
+        g.odloc[1:] = array('h', 6*[0])
+        def turn():
+            for i in range(1, 6+1):
+                fn(i, tk)
+        print(' dwarves %-6s %10.0f turns/sec' % (name, rate(turn, 5000)))
+
+class ScalarRandom(advent.Random):
+    # How games used to get their random numbers: from numpy one at a time.
+    random = staticmethod(numpy.random.random)
+
+def benchRandom():
+    # The dwarf phase of a turn with all six on the move: where each goes,
+    # whether he follows, whether his knife hits.  Then plain numbers.
+    game = setup()
+    g = game.g
+    tk = 20*[0]
+    rngs = [('scalar', ScalarRandom()), ('block', advent.BlockRandom(1)),
+        ('stdlib', advent.StdRandom(1))]
+    for name,rng in rngs:
+        game.rng = rng
+        g.loc = 116
+        g.dloc[1:] = array('h', [19, 27, 33, 44, 64, 114])
+        g.odloc[1:] = array('h', 6*[0])
+        def turn():
+            for i in range(1, 6+1):
+                game.dwarfMove(i, tk)
+                rng.pct(95)
+                rng.random()
+        print(' random %-6s %10.0f dwarf turns/sec' % (name, rate(turn, 5000)))
+        def draws():
+            for _ in range(100):
+                rng.random()
+        r = 100*rate(draws, 2000)
+        print(' random %-6s %10.0f numbers/sec' % (name, r))
+
+def carryScan(g, obj, where):
+    # How carry() used to unlink obj: walk atloc[where] to find who points
+    # at it.  Only the unlinking, as move() would do it for a fixed object.
+    if g.atloc[where] == obj:
+        g.atloc[where] = g.link[obj]
+        return
+    temp = g.atloc[where]
+    while True:
+        if g.link[temp] == obj:
+            break
+        temp = g.link[temp]
+    g.link[temp] = g.link[obj]
+
+def benchPlacement():
+    # Everything piled up in the building, then the object at the far end of
+    # the list taken out and put back, as move() does.
+    game = setup()
+    for obj in range(1, 64+1):
+        game.move(obj+100, 3)
+    scan = lambda obj, where: carryScan(game.g, obj, where)
+    for name,fn in [('scan', scan), ('blink', game.carry)]:
+        def juggle():
+            fn(101, 3)
+            game.drop(101, 3)
+            fn(164, 3) # Now last in the list.
+            game.drop(164, 3)
+        r = rate(juggle, 20000)
+        print(' placement %-6s %10.0f moves/sec' % (name, 2*r))
+
+# The first stretch of a game: in, lamp, grate, bird, into the cave for
+# some treasures, back up and around through the building.
+walk = ('no;in;take keys;take lamp;out;s;s;s;unlock grate;d;w;take cage;w;'
+    'on;w;w;take bird;w;d;s;take gold;n;d;drop bird;take bird;s;take jewel;'
+    'n;w;take coins;e;n;n;plugh;drop gold;drop jewel;drop coins;drop cage;'
+    'take food;take bottle;plugh;s;take silver;n;plugh;drop silver;inven;'
+    + 40*'plugh;look;score;plugh;inven;').split(';')[:-1]
+
+def play(cmds):
+    # Play cmds as a whole game from the start, with the output thrown away.
+    # Returns the game and the number of commands he got to give.
+    game, n, _ = advent.replay(cmds, 6) # Seed 6 meets a dwarf but lives.
+    game.quit()
+    return game, n
+
+def benchTurns():
+    # Whole turns: parsing, travel, dwarves, descriptions, the lot.
+    t = time.perf_counter()
+    _, turns = play(walk)
+    best = time.perf_counter() - t
+    for _ in range(19):
+        t = time.perf_counter()
+        play(walk)
+        best = min(best, time.perf_counter() - t)
+    print(' turns %10.0f turns/sec (%d turns a game)' % (turns/best, turns))
+
+def firstPrompt(code):
+    # Seconds from starting a python running code to the game's first
+    # prompt, and how much memory (in kB) it's using then.
+    t = time.perf_counter()
+    p = subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE)
+    out = b''
+    while b'INSTRUCTIONS?' not in out:
+        out += p.stdout.read1(1<<12)
+    t = time.perf_counter() - t
+    with open('/proc/%d/status' % p.pid) as f:
+        kb = [int(line.split()[1]) for line in f if line[:6] == 'VmRSS:'][0]
+    p.communicate() # EOF, so he quits.
+    return t, kb
+
+def importTime(code):
+    # Milliseconds python -X importtime says the imports in code took.
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True)
+    ms = 0
+    for line in p.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split('|')
+        if name[1:] == name.strip() and name.split('.')[0].strip() in [
+            'advent', 'numpy']: # Only the top-level imports.
+            ms += int(cumulative)/1000
+    return ms
+
+def benchStartup():
+    # A terminal game from nothing to its first prompt, loading numpy as
+    # advent.py used to and not.  Both with its bytecode cached, as when
+    # installed.
+    py_compile.compile('advent.py')
+    for name,imports in [('numpy', 'import numpy.random, advent'),
+        ('lazy', 'import advent')]:
+        ms = min([importTime(imports) for _ in range(5)])
+        runs = [firstPrompt(imports + '; advent.main()') for _ in range(5)]
+        t = min([t for t,_ in runs])
+        kb = min([kb for _,kb in runs])
+        print(' startup %-6s %6.0f ms importing, %6.0f ms to first prompt, '
+            '%6d kB' % (name, ms, 1000*t, kb))
+
+def speakOld(game, n, propMsg=-1, nl=True):
+    # How speak() used to print a message: fix it up every time, then print
+    # it in one or two pieces.
+    msg = advent.cave['lines'][n]
+    if propMsg != -1:
+        msg = msg[propMsg]
+    if msg[:3] == '>$<':
+        return
+    if game.g.blklin:
+        game.print('')
+    msg = msg.replace('\n', '\n ')
+    if nl:
+        game.print(' %s' % msg)
+    else:
+        game.print(' %s' % msg, end='')
+
+def benchSpeak():
+    # The messages of a busy turn: a long description, the objects there
+    # and a few remarks, collected as a server would.
+    game = setup()
+    cave = advent.cave
+    msgs = ([(cave['ltext'][i], -1) for i in (1, 3, 9, 15)]
+        + [(cave['ptext'][obj], 1) for obj in range(1, 20+1)
+            if cave['ptext'][obj]]
+        + [(cave['rtext'][i], -1) for i in (2, 54, 56, 61, 77)])
+    old = lambda n, prop: speakOld(game, n, prop)
+    for name,fn in [('old', old), ('table', game.speak)]:
+        def turn():
+            for n,prop in msgs:
+                fn(n, prop)
+            game.flush()
+        r = rate(turn, 5000)
+        print(' speak %-6s %10.0f messages/sec' % (name, r*len(msgs)))
+    nul = advent.Game(advent.NullOutput())
+    def turn():
+        for n,prop in msgs:
+            nul.speak(n, prop)
+        nul.flush()
+    r = rate(turn, 5000)
+    print(' speak %-6s %10.0f messages/sec' % ('null', r*len(msgs)))
+
+def sizeof(o, seen):
+    # Bytes taken by o and everything it refers to, each object counted once.
+    if id(o) in seen:
+        return 0
+    seen.add(id(o))
+    n = sys.getsizeof(o)
+    if isinstance(o, dict):
+        n += sum([sizeof(k, seen) + sizeof(v, seen) for k,v in o.items()])
+    elif isinstance(o, (list, tuple, set)):
+        n += sum([sizeof(i, seen) for i in o])
+    elif hasattr(o, '__slots__'):
+        n += sum([sizeof(getattr(o, k), seen) for k in o.__slots__])
+    return n
+
+def dictState(g):
+    # The same game held the way it used to be: everything in one dictionary
+    # (c's share included) with lists rather than arrays, and the database
+    # tables in it too since every game read its own.
+    d = {}
+    for k in advent.GameState.__slots__:
+        v = getattr(g, k)
+        d[k] = v.tolist() if isinstance(v, array) else v
+    return d, thaw(advent.cave)
+
+def thaw(v):
+    # A private, changeable copy of v, as every game used to have of the
+    # database.
+    if isinstance(v, (list, tuple)):
+        return [thaw(i) for i in v]
+    if hasattr(v, 'items'):
+        return {k: thaw(i) for k,i in v.items()}
+    return v
+
+def benchState():
+    # Memory for one game, then the lookups made most often on every turn.
+    game, _ = play(walk)
+    d, tables = dictState(game.g)
+    print(' state dict    %8d bytes, %8d with its tables' % (sizeof(d, set()),
+        sizeof(d, set()) + sizeof(tables, set())))
+    print(' state slots   %8d bytes, the tables shared'
+        % sizeof(game.g, set()))
+    d.update(tables)
+    objs = range(1, 64+1)
+    for name,g in [('dict', d), ('slots', game.g)]:
+        if name == 'dict':
+            toting = lambda obj: g['place'][obj] == -1
+            here = lambda obj: g['place'][obj] in [-1, g['loc']]
+            at = lambda obj: g['loc'] in [g['place'][obj], g['fixed'][obj]]
+        else:
+            toting, here, at = game.toting, game.here, game.at
+        def look():
+            for obj in objs:
+                toting(obj)
+                here(obj)
+                at(obj)
+        r = rate(look, 2000)
+        print(' state %-6s %10.0f toting/here/at per sec'
+            % (name, 3*len(objs)*r))
+
+def benchSessions():
+    # Start a thousand games in one process: only their state should cost
+    # anything once the first has read the database.
+    setup()
+    games = []
+    tracemalloc.start()
+    for _ in range(1000):
+        games.append(advent.Game())
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(' sessions %8d bytes each, %8d bytes of database shared'
+        % (used/len(games), sizeof(advent.cave, set())))
+
+def benchServer(clients=200):
+    # Many players at once through the TCP server on localhost, each sending
+    # the walk as fast as the server will take it.
+    import asyncio
+    advent.datime = lambda: (17997, 600)
+    tmp = tempfile.TemporaryDirectory()
+    saves = advent.SaveStore(os.path.join(tmp.name, 'saves.db'), True)
+    saves.ROUNDS = 1 # Logins aren't what's being timed.
+    server = advent.Server(saves=saves)
+    async def player(port, name):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(''.join([cmd + '\n'
+            for cmd in [name, 'secret'] + walk]).encode())
+        writer.write_eof()
+        while await reader.read(1<<16):
+            pass
+        writer.close()
+    async def run():
+        listener = await asyncio.start_server(server.play, '127.0.0.1', 0,
+            limit=server.MAXLINE)
+        port = listener.sockets[0].getsockname()[1]
+        t = time.perf_counter()
+        await asyncio.gather(*[player(port, 'P%d' % i)
+            for i in range(clients)])
+        t = time.perf_counter() - t
+        listener.close()
+        return t
+    t = asyncio.run(run())
+    print(' server %10.0f turns/sec, %d players at once'
+        % (server.played/t, clients))
+    print(' server %s' % server.stats())
+    saves.close()
+    tmp.cleanup()
+
+def textSave(g, fname):
+    # The game saved the way it used to be: a line of text per variable.
+    with open(fname, 'w') as f:
+        print('game', file=f)
+        for k in advent.GameState.__slots__:
+            if k == 'toted' or k[:2] == 'wd':
+                continue
+            v = getattr(g, k)
+            if isinstance(v, array):
+                l = ','.join([str(i) for i in v])
+                print('%s %s %s' % (k, l, 'int'), file=f)
+            else:
+                print('%s %s %s' % (k, str(v), type(v).__name__), file=f)
+
+def benchSaves():
+    # Saving and loading the game at the end of the walk, as text the way
+    # it used to be and in the binary format.
+    game, _ = play(walk)
+    def binarySave(g, fname):
+        with open(fname, 'wb') as f:
+            f.write(game.statePack())
+    def load(fname):
+        with open(fname, 'rb') as f:
+            game.stateUnpack(f.read())
+    with tempfile.TemporaryDirectory() as tmp:
+        for name,save in [('text', textSave), ('binary', binarySave)]:
+            fname = os.path.join(tmp, name + '.adv')
+            w = rate(lambda: save(game.g, fname), 2000)
+            r = rate(lambda: load(fname), 2000)
+            print(' saves %-6s %8.0f saves/sec, %8.0f loads/sec, %5d bytes'
+                % (name, w, r, os.path.getsize(fname)))
+
+def benchStore(counts=(1000, 10000)):
+    # Finding a player's saved games with count of them saved in all, by
+    # scanning a directory of files the way it used to be done and in the
+    # save store, and loading, replacing and deleting one in the store.
+    game, _ = play(walk)
+    data = game.statePack()
+    for count in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(count):
+                with open(os.path.join(tmp, 'p%d.adv' % i), 'wb') as f:
+                    f.write(data)
+            def scan():
+                return [f for f in os.listdir(tmp) if f[-4:] == '.adv']
+            saves = advent.SaveStore(os.path.join(tmp, 'saves.db'))
+            db = saves.connect()
+            with db:
+                db.executemany('INSERT INTO saves VALUES (?, ?, ?)',
+                    [('p%d' % (i//4), 's%d.adv' % (i%4), data)
+                    for i in range(count)])
+            player = 'p%d' % (count//8)
+            def replace():
+                saves.save(player, 'new.adv', data)
+                saves.delete(player, 'new.adv')
+            print(' store %6d saves %8.0f scans/sec, %8.0f lists/sec, '
+                '%8.0f loads/sec, %6.0f save+deletes/sec'
+                % (count, rate(scan, 50), rate(lambda: saves.slots(player),
+                1000), rate(lambda: saves.load(player, 's1.adv'), 1000),
+                rate(replace, 50)))
+            saves.close()
+
+def benchJournal(sessions=100):
+    # Sessions games at once, each playing the walk with every command
+    # journaled: an fsync for each command, then the fsyncs shared by
+    # whoever's waiting.  Then recovering them all, as if the process had
+    # died just before the end of the walk.
+    import asyncio
+    advent.datime = lambda: (17997, 600)
+    async def player(journal, group):
+        game = advent.Game(advent.NullOutput(), advent.StdRandom(6),
+            journal=journal)
+        game.begin()
+        for cmd in walk:
+            game.step(cmd)
+            if group:
+                await journal.wait()
+            else:
+                journal.flush()
+            await asyncio.sleep(0) # Let the others have a turn.
+    async def run(journal, group):
+        await asyncio.gather(*[player(journal, group)
+            for _ in range(sessions)])
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, group in [('each', False), ('group', True)]:
+            journal = advent.Journal(os.path.join(tmp, name))
+            t = time.perf_counter()
+            asyncio.run(run(journal, group))
+            t = time.perf_counter() - t
+            print(' journal %-5s %8.0f turns/sec, %6d fsyncs, %d games'
+                % (name, sessions*len(walk)/t, journal.syncs, sessions))
+            journal.f.close()
+        t = time.perf_counter()
+        games = advent.Journal(os.path.join(tmp, 'group')).recover()
+        t = time.perf_counter() - t
+        print(' journal recover %6.0f ms for %d games of %d commands'
+            % (1000*t, len(games), len(walk)))
+
+def benchBatch(games=400):
+    # Games of the walk through batch, seeded 0 up, with a worker for each
+    # core, half the cores and one.  Scaling is games/sec against workers.
+    cpus = os.cpu_count() or 1
+    for workers in sorted({1, max(1, cpus//2), cpus}):
+        t = time.perf_counter()
+        results = advent.batch([walk], range(games), workers)
+        t = time.perf_counter() - t
+        print(' batch %3d workers %8.0f games/sec, %8.0f turns/sec'
+            % (workers, games/t, sum([r['turns'] for r in results])/t))
+
+def benchBranch():
+    # Copying a game part way through the walk: deep copies of everything,
+    # database included, as it used to have to be done, against
+    # Game.clone.  Then playing the walk through step(), which clones
+    # every turn, and fingerprinting the states.
+    game, _ = advent.begin(6)
+    for cmd in walk[:60]:
+        game, _ = advent.step(game, cmd)
+    d, tables = dictState(game.g)
+    print(' branch deepcopy %8.0f clones/sec'
+        % rate(lambda: copy.deepcopy((d, tables)), 20))
+    print(' branch clone    %8.0f clones/sec' % rate(game.clone, 5000))
+    def walkOn():
+        state, _ = advent.begin(6)
+        for cmd in walk:
+            state, _ = advent.step(state, cmd)
+    print(' branch step     %8.0f steps/sec' % (len(walk)*rate(walkOn, 5)))
+    print(' branch digest   %8.0f digests/sec' % rate(game.digest, 5000))
+
+def benchHistory():
+    # Playing the walk with a History, against without, and what the
+    # history holds at the end: its deltas, against keeping a whole copy
+    # of the state for every turn.  Then undoing all of it and redoing it.
+    def walkOn(history):
+        game, _ = advent.begin(6)
+        if history:
+            game.history = advent.History(1<<30)
+        for cmd in walk:
+            game.step(cmd)
+        return game
+    print(' history off  %8.0f turns/sec'
+        % (len(walk)*rate(lambda: walkOn(False), 5)))
+    print(' history on   %8.0f turns/sec'
+        % (len(walk)*rate(lambda: walkOn(True), 5)))
+    tracemalloc.start()
+    game = walkOn(True)
+    deltas = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    game, _ = advent.begin(6)
+    copies = []
+    for cmd in walk:
+        game.step(cmd)
+        copies.append(game.g.copy())
+    whole = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(' history deltas %6.0f KB for %d turns, copies %6.0f KB'
+        % (deltas/1024, len(walk), whole/1024))
+    game = walkOn(True)
+    def both():
+        for _ in walk:
+            game.step('undo')
+        for _ in walk:
+            game.step('redo')
+    print(' history undo %8.0f undos/sec' % (2*len(walk)*rate(both, 5)))
+
+def benchTable(n=5000):
+    # The walk played with the game's state on a Sessions table, against
+    # off it.  Then n sessions part way through the walk, and a look across
+    # all of them, how many lamps are lit and how many dwarves are alive,
+    # by a loop over the games against on the table's arrays.
+    def walkOn(table):
+        game, _ = advent.begin(6)
+        if table is not None:
+            table.add(game)
+        for cmd in walk:
+            game.step(cmd)
+        if table is not None:
+            table.remove(game)
+    table = advent.Sessions()
+    print(' table off %10.0f turns/sec'
+        % (len(walk)*rate(lambda: walkOn(None), 5)))
+    print(' table on  %10.0f turns/sec'
+        % (len(walk)*rate(lambda: walkOn(table), 5)))
+    game, _ = advent.begin(6)
+    for cmd in walk[:60]:
+        game.step(cmd)
+    start = game.g
+    table = advent.Sessions(n)
+    for _ in range(n):
+        game.g = start.copy()
+        table.add(game)
+    sessions = [g for g in table.states if g is not None]
+    lamp = advent.w['lamp']
+    def loop():
+        return (sum([g.prop[lamp] == 1 for g in sessions]),
+            sum([d != 0 for g in sessions for d in g.dloc[1:6]]))
+    prop, dloc = table.tables['prop'], table.tables['dloc']
+    def tables():
+        live = table.live
+        return ((prop[live, lamp] == 1).sum(), (dloc[live, 1:6] != 0).sum())
+    assert loop() == tables()
+    print(' table loop   %8.0f sessions/sec' % (n*rate(loop, 20)))
+    print(' table tables %8.0f sessions/sec' % (n*rate(tables, 20)))
+
+def benchDwarfBatch(n=10000):
+    # The dwarf phase of n games with the dwarves about, some dead and some
+    # with him, played a game at a time by Game.dwarvesMove, as arrive
+    # plays it, against all at once with dwarvesBatch.  Each game has a
+    # CounterRandom of its own and the batch is given what it would draw
+    # next, so they must agree on where every dwarf goes, what they do,
+    # where the knife lands and how many numbers each game used.  Where
+    # the pirate's spotted him, what he does next is the game's alone.
+    base = setup()
+    r = numpy.random.default_rng(1)
+    locs = [loc for loc in range(15, 141) if advent.cave['pirnbr'][loc]]
+    loc = r.choice(locs, n)
+    dloc = r.choice(locs, (n, 7)).astype('h')
+    near = r.random((n, 7)) < 0.3
+    dloc[near] = numpy.repeat(loc[:, None], 7, axis=1)[near]
+    dloc[r.random((n, 7)) < 0.2] = 0
+    odloc = numpy.where(r.random((n, 7)) < 0.5, dloc, r.choice(locs, (n, 7)))
+    dseen = (r.random((n, 7)) < 0.3).astype('b')
+    dloc[:, 0] = odloc[:, 0] = dseen[:, 0] = 0
+    dflag = r.integers(2, 5, n)
+    knfloc = r.choice([0, -1], n) # -1 once he's been told it vanishes.
+    games = []
+    for k in range(n):
+        game = base.clone()
+        game.redirect(advent.NullOutput())
+        game.rng = advent.CounterRandom(k)
+        g = game.g
+        g.loc, g.dflag, g.knfloc = int(loc[k]), int(dflag[k]), int(knfloc[k])
+        g.dloc = array('h', dloc[k].tolist())
+        g.odloc = array('h', odloc[k].tolist())
+        g.dseen = array('b', dseen[k].tolist())
+        games.append(game)
+    rngs = [game.rng.copy() for game in games] # Where each started.
+    draws = []
+    for rng in rngs:
+        rng = rng.copy()
+        draws.append([rng.random() for _ in range(11)])
+    draws = numpy.array(draws)
+    t = time.perf_counter()
+    scalar = [game.dwarvesMove(20*[0]) for game in games]
+    t = time.perf_counter() - t
+    print(' dwarves scalar %10.0f games/sec' % (n/t))
+    advent.dwarfTables()
+    t = time.perf_counter()
+    dtotal, attack, stick, spotted, used = advent.dwarvesBatch(dloc, odloc,
+        dseen, loc, dflag, draws)
+    t = time.perf_counter() - t
+    print(' dwarves batch  %10.0f games/sec' % (n/t))
+    same = scalar == list(zip(dtotal.tolist(), attack.tolist(),
+        stick.tolist()))
+    for k, (game, rng) in enumerate(zip(games, rngs)):
+        g = game.g
+        knife = int(loc[k]) if attack[k] and knfloc[k] >= 0 else knfloc[k]
+        dwarves = 6 if spotted[k] else 7
+        same = same and g.knfloc == knife and all([a[k, :dwarves].tolist()
+            == list(getattr(g, name)[:dwarves]) for name, a in
+            [('dloc', dloc), ('odloc', odloc), ('dseen', dseen)]])
+        if not spotted[k]:
+            for _ in range(used[k]):
+                rng.random()
+            same = same and rng.getstate() == game.rng.getstate()
+    print(' dwarves batch  %s, %d pirates spotted him' % ('agrees' if same
+        else 'DISAGREES', spotted.sum()))
+
+def benchDwarfStats():
+    # Working out how the dwarves get about from the travel table, then
+    # having it again from DWARFSTATS, in a directory of its own.
+    setup()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+        os.chdir(d)
+        try:
+            t = time.perf_counter()
+            advent.dwarfStats()
+            t = time.perf_counter() - t
+            print(' dwarfstats worked out %8.1f ms' % (1000*t))
+            t = time.perf_counter()
+            advent.dwarfStats()
+            t = time.perf_counter() - t
+            print(' dwarfstats cached     %8.1f ms' % (1000*t))
+        finally:
+            os.chdir(cwd)
+
+benches = {
+    'vocab': benchVocab,
+    'dwarves': benchDwarves,
+    'random': benchRandom,
+    'placement': benchPlacement,
+    'speak': benchSpeak,
+    'turns': benchTurns,
+    'state': benchState,
+    'sessions': benchSessions,
+    'startup': benchStartup,
+    'server': benchServer,
+    'saves': benchSaves,
+    'store': benchStore,
+    'journal': benchJournal,
+    'batch': benchBatch,
+    'branch': benchBranch,
+    'history': benchHistory,
+    'table': benchTable,
+    'dwarfbatch': benchDwarfBatch,
+    'dwarfstats': benchDwarfStats,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or benches.keys():
+        benches[name]()